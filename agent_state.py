@@ -1,22 +1,23 @@
 from typing import Annotated, Sequence, List
 from typing_extensions import TypedDict
+from langchain_core.messages import AIMessage
 from langgraph.graph import MessagesState
+from config import config
 
 # State for the researcher team's debate, acting as a dedicated scratchpad.
 class InvestDebateState(TypedDict):
-    bull_history: str      # Stores arguments made by the Bull agent.
-    bear_history: str      # Stores arguments made by the Bear agent.
-    history: str           # The full transcript of the debate.
     current_response: str  # The most recent argument made.
+    turns: List[dict]      # Turn records (speaker, round, content); transcripts derive from these.
+    summary: str           # Rolling summary of the turns no longer shown verbatim.
+    summarized_turns: int  # How many leading turns the summary covers.
     judge_decision: str    # The manager's final decision.
     count: int             # A counter to track the number of debate rounds.
 
 # State for the risk management team's debate.
 class RiskDebateState(TypedDict):
-    risky_history: str     # History of the aggressive risk-taker.
-    safe_history: str      # History of the conservative agent.
-    neutral_history: str   # History of the balanced agent.
-    history: str           # Full transcript of the risk discussion.
+    turns: List[dict]      # Turn records (speaker, round, content); transcripts derive from these.
+    summary: str           # Rolling summary of the turns no longer shown verbatim.
+    summarized_turns: int  # How many leading turns the summary covers.
     latest_speaker: str    # Tracks the last agent to speak.
     current_risky_response: str
     current_safe_response: str
@@ -35,9 +36,25 @@ class AgentState(MessagesState):
     sentiment_report: str
     news_report: str
     fundamentals_report: str
+    # Token-budgeted digests of the four reports: str(budget) -> {report field: digest}.
+    report_digests: dict
     # Nested states for the debates.
     investment_debate_state: InvestDebateState
     investment_plan: str              # The plan from the Research Manager.
     trader_investment_plan: str       # The actionable plan from the Trader.
     risk_debate_state: RiskDebateState
-    final_trade_decision: str         # The final decision from the Portfolio Manager.
\ No newline at end of file
+    final_trade_decision: str         # The final decision from the Portfolio Manager.
+
+def agent_messages(result):
+    """
+    The messages a finished ReAct agent run adds to AgentState.messages.
+
+    Nodes return these as a delta and the MessagesState reducer appends them.
+    The run's input messages are rebuilt from state on every run, and its tool
+    calls and tool results are pruned once the agent has finished, so only the
+    agent's answer is kept. With config["slim_state"] on, no agent messages are
+    kept at all; the report and debate fields already carry the run.
+    """
+    if not result or not result.get("messages") or config.get("slim_state"):
+        return []
+    return [message for message in result["messages"] if isinstance(message, AIMessage) and not message.tool_calls]
@@ -1,142 +1,131 @@
 # Market Analyst: Focuses on technical indicators and price action.
-from .base import create_analyst_node
-from llm import quick_thinking_llm
-from tools.toolkit import toolkit
-from langgraph.prebuilt import create_react_agent
-
-
-def create_market_agent(llm, toolkit, state=None):
-    """Create the market analyst agent with state update capability"""
-    system_prompt = f"""you are a trading assistant specialized in analyzing financial markets. 
-your task is to perform a comprehensive technical market analysis for {state['company_of_interest']} as of {state['trade_date']}.
-You need historical data spanning at least 3 months prior to {state['trade_date']} to calculate meaningful technical indicators."""
-    all_tools_in_toolkit = [getattr(toolkit, name) for name in dir(toolkit) if callable(getattr(toolkit, name)) and not name.startswith("__")]
-    
-    base_agent = create_react_agent(
-        model=llm,
-        tools=all_tools_in_toolkit,
-        prompt=system_prompt
-    )
-    
-    # Wrapper function that updates state
-    def agent_with_state_update(input_data):
-        """Agent wrapper that automatically updates state"""
-        
-        # Run the base agent
-        result = base_agent.invoke(input_data)
-        
-        # If state is provided, update it
-        if state is not None:
-            # Extract final report
-            market_report = ""
-            if result and "messages" in result and result["messages"]:
-                final_message = result["messages"][-1]
-                market_report = final_message.content if hasattr(final_message, 'content') else ""
-            
-            # Update state
-            state["market_report"] = market_report
-            state["messages"].extend(result["messages"])
-            state["sender"] = "market_analyst"
-            
-            print(f"✅ State updated - Market report: {len(market_report)} characters")
-        
-        return result
-    
-    # Return the wrapper if state provided, otherwise return base agent
-    return agent_with_state_update if state is not None else base_agent
-
-def create_social_agent(llm, toolkit, state=None):
-    """Create the social analyst agent with state update capability"""
-    system_prompt = f"""You are a social media sentiment analyst specializing in financial markets. Analyze social sentiment around stocks from various platforms.
-                    your task is task to analyze social sentiment for a given stock : {state['company_of_interest']} on a given date: {state['trade_date']}."""
-    
-    all_tools_in_toolkit = [getattr(toolkit, name) for name in dir(toolkit) if callable(getattr(toolkit, name)) and not name.startswith("__")]
-    
-    base_agent = create_react_agent(
-        model=llm,
-        tools=all_tools_in_toolkit,
-        prompt=system_prompt
-    )
-    
-    def agent_with_state_update(input_data):
-        result = base_agent.invoke(input_data)
-        
-        if state is not None:
-            sentiment_report = ""
-            if result and "messages" in result and result["messages"]:
-                final_message = result["messages"][-1]
-                sentiment_report = final_message.content if hasattr(final_message, 'content') else ""
-            
-            state["sentiment_report"] = sentiment_report
-            state["messages"].extend(result["messages"])
-            state["sender"] = "social_analyst"
-            
-            print(f"✅ State updated - Sentiment report: {len(sentiment_report)} characters")
-        
-        return result
-    
-    return agent_with_state_update if state is not None else base_agent
-
-def create_news_agent(llm, toolkit, state=None):
-    """Create the news analyst agent with state update capability"""
-    system_prompt = f"""You are a financial news analyst. Analyze recent news and its impact on stock performance.
-                   your task is task to analyze recent news and its impact on stock performance for a given stock : {state['company_of_interest']} on a given date: {state['trade_date']}."""
-    
-    all_tools_in_toolkit = [getattr(toolkit, name) for name in dir(toolkit) if callable(getattr(toolkit, name)) and not name.startswith("__")]
-    
-    base_agent = create_react_agent(
-        model=llm,
-        tools=all_tools_in_toolkit,
-        prompt=system_prompt
-    )
-    
-    def agent_with_state_update(input_data):
-        result = base_agent.invoke(input_data)
-        
-        if state is not None:
-            news_report = ""
-            if result and "messages" in result and result["messages"]:
-                final_message = result["messages"][-1]
-                news_report = final_message.content if hasattr(final_message, 'content') else ""
-            
-            state["news_report"] = news_report
-            state["messages"].extend(result["messages"])
-            state["sender"] = "news_analyst"
-            
-            print(f"✅ State updated - News report: {len(news_report)} characters")
-        
-        return result
-    
-    return agent_with_state_update if state is not None else base_agent
-
-def create_fundamentals_agent(llm, toolkit, state=None):
-    """Create the fundamentals analyst agent with state update capability"""
-    system_prompt = f"""You are a fundamental analyst specializing in company financial analysis. Analyze financial statements and company metrics.
-                   your task is task to analyze financial statements and company metrics for a given stock : {state['company_of_interest']} on a given date: {state['trade_date']}."""
-    
-    all_tools_in_toolkit = [getattr(toolkit, name) for name in dir(toolkit) if callable(getattr(toolkit, name)) and not name.startswith("__")]
-    
-    base_agent = create_react_agent(
+from langchain_core.messages import HumanMessage, ToolMessage
+from agent_state import agent_messages
+from report_digest import truncate_to_budget
+
+# The analysts are compiled once per process, so their system prompts stay
+# generic; the company and trade date arrive with each run's input messages.
+MARKET_ANALYST_PROMPT = """you are a trading assistant specialized in analyzing financial markets.
+your task is to perform a comprehensive technical market analysis for the company and trade date given in the conversation.
+You need historical data spanning at least 3 months prior to the trade date to calculate meaningful technical indicators."""
+
+SOCIAL_ANALYST_PROMPT = """You are a social media sentiment analyst specializing in financial markets. Analyze social sentiment around stocks from various platforms.
+                    your task is task to analyze social sentiment for the stock and date given in the conversation."""
+
+NEWS_ANALYST_PROMPT = """You are a financial news analyst. Analyze recent news and its impact on stock performance.
+                   your task is task to analyze recent news and its impact on stock performance for the stock and date given in the conversation."""
+
+FUNDAMENTALS_ANALYST_PROMPT = """You are a fundamental analyst specializing in company financial analysis. Analyze financial statements and company metrics.
+                   your task is task to analyze financial statements and company metrics for the stock and date given in the conversation."""
+
+
+def _create_analyst_agent(llm, toolkit, system_prompt, role):
+    # Only the tools this analyst needs are bound, keeping tool schemas out of the prompt
+    analyst_tools = toolkit.tools_for(role)
+
+    # Imported when an agent is first compiled, so importing the agents stays cheap
+    from langgraph.prebuilt import create_react_agent
+    return create_react_agent(
         model=llm,
-        tools=all_tools_in_toolkit,
+        tools=analyst_tools,
         prompt=system_prompt
     )
-    
-    def agent_with_state_update(input_data):
-        result = base_agent.invoke(input_data)
-        
-        if state is not None:
-            fundamentals_report = ""
-            if result and "messages" in result and result["messages"]:
-                final_message = result["messages"][-1]
-                fundamentals_report = final_message.content if hasattr(final_message, 'content') else ""
-            
-            state["fundamentals_report"] = fundamentals_report
-            state["messages"].extend(result["messages"])
-            state["sender"] = "fundamentals_analyst"
-            
-            print(f"✅ State updated - Fundamentals report: {len(fundamentals_report)} characters")
-        
-        return result
-    
-    return agent_with_state_update if state is not None else base_agent
\ No newline at end of file
+
+def create_market_agent(llm, toolkit):
+    """Create the market analyst agent"""
+    return _create_analyst_agent(llm, toolkit, MARKET_ANALYST_PROMPT, "market_analyst")
+
+def create_social_agent(llm, toolkit):
+    """Create the social analyst agent"""
+    return _create_analyst_agent(llm, toolkit, SOCIAL_ANALYST_PROMPT, "social_analyst")
+
+def create_news_agent(llm, toolkit):
+    """Create the news analyst agent"""
+    return _create_analyst_agent(llm, toolkit, NEWS_ANALYST_PROMPT, "news_analyst")
+
+def create_fundamentals_agent(llm, toolkit):
+    """Create the fundamentals analyst agent"""
+    return _create_analyst_agent(llm, toolkit, FUNDAMENTALS_ANALYST_PROMPT, "fundamentals_analyst")
+
+
+def analyst_messages(state, request):
+    """Build the per-run input messages for an analyst agent"""
+    context = f"Company: {state['company_of_interest']}\nTrade Date: {state['trade_date']}"
+    return [HumanMessage(content=f"{context}\n\n{request}")]
+
+# Reports handed back in place of an analyst's own when it misses its deadline or fails
+MISSING_REPORT = """[MISSING REPORT] The {analyst} {reason} and gathered no data.
+Weigh the other reports accordingly and treat this area as unknown."""
+
+PARTIAL_REPORT = """[PARTIAL REPORT] The {analyst} {reason} before writing its report.
+Raw data it gathered is below; treat any conclusions drawn from it as provisional.
+
+{data}"""
+
+# Token budget for the raw data carried by a partial report
+PARTIAL_DATA_BUDGET = 2000
+
+def run_analyst_agent(agent, state, request, report_field, progress=None):
+    """
+    Run a compiled analyst agent for the current state and return its state update.
+
+    When a `progress` dict is given, the agent is streamed and progress["messages"]
+    holds its messages so far, so a caller that stops waiting can salvage them.
+    """
+    agent_input = {"messages": analyst_messages(state, request)}
+
+    # Run the base agent
+    if progress is None:
+        result = agent.invoke(agent_input)
+    else:
+        result = None
+        for result in agent.stream(agent_input, stream_mode="values"):
+            progress["messages"] = result["messages"]
+    return _analyst_update(result, report_field)
+
+async def arun_analyst_agent(agent, state, request, report_field, progress=None):
+    """Async counterpart of run_analyst_agent, so several analysts can share one event loop"""
+    agent_input = {"messages": analyst_messages(state, request)}
+    if progress is None:
+        result = await agent.ainvoke(agent_input)
+    else:
+        result = None
+        async for result in agent.astream(agent_input, stream_mode="values"):
+            progress["messages"] = result["messages"]
+    return _analyst_update(result, report_field)
+
+def _analyst_update(result, report_field):
+    # Extract final report
+    report = ""
+    if result and "messages" in result and result["messages"]:
+        final_message = result["messages"][-1]
+        report = final_message.content if hasattr(final_message, 'content') else ""
+
+    print(f"✅ Report ready - {report_field.replace('_', ' ').capitalize()}: {len(report)} characters")
+
+    # Each analyst runs as its own graph branch and writes only its report field
+    # and messages; the join node that follows sets the sender
+    return {report_field: report, "messages": agent_messages(result)}
+
+def degraded_analyst_update(report_field, analyst, reason, progresses=()):
+    """
+    State update for an analyst that missed its deadline or failed.
+
+    Args:
+        report_field: The analyst's report field.
+        analyst: Readable analyst name, e.g. "news analyst".
+        reason: What went wrong, e.g. "did not finish within 120s".
+        progresses: Progress dicts of its attempts; tool results gathered by the
+            furthest attempt are carried into a partial report.
+
+    Returns:
+        dict: The report field set to a marked missing or partial report.
+    """
+    messages = max((progress.get("messages", []) for progress in progresses), key=len, default=[])
+    gathered = [f"{message.name or 'tool'}: {message.content}" for message in messages if isinstance(message, ToolMessage)]
+    if gathered:
+        data = truncate_to_budget("\n\n".join(gathered), PARTIAL_DATA_BUDGET)
+        report = PARTIAL_REPORT.format(analyst=analyst, reason=reason, data=data)
+    else:
+        report = MISSING_REPORT.format(analyst=analyst, reason=reason)
+    return {report_field: report}
@@ -1,14 +1,11 @@
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langgraph.prebuilt import ToolNode, tools_condition
 from langchain_core.messages import HumanMessage
+from langchain_core.tools import BaseTool
 import datetime
 from rich.console import Console
 from rich.markdown import Markdown
 
-from dotenv import load_dotenv
-
-load_dotenv()
-
 def create_analyst_node(llm, toolkit, system_message, tools, output_field):
     """
     Creates a node for an analyst agent.
@@ -87,12 +84,13 @@ def run_analyst(analyst_node, initial_state, toolkit):
         dict: Final state after the analyst completes its work
     """
     state = initial_state.copy()  # Make a copy to avoid modifying original
+    state["messages"] = list(initial_state["messages"])  # The copy is shallow; extend a list of our own
     
     # Get all available tools from our toolkit instance
     all_tools_in_toolkit = [
         getattr(toolkit, name) 
         for name in dir(toolkit) 
-        if callable(getattr(toolkit, name)) and not name.startswith("__")
+        if isinstance(getattr(toolkit, name), BaseTool)
     ]
     
     # The ToolNode is a special LangGraph node that executes tool calls
@@ -1,3 +1,6 @@
+from memory.longterm_memory import memory_filters
+from debate_summary import debate_transcript, debate_turn
+
 # This function is a factory that creates a LangGraph node for a researcher agent (Bull or Bear).
 def create_researcher_node(llm, memory, role_prompt, agent_name):
     """
@@ -17,14 +20,14 @@ Args:
         Fundamentals Report: {state['fundamentals_report']}
         """
         # Retrieve relevant memories from past, similar situations.
-        past_memories = memory.get_memories(situation_summary)
+        past_memories = memory.get_memories(situation_summary, filters=memory_filters(state))
         past_memory_str = "\n".join([mem['recommendation'] for mem in past_memories])
         
         # Construct the full prompt for the LLM.
         prompt = f"""{role_prompt}
         Here is the current state of the analysis:
         {situation_summary}
-        Conversation history: {state['investment_debate_state']['history']}
+        Conversation history: {debate_transcript(state['investment_debate_state'])}
         Your opponent's last argument: {state['investment_debate_state']['current_response']}
         Reflections from similar past situations: {past_memory_str or 'No past memories found.'}
         Based on all this information, present your argument conversationally."""
@@ -35,13 +38,11 @@ Args:
         
         # Update the debate state with the new argument.
         debate_state = state['investment_debate_state'].copy()
-        debate_state['history'] += "\n" + argument
-        # Update the specific history for this agent (Bull or Bear).
-        if agent_name == 'Bull Analyst':
-            debate_state['bull_history'] += "\n" + argument
-        else:
-            debate_state['bear_history'] += "\n" + argument
         debate_state['current_response'] = argument
+        # Record the turn; transcripts are rebuilt from the turn records
+        debate_state['turns'] = debate_state.get('turns', []) + [
+            debate_turn(agent_name, response.content, debate_state['count'] + 1)
+        ]
         debate_state['count'] += 1
         return {"investment_debate_state": debate_state}
     return researcher_node
\ No newline at end of file
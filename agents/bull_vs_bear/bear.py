@@ -1,55 +1,56 @@
 from .base_bb import create_researcher_node
-from llm import quick_thinking_llm
-from memory.longterm_memory import bear_memory
-from langgraph.prebuilt import create_react_agent
-from tools.toolkit import toolkit
+from memory.longterm_memory import bear_memory, memory_filters
+from report_digest import reports_for
+from debate_summary import debate_transcript
 
 
-# File 1: bear_agent.py
-from langgraph.prebuilt import create_react_agent
-from memory.longterm_memory import bear_memory
-from tools.toolkit import toolkit
+BEAR_SYSTEM_PROMPT = """You are a Bear Analyst using create_react_agent approach.
+    Your goal is to argue against investing in the stock. Focus on:
+    - Risks, challenges, and negative indicators
+    - Weaknesses found in market, sentiment, news, and fundamental reports
+    - Counter bull arguments effectively
+    
+    The current analysis context and your past similar experiences are provided in the conversation.
+    
+    Present compelling arguments for why this investment should be avoided based on that context."""
+
 
-def create_bear_agent(llm, toolkit, state):
-    """Create Bear researcher agent with state context"""
+def create_bear_agent(llm, toolkit):
+    """Create Bear researcher agent (compiled once, context is passed per run)"""
     
-    # Prepare context from state
+    all_tools = toolkit.tools_for("bear_researcher")
+    
+    from langgraph.prebuilt import create_react_agent
+    return create_react_agent(
+        model=llm,
+        tools=all_tools,
+        prompt=BEAR_SYSTEM_PROMPT
+    )
+
+
+def build_bear_context(state):
+    """Build the Bear researcher's per-run context message from state and memory"""
+    
+    # Prepare context from state; the reports are digests sized for this role
+    reports = reports_for(state, "bear_researcher")
     situation_summary = f"""
-    Market Report: {state['market_report']}
-    Sentiment Report: {state['sentiment_report']}
-    News Report: {state['news_report']}
-    Fundamentals Report: {state['fundamentals_report']}
+    Market Report: {reports['market_report']}
+    Sentiment Report: {reports['sentiment_report']}
+    News Report: {reports['news_report']}
+    Fundamentals Report: {reports['fundamentals_report']}
     
-    Current debate history: {state['investment_debate_state']['history']}
+    Current debate history: {debate_transcript(state['investment_debate_state'])}
     Bull's last argument: {state['investment_debate_state']['current_response']}
     Company: {state['company_of_interest']}
     Analysis Date: {state['trade_date']}
     """
     
     # Get memories from past similar situations
-    past_memories = bear_memory.get_memories(situation_summary)
+    past_memories = bear_memory.get_memories(situation_summary, filters=memory_filters(state))
     past_memory_str = "\n".join([mem['recommendation'] for mem in past_memories])
     
-    # Create system prompt with full context
-    system_prompt = f"""You are a Bear Analyst using create_react_agent approach.
-    Your goal is to argue against investing in the stock. Focus on:
-    - Risks, challenges, and negative indicators
-    - Weaknesses found in market, sentiment, news, and fundamental reports
-    - Counter bull arguments effectively
-    - Use tools if needed to gather additional risk data
-    
-    CURRENT ANALYSIS CONTEXT:
+    return f"""CURRENT ANALYSIS CONTEXT:
     {situation_summary}
     
     PAST SIMILAR EXPERIENCES:
-    {past_memory_str or 'No past memories found.'}
-    
-    Present compelling arguments for why this investment should be avoided based on the above context."""
-    
-    all_tools = [getattr(toolkit, name) for name in dir(toolkit) if callable(getattr(toolkit, name)) and not name.startswith("__")]
-    
-    return create_react_agent(
-        model=llm,
-        tools=all_tools,
-        prompt=system_prompt
-    )
+    {past_memory_str or 'No past memories found.'}"""
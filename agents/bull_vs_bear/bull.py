@@ -1,49 +1,55 @@
 from .base_bb import create_researcher_node
-from llm import quick_thinking_llm
-from memory.longterm_memory import bull_memory
+from memory.longterm_memory import bull_memory, memory_filters
+from report_digest import reports_for
+from debate_summary import debate_transcript
 
-from langgraph.prebuilt import create_react_agent
-from tools.toolkit import toolkit
+
+BULL_SYSTEM_PROMPT = """You are a Bull Analyst. 
+    Your goal is to argue for investing in the stock. 
+    Focus on growth potential, competitive advantages, and positive indicators from the reports.
+      Counter the bear's arguments effectively.
+    
+    The current analysis context and your past similar experiences are provided in the conversation.
+    
+    Present compelling arguments for why this is a good investment opportunity based on that context."""
 
 
-def create_bull_agent(llm, toolkit, state):
-    """Create Bull researcher agent with state context"""
+def create_bull_agent(llm, toolkit):
+    """Create Bull researcher agent (compiled once, context is passed per run)"""
     
-    # Prepare context from state
+    all_tools = toolkit.tools_for("bull_researcher")
+    
+    from langgraph.prebuilt import create_react_agent
+    return create_react_agent(
+        model=llm,
+        tools=all_tools,
+        prompt=BULL_SYSTEM_PROMPT
+    )
+
+
+def build_bull_context(state):
+    """Build the Bull researcher's per-run context message from state and memory"""
+    
+    # Prepare context from state; the reports are digests sized for this role
+    reports = reports_for(state, "bull_researcher")
     situation_summary = f"""
-    Market Report: {state['market_report']}
-    Sentiment Report: {state['sentiment_report']}
-    News Report: {state['news_report']}
-    Fundamentals Report: {state['fundamentals_report']}
+    Market Report: {reports['market_report']}
+    Sentiment Report: {reports['sentiment_report']}
+    News Report: {reports['news_report']}
+    Fundamentals Report: {reports['fundamentals_report']}
     
-    Current debate history: {state['investment_debate_state']['history']}
+    Current debate history: {debate_transcript(state['investment_debate_state'])}
     Bear's last argument: {state['investment_debate_state']['current_response']}
     Company: {state['company_of_interest']}
     Analysis Date: {state['trade_date']}
     """
     
     # Get memories from past similar situations
-    past_memories = bull_memory.get_memories(situation_summary)
+    past_memories = bull_memory.get_memories(situation_summary, filters=memory_filters(state))
     past_memory_str = "\n".join([mem['recommendation'] for mem in past_memories])
     
-    # Create system prompt with full context
-    system_prompt = f"""You are a Bull Analyst. 
-    Your goal is to argue for investing in the stock. 
-    Focus on growth potential, competitive advantages, and positive indicators from the reports.
-      Counter the bear's arguments effectively.
-    
-    CURRENT ANALYSIS CONTEXT:
+    return f"""CURRENT ANALYSIS CONTEXT:
     {situation_summary}
     
     PAST SIMILAR EXPERIENCES:
-    {past_memory_str or 'No past memories found.'}
-    
-    Present compelling arguments for why this is a good investment opportunity based on the above context."""
-    
-    all_tools = [getattr(toolkit, name) for name in dir(toolkit) if callable(getattr(toolkit, name)) and not name.startswith("__")]
-    
-    return create_react_agent(
-        model=llm,
-        tools=all_tools,
-        prompt=system_prompt
-    )
\ No newline at end of file
+    {past_memory_str or 'No past memories found.'}"""
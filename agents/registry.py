@@ -0,0 +1,37 @@
+# Process-wide cache of compiled agents.
+# Agent factories only depend on the LLM, the toolkit and a role, never on the
+# run state, so each LangGraph subgraph is compiled once per process and reused
+# by every node call and every ticker.
+import threading
+
+_compiled_agents = {}
+_lock = threading.Lock()
+
+
+def get_compiled_agent(factory, llm, toolkit, *args):
+    """
+    Return the compiled agent built by `factory(llm, toolkit, *args)`, building it on first use.
+
+    Args:
+        factory: One of the create_*_agent functions.
+        llm: The language model the agent runs on.
+        toolkit: The toolkit whose tools the agent may call.
+        *args: Extra hashable factory arguments, e.g. the risk perspective.
+    """
+    key = (factory.__module__, factory.__qualname__, id(llm), id(toolkit), args)
+    entry = _compiled_agents.get(key)
+    if entry is None:
+        with _lock:
+            entry = _compiled_agents.get(key)
+            if entry is None:
+                # The llm and toolkit are kept alive alongside the agent so
+                # their ids cannot be reused by other objects.
+                entry = (factory(llm, toolkit, *args), llm, toolkit)
+                _compiled_agents[key] = entry
+    return entry[0]
+
+
+def clear_compiled_agents():
+    """Drop every cached agent, e.g. after swapping LLMs in tests or notebooks."""
+    with _lock:
+        _compiled_agents.clear()
@@ -1,28 +1,10 @@
-from langgraph.prebuilt import create_react_agent
-from tools.toolkit import toolkit
-from memory.longterm_memory import trader_memory
+from memory.longterm_memory import trader_memory, memory_filters
+from report_digest import reports_for
 
-def create_trader_agent(llm, toolkit, state):
-        """Create trader agent using create_react_agent"""
-        
-        # Get past trader memories
-        past_memories = trader_memory.get_memories(state['investment_plan'])
-        past_memory_str = "\n".join([mem['recommendation'] for mem in past_memories])
-        
-        system_prompt = f"""You are a Professional Trader using create_react_agent approach.
+TRADER_SYSTEM_PROMPT = """You are a Professional Trader using create_react_agent approach.
         Your role is to convert investment plans into concrete, executable trading proposals.
         
-        CURRENT INVESTMENT PLAN:
-        {state['investment_plan']}
-        
-        COMPANY CONTEXT:
-        Company: {state['company_of_interest']}
-        Analysis Date: {state['trade_date']}
-        Market Report: {state['market_report']}
-
-        
-        PAST TRADING EXPERIENCES:
-        {past_memory_str or 'No past trading experiences found.'}
+        The current investment plan, company context and your past trading experiences are provided in the conversation.
         
         Your responsibilities:
         - Create specific, actionable trading proposals
@@ -31,11 +13,34 @@ def create_trader_agent(llm, toolkit, state):
         - Your response MUST end with 'FINAL TRANSACTION PROPOSAL: **BUY/HOLD/SELL**'
         
         Make your proposal practical and executable."""
+
+def create_trader_agent(llm, toolkit):
+        """Create trader agent using create_react_agent (compiled once, context is passed per run)"""
         
-        all_tools = [getattr(toolkit, name) for name in dir(toolkit) if callable(getattr(toolkit, name)) and not name.startswith("__")]
+        all_tools = toolkit.tools_for("trader")
         
+        from langgraph.prebuilt import create_react_agent
         return create_react_agent(
             model=llm,
             tools=all_tools,
-            prompt=system_prompt
-        )
\ No newline at end of file
+            prompt=TRADER_SYSTEM_PROMPT
+        )
+
+def build_trader_context(state):
+        """Build the trader's per-run context message from state and memory"""
+        
+        # Get past trader memories
+        past_memories = trader_memory.get_memories(state['investment_plan'], filters=memory_filters(state))
+        past_memory_str = "\n".join([mem['recommendation'] for mem in past_memories])
+        
+        return f"""CURRENT INVESTMENT PLAN:
+        {state['investment_plan']}
+        
+        COMPANY CONTEXT:
+        Company: {state['company_of_interest']}
+        Analysis Date: {state['trade_date']}
+        Market Report: {reports_for(state, 'trader')['market_report']}
+
+        
+        PAST TRADING EXPERIENCES:
+        {past_memory_str or 'No past trading experiences found.'}"""
@@ -0,0 +1,237 @@
+# Universe runner: fan CompleteTradingWorkflow out across many tickers.
+# Prices for the whole universe are prefetched in bulk first, then each ticker
+# runs in its own worker (thread or process). A failing ticker is recorded and
+# skipped without affecting the others, and every result is written to disk as
+# soon as it completes.
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from rich.console import Console
+
+from bootstrap import initialize
+from config import config
+
+console = Console()
+
+# One workflow per worker thread (and so per process in process mode); the
+# compiled agents behind it are shared process-wide by agents.registry.
+_worker = threading.local()
+
+
+def default_trade_date():
+    """The trade date run_analysis uses when none is given."""
+    return (datetime.date.today() - datetime.timedelta(days=3)).strftime('%Y-%m-%d')
+
+
+def serialize_state(state):
+    """Make a final workflow state JSON-serializable (messages become type/content dicts)."""
+    serializable_state = dict(state)
+    if 'messages' in serializable_state:
+        serializable_state['messages'] = [
+            {
+                'type': msg.__class__.__name__,
+                'content': msg.content
+            } for msg in serializable_state['messages']
+        ]
+    return serializable_state
+
+
+def _workflow():
+    if getattr(_worker, "workflow", None) is None:
+        from main import CompleteTradingWorkflow
+        _worker.workflow = CompleteTradingWorkflow()
+    return _worker.workflow
+
+
+def run_ticker(ticker, trade_date, output_dir, resume=True):
+    """
+    Run the full workflow for one ticker and write its final state to output_dir.
+
+    Never raises: failures are returned as a summary with status "error" so
+    one bad ticker cannot take down the batch. With checkpointing on, a ticker
+    whose earlier run failed part-way resumes from its last completed node
+    unless resume is False.
+    """
+    started = time.time()
+    summary = {"ticker": ticker, "trade_date": trade_date}
+    try:
+        final_state = _workflow().run_analysis(ticker, trade_date, resume=resume)
+        path = os.path.join(output_dir, f"{ticker}.json")
+        with open(path, "w") as f:
+            json.dump(serialize_state(final_state), f, indent=2)
+        summary.update(status="ok", path=path, final_trade_decision=final_state.get("final_trade_decision", ""))
+    except Exception as e:
+        summary.update(status="error", error=f"{type(e).__name__}: {e}")
+    summary["seconds"] = round(time.time() - started, 2)
+    return summary
+
+
+def _init_process_worker(workers):
+    """Give a spawned worker its share of the provider limits."""
+    # Every process builds its own governor from config["rate_limits"], so
+    # without this N workers would together send N times the allowed rate.
+    from rate_limiter import governor, split_limits
+    governor.configure(split_limits(config.get("rate_limits", {}), workers))
+
+
+def _run_ticker_in_process(ticker, trade_date, output_dir, resume=True):
+    """run_ticker for a worker process, returning the worker's limiter stats as well."""
+    from rate_limiter import governor
+    summary = run_ticker(ticker, trade_date, output_dir, resume)
+    return summary, os.getpid(), governor.stats()
+
+
+def _print_limiter_stats(limiter_stats, note=""):
+    for key, stats in limiter_stats.items():
+        console.print(f"[cyan]{key}{note}: {stats['calls']} calls, {stats['waited_calls']} throttled, "
+                      f"avg wait {stats['avg_wait']}s, max wait {stats['max_wait']}s[/cyan]")
+
+
+def prefetch_prices(tickers, trade_date):
+    """Bulk-load the price history every ticker's analysts will ask for, and seed their indicator state."""
+    from tools.indicator_state import indicator_states
+    from tools.indicators import warmup_calendar_days
+    from tools.price_cache import price_store
+
+    end = datetime.date.fromisoformat(trade_date)
+    start = end - datetime.timedelta(days=warmup_calendar_days(indicator_states.keep_rows))
+    try:
+        frames = price_store.get_many(tickers, start.isoformat(), trade_date)
+    except Exception as e:
+        # Agents fall back to per-ticker fetches, so a failed prefetch only costs speed
+        console.print(f"[yellow]⚠️ Price prefetch failed: {e}[/yellow]")
+        return
+    try:
+        # One panel pass for the universe instead of a bar-by-bar seed per ticker
+        seeded = indicator_states.seed_many(frames)
+        if seeded:
+            console.print(f"[cyan]📈 Seeded indicator state for {seeded} tickers[/cyan]")
+    except Exception as e:
+        console.print(f"[yellow]⚠️ Indicator seeding failed: {e}[/yellow]")
+
+
+def run_universe(tickers, trade_date=None, workers=None, executor=None, output_dir=None, prefetch=True, resume=True):
+    """
+    Analyze many tickers for one trade date with bounded concurrency.
+
+    Args:
+        tickers: Ticker symbols to analyze; duplicates are dropped.
+        trade_date: Trade date in yyyy-mm-dd format; defaults to three days ago.
+        workers: Maximum concurrent workflows; defaults to config["batch_workers"].
+        executor: "thread" or "process"; defaults to config["batch_executor"].
+        output_dir: Where per-ticker JSON results and summary.jsonl are written;
+            defaults to <results_dir>/batch/<trade_date>.
+        prefetch: Bulk-download prices for the universe before fanning out.
+        resume: Resume checkpointed runs (config["checkpointing"]) instead of starting over.
+
+    Returns:
+        list: One summary dict per ticker, in completion order.
+    """
+    tickers = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers if ticker.strip()))
+    trade_date = trade_date or default_trade_date()
+    workers = workers or config.get("batch_workers", 8)
+    executor = executor or config.get("batch_executor", "thread")
+    output_dir = output_dir or os.path.join(config["results_dir"], "batch", trade_date)
+    os.makedirs(output_dir, exist_ok=True)
+
+    console.print(f"[bold blue]🚀 Batch run: {len(tickers)} tickers on {trade_date} ({workers} {executor} workers)[/bold blue]")
+    if prefetch:
+        prefetch_prices(tickers, trade_date)
+
+    if executor == "process":
+        # Spawned (not forked) workers: the parent already runs HTTP and database
+        # threads whose locks a forked child could inherit in a held state.
+        processes = max(min(workers, len(tickers)), 1)
+        pool = ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_process_worker, initargs=(processes,),
+        )
+        task = _run_ticker_in_process
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+        task = run_ticker
+    started = time.time()
+    summaries = []
+    # Latest limiter stats per worker process; they are cumulative, so the last one counts
+    worker_stats = {}
+    with open(os.path.join(output_dir, "summary.jsonl"), "a") as summary_file:
+        with pool:
+            futures = {pool.submit(task, ticker, trade_date, output_dir, resume): ticker for ticker in tickers}
+            for future in as_completed(futures):
+                try:
+                    summary = future.result()
+                    if executor == "process":
+                        summary, pid, stats = summary
+                        worker_stats[pid] = stats
+                except Exception as e:
+                    # Only reachable when the worker itself dies (e.g. a killed process)
+                    summary = {"ticker": futures[future], "trade_date": trade_date, "status": "error", "error": f"{type(e).__name__}: {e}"}
+                summaries.append(summary)
+                summary_file.write(json.dumps(summary) + "\n")
+                summary_file.flush()
+
+                elapsed = time.time() - started
+                rate = len(summaries) / elapsed * 60 if elapsed > 0 else 0.0
+                style = "green" if summary["status"] == "ok" else "red"
+                console.print(f"[{style}]{summary['ticker']}: {summary['status']}[/{style}] "
+                              f"({len(summaries)}/{len(tickers)}, {rate:.1f} tickers/min)")
+
+    elapsed = time.time() - started
+    failed = sum(1 for summary in summaries if summary["status"] != "ok")
+    rate = len(summaries) / elapsed * 60 if elapsed > 0 else 0.0
+    console.print(f"[bold green]🏁 Batch finished: {len(summaries) - failed} ok, {failed} failed "
+                  f"in {elapsed:.1f}s ({rate:.1f} tickers/min)[/bold green]")
+    if executor == "process":
+        # Each worker process kept its own share of the limits
+        from rate_limiter import merge_stats
+        _print_limiter_stats(merge_stats(worker_stats.values()), f" ({len(worker_stats)} workers)")
+    else:
+        from rate_limiter import governor
+        _print_limiter_stats(governor.stats())
+    return summaries
+
+
+def _read_tickers(args):
+    tickers = list(args.tickers)
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers.extend(line.split("#")[0].strip() for line in f)
+    return [ticker for ticker in tickers if ticker]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the trading workflow across a universe of tickers.")
+    parser.add_argument("tickers", nargs="*", help="Ticker symbols to analyze")
+    parser.add_argument("--tickers-file", help="File with one ticker per line (# starts a comment)")
+    parser.add_argument("--date", dest="trade_date", help="Trade date in yyyy-mm-dd format")
+    parser.add_argument("--workers", type=int, help="Maximum concurrent workflows")
+    parser.add_argument("--executor", choices=["thread", "process"], help="Worker pool type")
+    parser.add_argument("--output-dir", help="Directory for per-ticker results and summary.jsonl")
+    parser.add_argument("--no-prefetch", action="store_true", help="Skip the bulk price prefetch")
+    parser.add_argument("--fresh", action="store_true", help="Start every ticker over instead of resuming checkpointed runs")
+    args = parser.parse_args()
+    initialize()
+
+    tickers = _read_tickers(args)
+    if not tickers:
+        parser.error("no tickers given")
+    summaries = run_universe(
+        tickers,
+        trade_date=args.trade_date,
+        workers=args.workers,
+        executor=args.executor,
+        output_dir=args.output_dir,
+        prefetch=not args.no_prefetch,
+        resume=not args.fresh,
+    )
+    return 0 if all(summary["status"] == "ok" for summary in summaries) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
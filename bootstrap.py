@@ -0,0 +1,75 @@
+# Explicit process initialization.
+# Importing the workflow has no side effects: the configuration is not printed,
+# no directory is created, no environment variable is touched and no API client
+# is built. Entry points call initialize() once; everything else (chat models,
+# tools, memories, caches) is constructed on first use, and the pieces that
+# need credentials call load_env() themselves.
+import os
+import threading
+from pprint import pprint
+
+from config import config
+
+_env_loaded = False
+_lock = threading.Lock()
+
+
+def load_env():
+    """Load .env into os.environ, once per process."""
+    global _env_loaded
+    if not _env_loaded:
+        with _lock:
+            if not _env_loaded:
+                from dotenv import load_dotenv
+                load_dotenv()
+                _env_loaded = True
+
+
+def enable_tracing(project=None):
+    """Turn on LangSmith tracing for this process."""
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    if project:
+        os.environ["LANGCHAIN_PROJECT"] = project
+
+
+def warm_up():
+    """Build the chat models and import every tool now rather than on first use."""
+    from llm import LLM_MODELS, get_llm
+    from tools.toolkit import TOOL_MODULES, toolkit
+
+    for kind in LLM_MODELS:
+        get_llm(kind)
+    for name in TOOL_MODULES:
+        toolkit.get_tool(name)
+
+
+def initialize(overrides=None, verbose=False, tracing=False, warm=False):
+    """
+    Prepare the process for running workflows.
+
+    Settings read when a module is imported (rate limits, memory backend and
+    writer) only see overrides applied before main is imported.
+
+    Args:
+        overrides: Dict merged into the shared config.
+        verbose: Print the resulting configuration.
+        tracing: Enable LangSmith tracing.
+        warm: Build chat models and import tools eagerly, so a long-lived
+            process pays for them up front and fails fast on bad credentials.
+
+    Returns:
+        dict: The shared config.
+    """
+    load_env()
+    if overrides:
+        config.update(overrides)
+    # Create the cache directory if it doesn't already exist.
+    os.makedirs(config["data_cache_dir"], exist_ok=True)
+    if tracing:
+        enable_tracing()
+    if verbose:
+        print("Configuration dictionary created:")
+        pprint(config)
+    if warm:
+        warm_up()
+    return config
@@ -0,0 +1,84 @@
+# Durable checkpoints for CompleteTradingWorkflow runs.
+# With checkpointing on, the graph saves its state to SQLite after every node,
+# keyed by "TICKER:YYYY-MM-DD". A run that fails part-way, say a provider error
+# in the portfolio manager after fifteen LLM calls, resumes from the last
+# completed node instead of from initialization. LangGraph only rewrites the
+# channels a node changed, and values are msgpack, zlib-compressed above a
+# small size, so a checkpointed run costs a few compressed reports on disk.
+import asyncio
+import os
+import sqlite3
+import zlib
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from config import config
+
+# Serialized values larger than this many bytes are compressed
+COMPRESS_ABOVE = 1024
+
+
+def run_thread_id(ticker, trade_date):
+    """Checkpoint thread of one workflow run."""
+    return f"{ticker.upper()}:{trade_date}"
+
+
+class CompactSerializer:
+    """LangGraph's msgpack serializer with zlib compression for larger values."""
+
+    def __init__(self, level=6):
+        self.inner = JsonPlusSerializer()
+        self.level = level
+
+    def dumps_typed(self, obj):
+        type_, data = self.inner.dumps_typed(obj)
+        if len(data) > COMPRESS_ABOVE:
+            return f"{type_}+zlib", zlib.compress(data, self.level)
+        return type_, data
+
+    def loads_typed(self, data):
+        type_, payload = data
+        if type_.endswith("+zlib"):
+            type_, payload = type_[:-len("+zlib")], zlib.decompress(payload)
+        return self.inner.loads_typed((type_, payload))
+
+
+class WorkflowSaver(SqliteSaver):
+    """SqliteSaver that also serves ainvoke, running its queries in a worker thread."""
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        checkpoints = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def open_checkpointer(path=None):
+    """
+    Open the SQLite checkpoint store.
+
+    Args:
+        path: Database file; defaults to config["checkpointing"]["path"], or
+            checkpoints.sqlite in the data cache directory.
+
+    Returns:
+        WorkflowSaver: A saver usable by both invoke and ainvoke.
+    """
+    path = path or config.get("checkpointing", {}).get("path") or os.path.join(config["data_cache_dir"], "checkpoints.sqlite")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Worker threads of a batch run share the file; WAL lets readers and one writer overlap
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return WorkflowSaver(conn, serde=CompactSerializer())
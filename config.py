@@ -1,5 +1,3 @@
-from pprint import pprint
-import os
 # Define our central configuration for this notebook run.
 config = {
     "results_dir": "./results",
@@ -11,12 +9,119 @@ config = {
     # Debate and discussion settings control the flow of collaborative agents.
     "max_debate_rounds": 2,          # The Bull vs. Bear debate will have 2 rounds.
     "max_risk_discuss_rounds": 1,    # The Risk team has 1 round of debate.
+    "parallel_risk_round": False,    # Run the risky, safe and neutral analysts of a round concurrently.
+    # Analysis-stage deadlines in seconds, per analyst node or "default" (None: wait
+    # indefinitely). A late analyst hands back a report marked missing or partial.
+    "analyst_deadlines": {"default": 180},
+    # Launch a hedged second attempt of an analyst still running after this many
+    # seconds, or as soon as its first attempt fails (None: no hedging).
+    "analyst_hedge_after": None,
+    # Downstream agents read condensed analyst reports: after the analysts run,
+    # each report is digested once per budget (tokens per report) and every role
+    # listed here reads the digest sized for it; other roles read full reports.
+    "report_digest": {
+        "enabled": True,
+        "budgets": {
+            "bull_researcher": 400,
+            "bear_researcher": 400,
+            "research_manager": 800,
+            "trader": 800,
+        },
+    },
+    # Debate prompts carry a rolling summary of older turns plus the last K turns
+    # verbatim, so each turn costs about the same however many rounds are run.
+    "debate_summary": {
+        "enabled": True,
+        "keep_last_turns": {"investment": 2, "risk": 3},
+        "budget": 500,                # Tokens of rolling summary per debate.
+    },
+    # Keep no agent messages in the workflow state; reports and debate fields carry the run.
+    "slim_state": False,
+    # Save a checkpoint after every node (SQLite; path defaults to data_cache_dir) so a
+    # failed run for the same ticker and trade date resumes from its last completed node.
+    "checkpointing": {
+        "enabled": False,
+        "path": None,
+    },
     "max_recur_limit": 100,          # Safety limit for agent loops.
     # Tool settings control data fetching behavior.
     "online_tools": True,            # Use live APIs; set to False to use cached data for faster, cheaper runs.
-    "data_cache_dir": "./data_cache" # Directory for caching online data.
+    "data_cache_dir": "./data_cache", # Directory for caching online data.
+    "bulk_download_chunk": 100,      # Tickers per batched yf.download request when prefetching a universe.
+    # Universe runs (batch_runner.py): concurrent workflows and the pool that runs them.
+    "batch_workers": 8,
+    "batch_executor": "thread",      # "thread" or "process"
+    # Tools each agent role may call; roles bound to an empty list get no tool schemas at all.
+    "agent_tools": {
+        "market_analyst": ["get_yfinance_data", "get_technical_indicators"],
+        "social_analyst": ["get_social_media_sentiment"],
+        "news_analyst": ["get_finnhub_news", "get_macroeconomic_news"],
+        "fundamentals_analyst": ["get_fundamental_analysis"],
+        "bull_researcher": [],
+        "bear_researcher": [],
+        "research_manager": [],
+        "trader": ["get_yfinance_data"],
+        "risk_analyst": [],
+        "portfolio_manager": [],
+    },
+    # Shared rate limits per provider or provider:model: requests/min, tokens/min
+    # and maximum in-flight calls. Providers without an entry are not throttled.
+    "rate_limits": {
+        "openai:gpt-4o": {"rpm": 500, "tpm": 30_000, "concurrency": 8},
+        "openai:gpt-4o-mini": {"rpm": 500, "tpm": 200_000, "concurrency": 16},
+        "openai:text-embedding-3-small": {"rpm": 3_000, "tpm": 1_000_000, "concurrency": 16},
+        "tavily": {"rpm": 100, "concurrency": 8},
+        "finnhub": {"rpm": 60, "concurrency": 4},
+        "yahoo": {"rpm": 120, "concurrency": 4},
+    },
+    "llm_completion_token_estimate": 1000,  # Completion tokens reserved per chat call when max_tokens is unset.
+    # Opt-in persistent chat response cache (SQLite under data_cache_dir); reruns of
+    # the same ticker and date replay identical prompts instead of paying for them.
+    "llm_cache": {
+        "enabled": False,
+        "max_entries": 50_000,
+        "max_bytes": 500 * 1024 * 1024,
+        "max_age_days": 30,
+    },
+    # Agent memories live in an on-disk Chroma store under data_cache_dir shared by
+    # all processes; with memory_persist off they are in-memory and can be
+    # warm-started from the per-memory snapshots in memory_snapshot_dir.
+    "memory_persist": True,
+    # "chroma", or "flat" for a memory-mapped NumPy matrix searched with one
+    # matrix product (fast for tens of thousands of entries); the flat store
+    # keeps vectors as memory_flat_dtype ("float32" or "float16").
+    "memory_backend": "chroma",
+    "memory_flat_dtype": "float32",
+    "memory_snapshot_dir": None,
+    # Memories are tagged with company, sector, trade date, agent and signal.
+    # Retrieval searches "all" memories, the same "ticker" or the same "sector"
+    # (from ticker_sectors), and with memory_point_in_time only memories from
+    # before the trade date, so backtests never see the future.
+    "memory_scope": "all",
+    "memory_point_in_time": True,
+    "ticker_sectors": {},            # e.g. {"AAPL": "Technology"}
+    # Memory inserts go through a background writer that batches and coalesces them.
+    "memory_write_behind": True,
+    "memory_write_batch": 64,        # Queued add_situations calls folded into one write.
+    "memory_write_interval": 0.2,    # Seconds the writer waits to fill a batch.
+    # Keeps memories bounded: merge situations at least this cosine-similar, drop
+    # entries older than max_age_days, and keep only the most retrieved (then
+    # newest) entries per ticker and per collection. Runs every every_inserts writes.
+    "memory_compaction": {
+        "similarity": 0.97,
+        "max_age_days": 365,
+        "max_per_ticker": 200,
+        "max_entries": 5_000,
+        "every_inserts": 500,
+    },
+    "embedding_cache_size": 100_000,  # Embedding vectors kept in the shared on-disk LRU cache.
+    # Seconds a cached web search stays fresh, per search tool.
+    "search_cache_ttl": {
+        "fundamentals": 24 * 3600,   # Fundamentals change slowly.
+        "macro_news": 4 * 3600,      # Macro headlines move within the day.
+        "social_sentiment": 2 * 3600,
+    },
 }
-# Create the cache directory if it doesn't already exist.
-os.makedirs(config["data_cache_dir"], exist_ok=True)
-print("Configuration dictionary created:")
-pprint(config)
+# Importing this module only defines the dict; bootstrap.initialize() creates
+# the cache directory and prints the configuration for entry points.
+
@@ -0,0 +1,97 @@
+# Deadlines and hedged retries for slow, independent calls.
+# An attempt gets a progress dict it may fill as it works. If no attempt
+# finishes before the deadline the caller gets None and the progress of every
+# attempt, so it can degrade to what was gathered instead of blocking. With
+# hedging on, a second attempt is launched when the first is still running
+# after `hedge_after` seconds, or as soon as it fails; the first to succeed wins.
+import asyncio
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+
+def _next_timeout(started, deadline, hedge_after, hedge_due):
+    elapsed = time.perf_counter() - started
+    limits = [limit - elapsed for limit in (deadline, hedge_after if hedge_due else None) if limit is not None]
+    return max(min(limits), 0) if limits else None
+
+
+def call_with_deadline(attempt, executor, deadline=None, hedge_after=None, on_hedge=None):
+    """
+    Run `attempt(progress)` on `executor` within a deadline, optionally hedged.
+
+    Args:
+        attempt: Callable taking a progress dict and returning the result.
+        executor: Executor the attempts run on. Threads cannot be killed, so an
+            attempt that misses the deadline is abandoned and finishes unobserved.
+        deadline: Seconds to wait for a result, or None to wait indefinitely.
+        hedge_after: Seconds after which a second attempt is launched, or None.
+        on_hedge: Called with no arguments when the hedged attempt starts.
+
+    Returns:
+        tuple: (result or None if the deadline passed, list of progress dicts).
+
+    Raises:
+        The last attempt's exception when every attempt failed before the deadline.
+    """
+    started = time.perf_counter()
+    progresses = []
+
+    def launch():
+        progresses.append({})
+        return executor.submit(attempt, progresses[-1])
+
+    pending = {launch()}
+    error = None
+    while pending:
+        hedge_due = hedge_after is not None and len(progresses) == 1
+        done, pending = wait(
+            pending, timeout=_next_timeout(started, deadline, hedge_after, hedge_due), return_when=FIRST_COMPLETED,
+        )
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                return future.result(), progresses
+            error = future.exception()
+        elapsed = time.perf_counter() - started
+        if deadline is not None and elapsed >= deadline:
+            return None, progresses
+        if hedge_due and (elapsed >= hedge_after or not pending):
+            if on_hedge:
+                on_hedge()
+            pending.add(launch())
+    raise error
+
+
+async def acall_with_deadline(attempt, deadline=None, hedge_after=None, on_hedge=None):
+    """Async counterpart of call_with_deadline; `attempt(progress)` is a coroutine function and late attempts are cancelled."""
+    started = time.perf_counter()
+    progresses = []
+
+    def launch():
+        progresses.append({})
+        return asyncio.ensure_future(attempt(progresses[-1]))
+
+    pending = {launch()}
+    error = None
+    try:
+        while pending:
+            hedge_due = hedge_after is not None and len(progresses) == 1
+            done, pending = await asyncio.wait(
+                pending, timeout=_next_timeout(started, deadline, hedge_after, hedge_due), return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), progresses
+                error = task.exception()
+            elapsed = time.perf_counter() - started
+            if deadline is not None and elapsed >= deadline:
+                return None, progresses
+            if hedge_due and (elapsed >= hedge_after or not pending):
+                if on_hedge:
+                    on_hedge()
+                pending.add(launch())
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
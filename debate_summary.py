@@ -0,0 +1,133 @@
+# Rolling summaries of the investment and risk debates.
+# Every debate turn is kept as a structured record. Prompts show a summary of
+# the older turns followed by the last K turns verbatim, so a turn's prompt stays
+# about the same size however many rounds the debate runs. Turns that slide out
+# of the verbatim window are folded into the summary by the quick model; each
+# fold only reads the previous summary and the new turns, and folds are cached
+# on disk by content, so reruns cost nothing.
+import hashlib
+import os
+
+from config import config
+from report_digest import DigestCache, truncate_to_budget
+
+# Bump when the prompt changes so stale summaries are not reused.
+SUMMARY_VERSION = 1
+
+SUMMARY_PROMPT = """You keep a running summary of the {debate} debate between trading analysts.
+Merge the new turns into the summary so far. Keep each speaker's key claims, figures, concessions and open disagreements, attributed to the speaker.
+Drop repetition and rhetoric. Use terse bullet points grouped by speaker.
+Write at most {words} words.
+
+Summary so far:
+{summary}
+
+New turns:
+{turns}"""
+
+
+def debate_turn(speaker, content, round):
+    """A structured record of one debate turn."""
+    return {"speaker": speaker, "round": round, "content": content}
+
+
+def format_turns(turns):
+    return "\n".join(f"{turn['speaker']}: {turn['content']}" for turn in turns)
+
+
+def debate_history(debate_state, speaker=None):
+    """The full transcript rebuilt from the turn records, or only `speaker`'s turns."""
+    turns = debate_state.get("turns") or []
+    return format_turns([turn for turn in turns if speaker is None or turn["speaker"] == speaker])
+
+
+def speaker_turns(debate_state, speaker):
+    """How many turns `speaker` has taken."""
+    return sum(1 for turn in debate_state.get("turns") or [] if turn["speaker"] == speaker)
+
+
+def debate_transcript(debate_state):
+    """
+    The debate as a prompt should see it.
+
+    Returns:
+        str: The rolling summary of folded turns, then the remaining turns verbatim.
+    """
+    turns = debate_state.get("turns") or []
+    recent = format_turns(turns[debate_state.get("summarized_turns", 0):])
+    summary = debate_state.get("summary")
+    if not summary:
+        return recent
+    return f"Summary of earlier turns:\n{summary}\n\nMost recent turns:\n{recent}"
+
+
+def summary_key(model, budget, debate, summary, turns):
+    text = f"{SUMMARY_VERSION}\x00{model}\x00{budget}\x00{debate}\x00{summary}\x00{format_turns(turns)}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DebateSummarizer:
+    """Folds turns older than the verbatim window into a debate's rolling summary."""
+
+    def __init__(self, settings=None, cache=None, llm=None):
+        self.settings = settings if settings is not None else config.get("debate_summary", {})
+        self.cache = cache or DigestCache(os.path.join(config["data_cache_dir"], "debate_summary_cache.sqlite"))
+        self._llm = llm
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            from llm import get_llm
+            self._llm = get_llm("quick")
+        return self._llm
+
+    def keep_last(self, debate):
+        """Turns of `debate` ("investment" or "risk") kept verbatim, or None when summaries are off."""
+        if not self.settings.get("enabled"):
+            return None
+        return self.settings.get("keep_last_turns", {}).get(debate)
+
+    def pending(self, debate_state, debate):
+        """Turns that have slid out of the verbatim window but are not in the summary yet."""
+        keep_last = self.keep_last(debate)
+        turns = debate_state.get("turns") or []
+        if keep_last is None:
+            return []
+        return turns[debate_state.get("summarized_turns", 0):max(len(turns) - keep_last, 0)]
+
+    def fold(self, debate_state, debate):
+        """
+        Fold pending turns into the rolling summary.
+
+        Args:
+            debate_state: InvestDebateState or RiskDebateState with turn records.
+            debate: "investment" or "risk", selecting the verbatim window.
+
+        Returns:
+            The debate state, updated in a copy when anything was folded.
+        """
+        turns = self.pending(debate_state, debate)
+        if not turns:
+            return debate_state
+
+        budget = self.settings.get("budget", 500)
+        summary = debate_state.get("summary", "")
+        key = summary_key(getattr(self.llm, "model_name", type(self.llm).__name__), budget, debate, summary, turns)
+        folded = self.cache.get(key)
+        if folded is None:
+            prompt = SUMMARY_PROMPT.format(
+                debate=debate, words=int(budget * 0.75), summary=summary or "(none yet)", turns=format_turns(turns),
+            )
+            try:
+                response = self.llm.invoke([("user", prompt)], max_tokens=budget)
+                folded = truncate_to_budget(response.content.strip(), budget)
+                self.cache.put(key, folded)
+            except Exception as e:
+                # A failed fold degrades to a truncated transcript rather than failing the run
+                print(f"⚠️ Summary of the {debate} debate failed, truncating instead: {e}")
+                folded = truncate_to_budget(f"{summary}\n{format_turns(turns)}".strip(), budget)
+
+        debate_state = debate_state.copy()
+        debate_state["summary"] = folded
+        debate_state["summarized_turns"] = debate_state.get("summarized_turns", 0) + len(turns)
+        return debate_state
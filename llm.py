@@ -1,18 +1,45 @@
-from langchain_openai import ChatOpenAI
+# The two chat models every agent shares. They are built on first use, so
+# importing this module neither loads langchain_openai nor needs an API key.
+import threading
+
 from config import config
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# Initialize the powerful LLM for high-stakes reasoning tasks.
-deep_thinking_llm = ChatOpenAI(
-    model=config["deep_think_llm"],
-    base_url=config["backend_url"],
-    temperature=0.1
-)
-# Initialize the faster, cost-effective LLM for routine data processing.
-quick_thinking_llm = ChatOpenAI(
-    model=config["quick_think_llm"],
-    base_url=config["backend_url"],
-    temperature=0.1
-)
\ No newline at end of file
+
+# Model kind -> config key naming the model.
+LLM_MODELS = {
+    "deep": "deep_think_llm",    # The powerful LLM for high-stakes reasoning tasks.
+    "quick": "quick_think_llm",  # The faster, cost-effective LLM for routine data processing.
+}
+
+_llms = {}
+_lock = threading.Lock()
+
+
+def get_llm(kind):
+    """Return the shared "deep" or "quick" chat model, building it on first use."""
+    if kind not in _llms:
+        with _lock:
+            if kind not in _llms:
+                from bootstrap import load_env
+                from llm_cache import get_llm_cache
+                from llm_governed import GovernedChatOpenAI
+
+                load_env()
+                _llms[kind] = GovernedChatOpenAI(
+                    model=config[LLM_MODELS[kind]],
+                    base_url=config["backend_url"],
+                    temperature=0.1,
+                    cache=get_llm_cache()
+                )
+    return _llms[kind]
+
+
+def __getattr__(name):
+    # `from llm import quick_thinking_llm` keeps working; it builds the model at that point
+    if name == "deep_thinking_llm":
+        return get_llm("deep")
+    if name == "quick_thinking_llm":
+        return get_llm("quick")
+    if name == "GovernedChatOpenAI":
+        from llm_governed import GovernedChatOpenAI
+        return GovernedChatOpenAI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
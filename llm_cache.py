@@ -0,0 +1,149 @@
+# Persistent response cache for the chat models.
+# LangChain consults the cache with the serialized messages and an "llm string"
+# that encodes the model, its parameters and any bound tool schemas, so a rerun
+# of the same ticker and date replays every identical prompt from SQLite
+# instead of paying for it again. Entries are evicted by age and total size.
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, Generation
+
+from config import config
+
+# Only chat generations and the AI messages inside them are ever revived.
+CACHED_TYPES = [ChatGeneration, Generation, AIMessage]
+
+
+class SQLiteLLMCache(BaseCache):
+    """LangChain LLM cache stored in SQLite with size- and age-based eviction."""
+
+    def __init__(self, cache_path, max_entries=None, max_bytes=None, max_age_days=None, evict_every=100):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache (last_used)")
+        self.evict()
+
+    def _connect(self):
+        return sqlite3.connect(self.cache_path, timeout=30)
+
+    @staticmethod
+    def _key(prompt, llm_string):
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt, llm_string):
+        key = self._key(prompt, llm_string)
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.max_age and now - row[1] > self.max_age:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return loads(row[0], allowed_objects=CACHED_TYPES) if row is not None else None
+
+    def update(self, prompt, llm_string, return_val):
+        response = dumps(list(return_val))
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (self._key(prompt, llm_string), response, len(response), now, now),
+            )
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.evict_every == 0
+        if due:
+            self.evict()
+
+    def clear(self, **kwargs):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+    def evict(self):
+        """Drop expired entries, then the least recently used ones beyond the size limits."""
+        with self._connect() as conn:
+            if self.max_age:
+                conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.max_age,))
+            if self.max_entries:
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    " SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            if self.max_bytes:
+                # Keep the most recently used entries whose running size fits the budget.
+                conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    " SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_used DESC) AS running"
+                    " FROM llm_cache) WHERE running > ?)",
+                    (self.max_bytes,),
+                )
+
+    def stats(self):
+        """Hit/miss counters for this process plus the current size of the cache."""
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+def build_llm_cache(settings=None):
+    """Return the configured SQLiteLLMCache, or None when caching is disabled."""
+    settings = settings if settings is not None else config.get("llm_cache", {})
+    if not settings.get("enabled"):
+        return None
+    return SQLiteLLMCache(
+        os.path.join(config["data_cache_dir"], "llm_cache.sqlite"),
+        max_entries=settings.get("max_entries"),
+        max_bytes=settings.get("max_bytes"),
+        max_age_days=settings.get("max_age_days"),
+    )
+
+
+_llm_cache = None
+_llm_cache_built = False
+_build_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """The process-wide response cache (None when disabled), built on first use."""
+    global _llm_cache, _llm_cache_built
+    if not _llm_cache_built:
+        with _build_lock:
+            if not _llm_cache_built:
+                _llm_cache = build_llm_cache()
+                _llm_cache_built = True
+    return _llm_cache
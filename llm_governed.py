@@ -0,0 +1,28 @@
+from langchain_openai import ChatOpenAI
+from config import config
+from rate_limiter import governor, estimate_tokens
+
+
+class GovernedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI whose requests wait on the shared rate limiter instead of running into 429s."""
+
+    def _token_estimate(self, messages):
+        # Prompt tokens plus the completion budget, which OpenAI also counts against TPM.
+        prompt = sum(estimate_tokens(str(message.content)) for message in messages)
+        return prompt + (self.max_tokens or config.get("llm_completion_token_estimate", 1000))
+
+    @staticmethod
+    def _used_tokens(result):
+        return ((result.llm_output or {}).get("token_usage") or {}).get("total_tokens")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with governor.acquire("openai", self.model_name, tokens=self._token_estimate(messages)) as lease:
+            result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            lease.settle(self._used_tokens(result))
+            return result
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        async with governor.aacquire("openai", self.model_name, tokens=self._token_estimate(messages)) as lease:
+            result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            lease.settle(self._used_tokens(result))
+            return result
@@ -1,58 +1,96 @@
 from langgraph.graph import StateGraph, START, END
-from langgraph.prebuilt import create_react_agent
-from agent_state import AgentState, InvestDebateState, RiskDebateState
+from agent_state import agent_messages, AgentState, InvestDebateState, RiskDebateState
 from langchain_core.messages import HumanMessage, AIMessage
-from agents.analyst_agent.analyst import create_market_agent, create_social_agent, create_news_agent, create_fundamentals_agent
+from langchain_core.runnables import RunnableLambda
+from agents.analyst_agent.analyst import create_market_agent, create_social_agent, create_news_agent, create_fundamentals_agent, run_analyst_agent, arun_analyst_agent, degraded_analyst_update
+from agents.registry import get_compiled_agent
 from tools.toolkit import toolkit
+from config import config
+from bootstrap import initialize
 from rich.console import Console
 from rich.markdown import Markdown
-from llm import quick_thinking_llm, deep_thinking_llm
-from memory.longterm_memory import bull_memory, bear_memory, invest_judge_memory, trader_memory, risk_manager_memory
+from llm import get_llm
+from rate_limiter import estimate_tokens
+from report_digest import ReportDigester, REPORT_FIELDS
+from debate_summary import DebateSummarizer, debate_turn, debate_history, speaker_turns
+from deadlines import call_with_deadline, acall_with_deadline
+from memory.longterm_memory import bull_memory, bear_memory, invest_judge_memory, trader_memory, risk_manager_memory, memory_tags
 import datetime
+import time
+import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from agents.bull_vs_bear.bull import create_bull_agent
-from agents.bull_vs_bear.bear import create_bear_agent
-from agents.research_agent.research_agent import create_research_manager_agent
-from agents.trader_agent.trader import create_trader_agent
-from agents.risk_agent.overall_risk import create_risk_analyst_agent
-from agents.portfolio_manager_agent.portfolio_agent import create_portfolio_manager_agent
+from agents.bull_vs_bear.bull import create_bull_agent, build_bull_context
+from agents.bull_vs_bear.bear import create_bear_agent, build_bear_context
+from agents.research_agent.research_agent import create_research_manager_agent, build_research_manager_context
+from agents.trader_agent.trader import create_trader_agent, build_trader_context
+from agents.risk_agent.overall_risk import create_risk_analyst_agent, build_risk_context
+from agents.portfolio_manager_agent.portfolio_agent import create_portfolio_manager_agent, build_portfolio_manager_context
 import json
 import functools
-from stream import LangSmithStreamingWrapper, stream_langraph_workflow
-from reflection.reflection import TradingReflectionSystem, simulate_trading_outcome, quick_reflection
 console = Console()
 
 class CompleteTradingWorkflow:
     def __init__(self):
+        # Run the risky, safe and neutral analysts of a round concurrently
+        self.parallel_risk_round = config.get("parallel_risk_round", False)
+        # Condense the analyst reports once before the debate and decision agents read them
+        self.digest_reports = config.get("report_digest", {}).get("enabled", False)
+        self.digester = ReportDigester() if self.digest_reports else None
+        # Debate turns older than the verbatim window are folded into a rolling summary
+        self.summarizer = DebateSummarizer()
+        # Save state after every node so a failed run resumes where it stopped
+        self.checkpointer = None
+        if config.get("checkpointing", {}).get("enabled", False):
+            from checkpointing import open_checkpointer
+            self.checkpointer = open_checkpointer()
         self.graph = self._build_graph()
         self.shared_state = None
     
+    def _node(self, func, afunc):
+        """Register a node with both a sync (invoke) and an async (ainvoke) implementation"""
+        return RunnableLambda(func, afunc=afunc, name=func.__name__)
+    
     def _build_graph(self):
         """Build the complete LangGraph workflow with trader and risk management"""
         workflow = StateGraph(AgentState)
         
         # Add nodes
         workflow.add_node("initialization", self.initialization_node)
+        for spec in self.ANALYSTS:
+            workflow.add_node(spec[0], self._analyst_node(spec))
         workflow.add_node("parallel_analysis", self.parallel_analysis_node)
-        workflow.add_node("bull_researcher", self.bull_researcher_node)
-        workflow.add_node("bear_researcher", self.bear_researcher_node)
-        workflow.add_node("research_manager", self.research_manager_node)
+        if self.digest_reports:
+            workflow.add_node("report_digest", self._node(self.report_digest_node, self.areport_digest_node))
+        workflow.add_node("bull_researcher", self._node(self.bull_researcher_node, self.abull_researcher_node))
+        workflow.add_node("bear_researcher", self._node(self.bear_researcher_node, self.abear_researcher_node))
+        workflow.add_node("research_manager", self._node(self.research_manager_node, self.aresearch_manager_node))
         
         # NEW NODES: Trader and Risk Management
-        workflow.add_node("trader", self.trader_node)
-        workflow.add_node("risky_analyst", self.risky_analyst_node)
-        workflow.add_node("safe_analyst", self.safe_analyst_node)
-        workflow.add_node("neutral_analyst", self.neutral_analyst_node)
-        workflow.add_node("portfolio_manager", self.portfolio_manager_node)
+        workflow.add_node("trader", self._node(self.trader_node, self.atrader_node))
+        if self.parallel_risk_round:
+            workflow.add_node("risk_round", self._node(self.risk_round_node, self.arisk_round_node))
+        else:
+            workflow.add_node("risky_analyst", self._node(self.risky_analyst_node, self.arisky_analyst_node))
+            workflow.add_node("safe_analyst", self._node(self.safe_analyst_node, self.asafe_analyst_node))
+            workflow.add_node("neutral_analyst", self._node(self.neutral_analyst_node, self.aneutral_analyst_node))
+        workflow.add_node("portfolio_manager", self._node(self.portfolio_manager_node, self.aportfolio_manager_node))
         
         workflow.add_node("consolidation", self.consolidation_node)
         
         # Define edges - Extended flow
         workflow.add_edge(START, "initialization")
-        workflow.add_edge("initialization", "parallel_analysis")
-        
-        # Investment debate cycle
-        workflow.add_edge("parallel_analysis", "bull_researcher")
+        # The analysts fan out as parallel branches and join before the debate
+        analyst_nodes = [spec[0] for spec in self.ANALYSTS]
+        for node_name in analyst_nodes:
+            workflow.add_edge("initialization", node_name)
+        workflow.add_edge(analyst_nodes, "parallel_analysis")
+        
+        # Investment debate cycle, reading the report digests when they are enabled
+        if self.digest_reports:
+            workflow.add_edge("parallel_analysis", "report_digest")
+            workflow.add_edge("report_digest", "bull_researcher")
+        else:
+            workflow.add_edge("parallel_analysis", "bull_researcher")
         workflow.add_edge("bull_researcher", "bear_researcher")
         
         workflow.add_conditional_edges(
@@ -66,16 +104,22 @@ class CompleteTradingWorkflow:
         
         # NEW FLOW: Research Manager → Trader → Risk Management
         workflow.add_edge("research_manager", "trader")
-        workflow.add_edge("trader", "risky_analyst")
-        workflow.add_edge("risky_analyst", "safe_analyst")
-        workflow.add_edge("safe_analyst", "neutral_analyst")
+        if self.parallel_risk_round:
+            # All three perspectives speak at once, each round looping on itself
+            workflow.add_edge("trader", "risk_round")
+            last_risk_node, first_risk_node = "risk_round", "risk_round"
+        else:
+            workflow.add_edge("trader", "risky_analyst")
+            workflow.add_edge("risky_analyst", "safe_analyst")
+            workflow.add_edge("safe_analyst", "neutral_analyst")
+            last_risk_node, first_risk_node = "neutral_analyst", "risky_analyst"
         
         # Risk management debate cycle
         workflow.add_conditional_edges(
-            "neutral_analyst",
+            last_risk_node,
             self.should_continue_risk_debate,
             {
-                "continue": "risky_analyst",
+                "continue": first_risk_node,
                 "end": "portfolio_manager"
             }
         )
@@ -83,7 +127,7 @@ class CompleteTradingWorkflow:
         workflow.add_edge("portfolio_manager", "consolidation")
         workflow.add_edge("consolidation", END)
         
-        return workflow.compile()
+        return workflow.compile(checkpointer=self.checkpointer)
     
     def initialization_node(self, state: AgentState) -> AgentState:
         """Initialize the workflow"""
@@ -96,131 +140,216 @@ class CompleteTradingWorkflow:
         )
         
         return {
-            **state,
-            "messages": state["messages"] + [init_message],
+            "messages": [init_message],
             "sender": "initialization"
         }
     
+    # The four analysts, each a graph branch of its own:
+    # (node name, display name, icon, agent factory, request, report field)
+    ANALYSTS = (
+        ("market_analyst", "Market", "📈", create_market_agent,
+         "Perform comprehensive technical market analysis for {company} on {trade_date}", "market_report"),
+        ("social_analyst", "Social", "💬", create_social_agent,
+         "Analyze social media sentiment for {company} on {trade_date}", "sentiment_report"),
+        ("news_analyst", "News", "📰", create_news_agent,
+         "Analyze recent news impact for {company} on {trade_date}", "news_report"),
+        ("fundamentals_analyst", "Fundamentals", "🏗️", create_fundamentals_agent,
+         "Perform fundamental analysis for {company} on {trade_date}", "fundamentals_report"),
+    )
+    
+    def _analyst_limits(self, node_name):
+        """(deadline, hedge_after) in seconds for one analyst branch, None meaning off"""
+        deadlines = config.get("analyst_deadlines", {})
+        return deadlines.get(node_name, deadlines.get("default")), config.get("analyst_hedge_after")
+    
+    @functools.cached_property
+    def analyst_executor(self):
+        # Analyst attempts under a deadline run here, so a call that overruns can be abandoned;
+        # sized for four analysts plus their hedges with headroom for abandoned calls
+        return ThreadPoolExecutor(max_workers=16, thread_name_prefix="analyst")
+    
+    def _analyst_node(self, spec):
+        """Build the sync and async node for one analyst branch"""
+        node_name, name, icon, factory, request, report_field = spec
+        analyst = f"{name.lower()} analyst"
+        
+        def prepare(state):
+            console.print(f"[cyan]{icon} {name} Analyst starting...[/cyan]")
+            # Compiled agents are shared across runs; the state is passed per call
+            agent = get_compiled_agent(factory, get_llm("quick"), toolkit)
+            return agent, request.format(company=state['company_of_interest'], trade_date=state['trade_date'])
+        
+        def on_hedge():
+            console.print(f"[yellow]⏱️ {name} Analyst is slow or failed, launching a hedged attempt...[/yellow]")
+        
+        def finish(update, progresses, started, deadline, error=None):
+            # A late or failed analyst hands back a marked report rather than blocking the other branches
+            if error is not None:
+                console.print(f"[red]❌ {name} Analyst failed: {str(error)}[/red]")
+                return degraded_analyst_update(report_field, analyst, f"failed ({error})", progresses)
+            if update is None:
+                console.print(f"[red]⏰ {name} Analyst missed its {deadline:g}s deadline[/red]")
+                return degraded_analyst_update(report_field, analyst, f"did not finish within {deadline:g}s", progresses)
+            console.print(f"[green]✅ {name} Analyst completed in {time.perf_counter() - started:.1f}s[/green]")
+            return update
+        
+        def analyst_node(state: AgentState) -> AgentState:
+            started = time.perf_counter()
+            deadline, hedge_after = self._analyst_limits(node_name)
+            progresses = []
+            try:
+                agent, agent_request = prepare(state)
+                if deadline is None and hedge_after is None:
+                    return finish(run_analyst_agent(agent, state, agent_request, report_field), progresses, started, deadline)
+                update, progresses = call_with_deadline(
+                    lambda progress: run_analyst_agent(agent, state, agent_request, report_field, progress),
+                    self.analyst_executor, deadline, hedge_after, on_hedge,
+                )
+                return finish(update, progresses, started, deadline)
+            except Exception as e:
+                return finish(None, progresses, started, deadline, e)
+        
+        async def aanalyst_node(state: AgentState) -> AgentState:
+            started = time.perf_counter()
+            deadline, hedge_after = self._analyst_limits(node_name)
+            progresses = []
+            try:
+                agent, agent_request = prepare(state)
+                if deadline is None and hedge_after is None:
+                    return finish(await arun_analyst_agent(agent, state, agent_request, report_field), progresses, started, deadline)
+                update, progresses = await acall_with_deadline(
+                    lambda progress: arun_analyst_agent(agent, state, agent_request, report_field, progress),
+                    deadline, hedge_after, on_hedge,
+                )
+                return finish(update, progresses, started, deadline)
+            except Exception as e:
+                return finish(None, progresses, started, deadline, e)
+        
+        analyst_node.__name__ = f"{node_name}_node"
+        return self._node(analyst_node, aanalyst_node)
+    
     def parallel_analysis_node(self, state: AgentState) -> AgentState:
-        """Execute all analysts in parallel"""
-        console.print("[bold yellow]📊 Running Parallel Analysis...[/bold yellow]")
-        
-        # Create agents with shared state reference
-        market_agent = create_market_agent(quick_thinking_llm, toolkit, state)
-        social_agent = create_social_agent(quick_thinking_llm, toolkit, state)
-        news_agent = create_news_agent(quick_thinking_llm, toolkit, state)
-        fundamentals_agent = create_fundamentals_agent(quick_thinking_llm, toolkit, state)
-        
-        def run_market():
-            console.print("[cyan]📈 Market Analyst starting...[/cyan]")
-            return market_agent({
-                "messages": [HumanMessage(content=f"Perform comprehensive technical market analysis for {state['company_of_interest']} on {state['trade_date']}")]
-            })
-        
-        def run_social():
-            console.print("[cyan]💬 Social Analyst starting...[/cyan]")
-            return social_agent({
-                "messages": [HumanMessage(content=f"Analyze social media sentiment for {state['company_of_interest']} on {state['trade_date']}")]
-            })
-        
-        def run_news():
-            console.print("[cyan]📰 News Analyst starting...[/cyan]")
-            return news_agent({
-                "messages": [HumanMessage(content=f"Analyze recent news impact for {state['company_of_interest']} on {state['trade_date']}")]
-            })
-        
-        def run_fundamentals():
-            console.print("[cyan]🏗️ Fundamentals Analyst starting...[/cyan]")
-            return fundamentals_agent({
-                "messages": [HumanMessage(content=f"Perform fundamental analysis for {state['company_of_interest']} on {state['trade_date']}")]
-            })
-        
-        # Execute in parallel
-        with ThreadPoolExecutor(max_workers=4) as executor:
-            futures = [
-                executor.submit(run_market),
-                executor.submit(run_social),
-                executor.submit(run_news),
-                executor.submit(run_fundamentals)
-            ]
-            
-            for i, future in enumerate(futures):
-                try:
-                    future.result()
-                    analyst_names = ["Market", "Social", "News", "Fundamentals"]
-                    console.print(f"[green]✅ {analyst_names[i]} Analyst completed[/green]")
-                except Exception as e:
-                    analyst_names = ["Market", "Social", "News", "Fundamentals"]
-                    console.print(f"[red]❌ {analyst_names[i]} Analyst failed: {str(e)}[/red]")
-        
+        """Join point of the analyst branches; runs once all four have reported"""
         console.print("[bold green]🎉 Parallel analysis completed![/bold green]")
-        return {**state, "sender": "parallel_analysis"}
+        return {"sender": "parallel_analysis"}
+    
+    def report_digest_node(self, state: AgentState) -> AgentState:
+        """Condense each analyst report to the token budgets of the roles that read it"""
+        console.print("[bold yellow]🗜️ Digesting analyst reports...[/bold yellow]")
+        digests = self.digester.digest_reports(state)
+        self._report_digest_summary(state, digests)
+        return {"report_digests": digests, "sender": "report_digest"}
+    
+    async def areport_digest_node(self, state: AgentState) -> AgentState:
+        """Condense each analyst report to the token budgets of the roles that read it (async)"""
+        console.print("[bold yellow]🗜️ Digesting analyst reports...[/bold yellow]")
+        digests = await self.digester.adigest_reports(state)
+        self._report_digest_summary(state, digests)
+        return {"report_digests": digests, "sender": "report_digest"}
+    
+    def _report_digest_summary(self, state, digests):
+        full = sum(estimate_tokens(state.get(field, "")) for field in REPORT_FIELDS)
+        for budget, reports in sorted(digests.items(), key=lambda item: int(item[0])):
+            digested = sum(estimate_tokens(reports.get(field) or state.get(field, "")) for field in REPORT_FIELDS)
+            console.print(f"[green]✅ {budget}-token digests: ~{full} → ~{digested} tokens across the four reports[/green]")
+    
+    def _run_agent_step(self, state: AgentState, prepare, finish) -> AgentState:
+        """Run one agent node: build its input, invoke it, fold the result into state"""
+        agent, agent_input = prepare(state)
+        return finish(state, agent.invoke(agent_input))
+    
+    async def _arun_agent_step(self, state: AgentState, prepare, finish) -> AgentState:
+        """Async counterpart of _run_agent_step; memory lookups and writes run in worker threads"""
+        agent, agent_input = await asyncio.to_thread(prepare, state)
+        result = await agent.ainvoke(agent_input)
+        return await asyncio.to_thread(finish, state, result)
     
     def bull_researcher_node(self, state: AgentState) -> AgentState:
         """Bull researcher node using create_react_agent"""
+        return self._run_agent_step(state, self._prepare_bull_researcher, self._finish_bull_researcher)
+    
+    async def abull_researcher_node(self, state: AgentState) -> AgentState:
+        """Bull researcher node using create_react_agent (async)"""
+        return await self._arun_agent_step(state, self._prepare_bull_researcher, self._finish_bull_researcher)
+    
+    def _prepare_bull_researcher(self, state: AgentState):
         console.print(f"[bold green]🐂 Bull Researcher - Round {state['investment_debate_state']['count'] + 1}[/bold green]")
         
-        bull_agent = create_bull_agent(quick_thinking_llm, toolkit, state)
+        bull_agent = get_compiled_agent(create_bull_agent, get_llm("quick"), toolkit)
         prompt = f"Present your strongest bull case for {state['company_of_interest']}. Make compelling arguments for why this stock should be bought."
         
-        result = bull_agent.invoke({"messages": [HumanMessage(content=prompt)]})
-        
+        return bull_agent, {"messages": [HumanMessage(content=build_bull_context(state)), HumanMessage(content=prompt)]}
+    
+    def _finish_bull_researcher(self, state: AgentState, result) -> AgentState:
         bull_argument = ""
         if result and "messages" in result and result["messages"]:
             final_message = result["messages"][-1]
             bull_argument = f"Bull Analyst: {final_message.content}"
         
         debate_state = state['investment_debate_state'].copy()
-        debate_state['history'] += "\n" + bull_argument
-        debate_state['bull_history'] += "\n" + bull_argument
         debate_state['current_response'] = bull_argument
+        debate_state['turns'] = debate_state.get('turns', []) + [
+            debate_turn("Bull Analyst", bull_argument.replace('Bull Analyst: ', '', 1), debate_state['count'] + 1)
+        ]
         debate_state['count'] += 1
+        debate_state = self.summarizer.fold(debate_state, "investment")
         
         console.print("[green]🐂 Bull's Argument:[/green]")
         console.print(Markdown(bull_argument.replace('Bull Analyst: ', '')))
         
         return {
-            **state,
             "investment_debate_state": debate_state,
-            "messages": state["messages"] + result["messages"] if result and "messages" in result else state["messages"],
+            "messages": agent_messages(result),
             "sender": "bull_researcher"
         }
     
     def bear_researcher_node(self, state: AgentState) -> AgentState:
         """Bear researcher node using create_react_agent"""
+        return self._run_agent_step(state, self._prepare_bear_researcher, self._finish_bear_researcher)
+    
+    async def abear_researcher_node(self, state: AgentState) -> AgentState:
+        """Bear researcher node using create_react_agent (async)"""
+        return await self._arun_agent_step(state, self._prepare_bear_researcher, self._finish_bear_researcher)
+    
+    def _prepare_bear_researcher(self, state: AgentState):
         console.print(f"[bold red]🐻 Bear Researcher - Round {state['investment_debate_state']['count']}[/bold red]")
         
-        bear_agent = create_bear_agent(quick_thinking_llm, toolkit, state)
+        bear_agent = get_compiled_agent(create_bear_agent, get_llm("quick"), toolkit)
         prompt = f"Present your strongest bear case for {state['company_of_interest']}. Make compelling arguments for why this stock should be avoided or sold."
         
-        result = bear_agent.invoke({"messages": [HumanMessage(content=prompt)]})
-        
+        return bear_agent, {"messages": [HumanMessage(content=build_bear_context(state)), HumanMessage(content=prompt)]}
+    
+    def _finish_bear_researcher(self, state: AgentState, result) -> AgentState:
         bear_argument = ""
         if result and "messages" in result and result["messages"]:
             final_message = result["messages"][-1]
             bear_argument = f"Bear Analyst: {final_message.content}"
         
         debate_state = state['investment_debate_state'].copy()
-        debate_state['history'] += "\n" + bear_argument
-        debate_state['bear_history'] += "\n" + bear_argument
         debate_state['current_response'] = bear_argument
+        debate_state['turns'] = debate_state.get('turns', []) + [
+            debate_turn("Bear Analyst", bear_argument.replace('Bear Analyst: ', '', 1), debate_state['count'])
+        ]
+        debate_state = self.summarizer.fold(debate_state, "investment")
         
         situation_context = f"{state['market_report'][:200]}... Company: {state['company_of_interest']}"
-        bear_memory.add_situations([(situation_context, bear_argument)])
+        bear_memory.add_situations(
+            [(situation_context, bear_argument)],
+            metadata=memory_tags(state, "bear_researcher", bear_argument),
+        )
         
         console.print("[red]🐻 Bear's Rebuttal:[/red]")
         console.print(Markdown(bear_argument.replace('Bear Analyst: ', '')))
         
         return {
-            **state,
             "investment_debate_state": debate_state,
-            "messages": state["messages"] + result["messages"] if result and "messages" in result else state["messages"],
+            "messages": agent_messages(result),
             "sender": "bear_researcher"
         }
     
     def should_continue_debate(self, state: AgentState) -> str:
         """Decide whether to continue the investment debate"""
-        max_rounds = 1
+        max_rounds = config.get("max_debate_rounds", 1)
         current_round = state['investment_debate_state']['count']
         
         if current_round >= max_rounds:
@@ -232,9 +361,16 @@ class CompleteTradingWorkflow:
     
     def research_manager_node(self, state: AgentState) -> AgentState:
         """Research manager node using create_react_agent"""
+        return self._run_agent_step(state, self._prepare_research_manager, self._finish_research_manager)
+    
+    async def aresearch_manager_node(self, state: AgentState) -> AgentState:
+        """Research manager node using create_react_agent (async)"""
+        return await self._arun_agent_step(state, self._prepare_research_manager, self._finish_research_manager)
+    
+    def _prepare_research_manager(self, state: AgentState):
         console.print("[bold purple]👨‍💼 Research Manager - Making Investment Decision[/bold purple]")
         
-        manager_agent = create_research_manager_agent(deep_thinking_llm, toolkit, state)
+        manager_agent = get_compiled_agent(create_research_manager_agent, get_llm("deep"), toolkit)
         
         prompt = f"""As Research Manager, evaluate all information and make your investment decision for {state['company_of_interest']}.
         
@@ -247,8 +383,9 @@ class CompleteTradingWorkflow:
         
         Make this decision actionable for traders."""
         
-        result = manager_agent.invoke({"messages": [HumanMessage(content=prompt)]})
-        
+        return manager_agent, {"messages": [HumanMessage(content=build_research_manager_context(state)), HumanMessage(content=prompt)]}
+    
+    def _finish_research_manager(self, state: AgentState, result) -> AgentState:
         investment_plan = ""
         if result and "messages" in result and result["messages"]:
             final_message = result["messages"][-1]
@@ -264,16 +401,18 @@ class CompleteTradingWorkflow:
         Debate Summary: Bull vs Bear had {state['investment_debate_state']['count']} rounds
         Final Decision: {investment_plan[:200]}...
         """
-        invest_judge_memory.add_situations([(decision_context, investment_plan)])
+        invest_judge_memory.add_situations(
+            [(decision_context, investment_plan)],
+            metadata=memory_tags(state, "research_manager", investment_plan),
+        )
         
         console.print("[bold purple]👨‍💼 Research Manager Decision:[/bold purple]")
         console.print(Markdown(investment_plan))
         
         return {
-            **state,
             "investment_debate_state": debate_state,
             "investment_plan": investment_plan,
-            "messages": state["messages"] + result["messages"] if result and "messages" in result else state["messages"],
+            "messages": agent_messages(result),
             "sender": "research_manager"
         }
     
@@ -281,14 +420,22 @@ class CompleteTradingWorkflow:
     
     def trader_node(self, state: AgentState) -> AgentState:
         """Trader node - creates executable trading proposal"""
+        return self._run_agent_step(state, self._prepare_trader, self._finish_trader)
+    
+    async def atrader_node(self, state: AgentState) -> AgentState:
+        """Trader node - creates executable trading proposal (async)"""
+        return await self._arun_agent_step(state, self._prepare_trader, self._finish_trader)
+    
+    def _prepare_trader(self, state: AgentState):
         console.print("[bold blue]💼 Trader - Creating Trading Proposal[/bold blue]")
         
-        trader_agent = create_trader_agent(quick_thinking_llm, toolkit, state)
+        trader_agent = get_compiled_agent(create_trader_agent, get_llm("quick"), toolkit)
         
         prompt = f"Based on the investment plan, create a specific trading proposal for {state['company_of_interest']}. Include position sizing, entry points, stop losses, and execution strategy."
         
-        result = trader_agent.invoke({"messages": [HumanMessage(content=prompt)]})
-        
+        return trader_agent, {"messages": [HumanMessage(content=build_trader_context(state)), HumanMessage(content=prompt)]}
+    
+    def _finish_trader(self, state: AgentState, result) -> AgentState:
         trader_investment_plan = ""
         if result and "messages" in result and result["messages"]:
             final_message = result["messages"][-1]
@@ -296,116 +443,196 @@ class CompleteTradingWorkflow:
         
         # Save trader experience to memory
         trading_context = f"Investment Plan: {state['investment_plan'][:200]}... Company: {state['company_of_interest']}"
-        trader_memory.add_situations([(trading_context, trader_investment_plan)])
+        trader_memory.add_situations(
+            [(trading_context, trader_investment_plan)],
+            metadata=memory_tags(state, "trader", trader_investment_plan),
+        )
         
         console.print("[bold blue]💼 Trader's Proposal:[/bold blue]")
         console.print(Markdown(trader_investment_plan))
         
         return {
-            **state,
             "trader_investment_plan": trader_investment_plan,
-            "messages": state["messages"] + result["messages"] if result and "messages" in result else state["messages"],
+            "messages": agent_messages(result),
             "sender": "trader"
         }
     
-
     def risky_analyst_node(self, state: AgentState) -> AgentState:
         """Risky risk analyst node"""
-        console.print(f"[bold red]🎲 Risky Analyst - Risk Round {state['risk_debate_state']['count'] + 1}[/bold red]")
+        return self._run_agent_step(state, self._prepare_risky_analyst, self._finish_risky_analyst)
+    
+    async def arisky_analyst_node(self, state: AgentState) -> AgentState:
+        """Risky risk analyst node (async)"""
+        return await self._arun_agent_step(state, self._prepare_risky_analyst, self._finish_risky_analyst)
+    
+    def _prepare_risky_analyst(self, state: AgentState):
+        console.print(f"[bold red]🎲 Risky Analyst - Risk Round {state['risk_debate_state']['count'] // 3 + 1}[/bold red]")
         
-        risky_agent = create_risk_analyst_agent(quick_thinking_llm, toolkit, state, "risky")
+        risky_agent = get_compiled_agent(create_risk_analyst_agent, get_llm("quick"), toolkit, "risky")
         
         prompt = f"Evaluate the trader's proposal from an aggressive, high-reward perspective. Argue for taking maximum advantage of this opportunity."
         
-        result = risky_agent.invoke({"messages": [HumanMessage(content=prompt)]})
-        
+        return risky_agent, {"messages": [HumanMessage(content=build_risk_context(state)), HumanMessage(content=prompt)]}
+    
+    def _finish_risky_analyst(self, state: AgentState, result, fold=True) -> AgentState:
         risky_response = ""
         if result and "messages" in result and result["messages"]:
             final_message = result["messages"][-1]
             risky_response = final_message.content
         
         risk_state = state['risk_debate_state'].copy()
-        risk_state['history'] += f"\nRisky Analyst: {risky_response}"
         risk_state['current_risky_response'] = risky_response
-        risk_state['risky_history'] += f"\nRisky Analyst: {risky_response}"
         risk_state['latest_speaker'] = "Risky Analyst"
+        risk_state['turns'] = risk_state.get('turns', []) + [
+            debate_turn("Risky Analyst", risky_response, risk_state['count'] // 3 + 1)
+        ]
         risk_state['count'] += 1
+        if fold:
+            risk_state = self.summarizer.fold(risk_state, "risk")
         
         console.print("[red]🎲 Risky Analyst's View:[/red]")
         console.print(Markdown(risky_response))
         
         return {
-            **state,
             "risk_debate_state": risk_state,
-            "messages": state["messages"] + result["messages"] if result and "messages" in result else state["messages"],
+            "messages": agent_messages(result),
             "sender": "risky_analyst"
         }
     
     def safe_analyst_node(self, state: AgentState) -> AgentState:
         """Safe risk analyst node"""
-        console.print(f"[bold green]🛡️ Safe Analyst - Risk Round {state['risk_debate_state']['count']}[/bold green]")
+        return self._run_agent_step(state, self._prepare_safe_analyst, self._finish_safe_analyst)
+    
+    async def asafe_analyst_node(self, state: AgentState) -> AgentState:
+        """Safe risk analyst node (async)"""
+        return await self._arun_agent_step(state, self._prepare_safe_analyst, self._finish_safe_analyst)
+    
+    def _prepare_safe_analyst(self, state: AgentState):
+        console.print(f"[bold green]🛡️ Safe Analyst - Risk Round {state['risk_debate_state']['count'] // 3 + 1}[/bold green]")
         
-        safe_agent = create_risk_analyst_agent(quick_thinking_llm, toolkit, state, "safe")
+        safe_agent = get_compiled_agent(create_risk_analyst_agent, get_llm("quick"), toolkit, "safe")
         
         prompt = f"Evaluate the trader's proposal from a conservative, risk-averse perspective. Focus on capital preservation and downside protection."
         
-        result = safe_agent.invoke({"messages": [HumanMessage(content=prompt)]})
-        
+        return safe_agent, {"messages": [HumanMessage(content=build_risk_context(state)), HumanMessage(content=prompt)]}
+    
+    def _finish_safe_analyst(self, state: AgentState, result, fold=True) -> AgentState:
         safe_response = ""
         if result and "messages" in result and result["messages"]:
             final_message = result["messages"][-1]
             safe_response = final_message.content
         
         risk_state = state['risk_debate_state'].copy()
-        risk_state['history'] += f"\nSafe Analyst: {safe_response}"
         risk_state['current_safe_response'] = safe_response
-        risk_state['safe_history'] += f"\nSafe Analyst: {safe_response}"
         risk_state['latest_speaker'] = "Safe Analyst"
+        risk_state['turns'] = risk_state.get('turns', []) + [
+            debate_turn("Safe Analyst", safe_response, risk_state['count'] // 3 + 1)
+        ]
+        risk_state['count'] += 1
+        if fold:
+            risk_state = self.summarizer.fold(risk_state, "risk")
         
         console.print("[green]🛡️ Safe Analyst's View:[/green]")
         console.print(Markdown(safe_response))
         
         return {
-            **state,
             "risk_debate_state": risk_state,
-            "messages": state["messages"] + result["messages"] if result and "messages" in result else state["messages"],
+            "messages": agent_messages(result),
             "sender": "safe_analyst"
         }
     
     def neutral_analyst_node(self, state: AgentState) -> AgentState:
         """Neutral risk analyst node"""
-        console.print(f"[bold yellow]⚖️ Neutral Analyst - Risk Round {state['risk_debate_state']['count']}[/bold yellow]")
+        return self._run_agent_step(state, self._prepare_neutral_analyst, self._finish_neutral_analyst)
+    
+    async def aneutral_analyst_node(self, state: AgentState) -> AgentState:
+        """Neutral risk analyst node (async)"""
+        return await self._arun_agent_step(state, self._prepare_neutral_analyst, self._finish_neutral_analyst)
+    
+    def _prepare_neutral_analyst(self, state: AgentState):
+        console.print(f"[bold yellow]⚖️ Neutral Analyst - Risk Round {state['risk_debate_state']['count'] // 3 + 1}[/bold yellow]")
         
-        neutral_agent = create_risk_analyst_agent(quick_thinking_llm, toolkit, state, "neutral")
+        neutral_agent = get_compiled_agent(create_risk_analyst_agent, get_llm("quick"), toolkit, "neutral")
         
         prompt = f"Evaluate the trader's proposal from a balanced perspective. Weigh both the opportunities and risks objectively."
         
-        result = neutral_agent.invoke({"messages": [HumanMessage(content=prompt)]})
-        
+        return neutral_agent, {"messages": [HumanMessage(content=build_risk_context(state)), HumanMessage(content=prompt)]}
+    
+    def _finish_neutral_analyst(self, state: AgentState, result, fold=True) -> AgentState:
         neutral_response = ""
         if result and "messages" in result and result["messages"]:
             final_message = result["messages"][-1]
             neutral_response = final_message.content
         
         risk_state = state['risk_debate_state'].copy()
-        risk_state['history'] += f"\nNeutral Analyst: {neutral_response}"
         risk_state['current_neutral_response'] = neutral_response
-        risk_state['neutral_history'] += f"\nNeutral Analyst: {neutral_response}"
         risk_state['latest_speaker'] = "Neutral Analyst"
+        risk_state['turns'] = risk_state.get('turns', []) + [
+            debate_turn("Neutral Analyst", neutral_response, risk_state['count'] // 3 + 1)
+        ]
+        risk_state['count'] += 1
+        if fold:
+            risk_state = self.summarizer.fold(risk_state, "risk")
         
         console.print("[yellow]⚖️ Neutral Analyst's View:[/yellow]")
         console.print(Markdown(neutral_response))
         
         return {
-            **state,
             "risk_debate_state": risk_state,
-            "messages": state["messages"] + result["messages"] if result and "messages" in result else state["messages"],
+            "messages": agent_messages(result),
             "sender": "neutral_analyst"
         }
     
+    # Risk analysts in the order their turns are merged into RiskDebateState
+    RISK_ROUND_ORDER = ("risky_analyst", "safe_analyst", "neutral_analyst")
+    
+    def risk_round_node(self, state: AgentState) -> AgentState:
+        """One risk debate round with the three perspectives running concurrently"""
+        console.print("[bold yellow]🛡️ Running Parallel Risk Round...[/bold yellow]")
+        
+        # Every analyst sees the same prior-round history
+        steps = [(getattr(self, f"_prepare_{name}"), getattr(self, f"_finish_{name}")) for name in self.RISK_ROUND_ORDER]
+        futures = [self.risk_executor.submit(self._invoke_prepared, prepare(state)) for prepare, _ in steps]
+        results = [future.result() for future in futures]
+        
+        return self._merge_risk_round(state, steps, results)
+    
+    async def arisk_round_node(self, state: AgentState) -> AgentState:
+        """One risk debate round with the three perspectives running concurrently (async)"""
+        console.print("[bold yellow]🛡️ Running Parallel Risk Round...[/bold yellow]")
+        
+        steps = [(getattr(self, f"_prepare_{name}"), getattr(self, f"_finish_{name}")) for name in self.RISK_ROUND_ORDER]
+        prepared = [await asyncio.to_thread(prepare, state) for prepare, _ in steps]
+        results = await asyncio.gather(*(agent.ainvoke(agent_input) for agent, agent_input in prepared))
+        
+        return await asyncio.to_thread(self._merge_risk_round, state, steps, results)
+    
+    @functools.cached_property
+    def risk_executor(self):
+        # Long-lived pool for the three perspectives of a parallel risk round
+        return ThreadPoolExecutor(max_workers=len(self.RISK_ROUND_ORDER), thread_name_prefix="risk")
+    
+    def _invoke_prepared(self, prepared):
+        agent, agent_input = prepared
+        return agent.invoke(agent_input)
+    
+    def _merge_risk_round(self, state: AgentState, steps, results) -> AgentState:
+        # Fold the turns in a fixed order so history does not depend on which call finished first
+        messages = []
+        for (_, finish), result in zip(steps, results):
+            update = finish(state, result, fold=False)
+            messages += update.pop("messages")
+            state = {**state, **update}
+        # One summary fold for the whole round instead of one per analyst
+        return {
+            "risk_debate_state": self.summarizer.fold(state["risk_debate_state"], "risk"),
+            "messages": messages,
+            "sender": state["sender"],
+        }
+    
     def should_continue_risk_debate(self, state: AgentState) -> str:
         """Decide whether to continue the risk debate"""
-        max_rounds = 1  # Risk debate rounds
+        max_rounds = config.get("max_risk_discuss_rounds", 1)  # Risk debate rounds
         current_round = state['risk_debate_state']['count']
         
         if current_round >= max_rounds * 3:  # 3 analysts per round
@@ -418,9 +645,16 @@ class CompleteTradingWorkflow:
     
     def portfolio_manager_node(self, state: AgentState) -> AgentState:
         """Portfolio manager node - makes final binding decision"""
+        return self._run_agent_step(state, self._prepare_portfolio_manager, self._finish_portfolio_manager)
+    
+    async def aportfolio_manager_node(self, state: AgentState) -> AgentState:
+        """Portfolio manager node - makes final binding decision (async)"""
+        return await self._arun_agent_step(state, self._prepare_portfolio_manager, self._finish_portfolio_manager)
+    
+    def _prepare_portfolio_manager(self, state: AgentState):
         console.print("[bold magenta]👑 Portfolio Manager - Final Decision[/bold magenta]")
         
-        portfolio_manager_agent = create_portfolio_manager_agent(deep_thinking_llm, toolkit, state)
+        portfolio_manager_agent = get_compiled_agent(create_portfolio_manager_agent, get_llm("deep"), toolkit)
         
         prompt = f"""As Portfolio Manager, review the trader's proposal and complete risk debate. Make your final, binding decision for {state['company_of_interest']}.
         
@@ -432,8 +666,9 @@ class CompleteTradingWorkflow:
         
         Your decision will be implemented immediately."""
         
-        result = portfolio_manager_agent.invoke({"messages": [HumanMessage(content=prompt)]})
-        
+        return portfolio_manager_agent, {"messages": [HumanMessage(content=build_portfolio_manager_context(state)), HumanMessage(content=prompt)]}
+    
+    def _finish_portfolio_manager(self, state: AgentState, result) -> AgentState:
         final_trade_decision = ""
         if result and "messages" in result and result["messages"]:
             final_message = result["messages"][-1]
@@ -448,19 +683,21 @@ class CompleteTradingWorkflow:
         Company: {state['company_of_interest']}
         Date: {state['trade_date']}
         Trader Proposal: {state['trader_investment_plan'][:200]}...
-        Risk Debate: {state['risk_debate_state']['history'][:300]}...
+        Risk Debate: {debate_history(state['risk_debate_state'])[:300]}...
         Final Decision: {final_trade_decision[:200]}...
         """
-        risk_manager_memory.add_situations([(portfolio_context, final_trade_decision)])
+        risk_manager_memory.add_situations(
+            [(portfolio_context, final_trade_decision)],
+            metadata=memory_tags(state, "portfolio_manager", final_trade_decision),
+        )
         
         console.print("[bold magenta]👑 Portfolio Manager Final Decision:[/bold magenta]")
         console.print(Markdown(final_trade_decision))
         
         return {
-            **state,
             "risk_debate_state": risk_state,
             "final_trade_decision": final_trade_decision,
-            "messages": state["messages"] + result["messages"] if result and "messages" in result else state["messages"],
+            "messages": agent_messages(result),
             "sender": "portfolio_manager"
         }
     
@@ -483,8 +720,7 @@ class CompleteTradingWorkflow:
         self._display_comprehensive_results(state)
         
         return {
-            **state,
-            "messages": state["messages"] + [summary_message],
+            "messages": [summary_message],
             "sender": "consolidation"
         }
     
@@ -509,8 +745,8 @@ class CompleteTradingWorkflow:
         # Investment debate summary
         console.print(f"\n[bold magenta]🥊 Investment Debate:[/bold magenta]")
         console.print(f"  Rounds: {state['investment_debate_state']['count']}")
-        console.print(f"  Bull arguments: {len(state['investment_debate_state']['bull_history'].split('Bull Analyst:')) - 1}")
-        console.print(f"  Bear arguments: {len(state['investment_debate_state']['bear_history'].split('Bear Analyst:')) - 1}")
+        console.print(f"  Bull arguments: {speaker_turns(state['investment_debate_state'], 'Bull Analyst')}")
+        console.print(f"  Bear arguments: {speaker_turns(state['investment_debate_state'], 'Bear Analyst')}")
         
         # Investment plan
         if state.get('investment_plan'):
@@ -525,9 +761,9 @@ class CompleteTradingWorkflow:
         # Risk debate summary
         console.print(f"\n[bold orange]🛡️ Risk Management Debate:[/bold orange]")
         console.print(f"  Risk rounds: {state['risk_debate_state']['count'] // 3}")
-        console.print(f"  Risky arguments: {len(state['risk_debate_state']['risky_history'].split('Risky Analyst:')) - 1}")
-        console.print(f"  Safe arguments: {len(state['risk_debate_state']['safe_history'].split('Safe Analyst:')) - 1}")
-        console.print(f"  Neutral arguments: {len(state['risk_debate_state']['neutral_history'].split('Neutral Analyst:')) - 1}")
+        console.print(f"  Risky arguments: {speaker_turns(state['risk_debate_state'], 'Risky Analyst')}")
+        console.print(f"  Safe arguments: {speaker_turns(state['risk_debate_state'], 'Safe Analyst')}")
+        console.print(f"  Neutral arguments: {speaker_turns(state['risk_debate_state'], 'Neutral Analyst')}")
         
         # Final trade decision
         if state.get('final_trade_decision'):
@@ -536,16 +772,9 @@ class CompleteTradingWorkflow:
         
         console.print("\n" + "="*100)
     
-    def run_analysis(self, ticker: str, trade_date: str = None):
-        """Run the complete trading workflow"""
-        if trade_date is None:
-            trade_date = (datetime.date.today() - datetime.timedelta(days=3)).strftime('%Y-%m-%d')
-        
-        console.print("[bold blue]🔍 STARTING COMPLETE TRADING WORKFLOW[/bold blue]")
-        console.print("="*100)
-        
-        # Create initial state with RiskDebateState
-        initial_state = AgentState({
+    def _initial_state(self, ticker: str, trade_date: str) -> AgentState:
+        """Create the initial workflow state for one ticker and trade date"""
+        return AgentState({
             "messages": [HumanMessage(content=f"Complete trading analysis for {ticker} on {trade_date}")],
             "company_of_interest": ticker,
             "trade_date": trade_date,
@@ -553,48 +782,102 @@ class CompleteTradingWorkflow:
             "sentiment_report": "",
             "news_report": "",
             "fundamentals_report": "",
+            "report_digests": {},
             "investment_plan": "",
             "trader_investment_plan": "",
             "final_trade_decision": "",
             "sender": "user",
             "investment_debate_state": InvestDebateState({
-                'history': '',
                 'current_response': '',
                 'count': 0,
-                'bull_history': '',
-                'bear_history': '',
+                'turns': [],
+                'summary': '',
+                'summarized_turns': 0,
                 'judge_decision': ''
             }),
             "risk_debate_state": RiskDebateState({
-                'history': '',
                 'latest_speaker': '',
                 'current_risky_response': '',
                 'current_safe_response': '',
                 'current_neutral_response': '',
                 'count': 0,
-                'risky_history': '',
-                'safe_history': '',
-                'neutral_history': '',
+                'turns': [],
+                'summary': '',
+                'summarized_turns': 0,
                 'judge_decision': ''
             })
         })
+    
+    def run_config(self, ticker: str, trade_date: str) -> dict:
+        """Graph config for one run; with checkpointing on, the run's checkpoint thread"""
+        if self.checkpointer is None:
+            return {}
+        from checkpointing import run_thread_id
+        return {"configurable": {"thread_id": run_thread_id(ticker, trade_date)}}
+    
+    def graph_input(self, initial_state, run_config: dict, resume: bool = True):
+        """
+        What to start the graph with: the initial state, or None to pick up a checkpointed run.
+        
+        A run with a checkpoint continues from its last completed node, and a run that
+        already finished returns its final state, unless resume is False, in which case
+        its checkpoints are dropped and it starts over.
+        """
+        if self.checkpointer is None:
+            return initial_state
+        snapshot = self.graph.get_state(run_config)
+        if not snapshot.values:
+            return initial_state
+        thread_id = run_config["configurable"]["thread_id"]
+        if not resume:
+            self.checkpointer.delete_thread(thread_id)
+            return initial_state
+        if snapshot.next:
+            console.print(f"[yellow]♻️ Resuming {thread_id} at {', '.join(snapshot.next)}[/yellow]")
+        else:
+            console.print(f"[yellow]♻️ {thread_id} already completed; returning its checkpointed result[/yellow]")
+        return None
+    
+    def run_analysis(self, ticker: str, trade_date: str = None, resume: bool = True):
+        """Run the complete trading workflow"""
+        if trade_date is None:
+            trade_date = (datetime.date.today() - datetime.timedelta(days=3)).strftime('%Y-%m-%d')
+        
+        console.print("[bold blue]🔍 STARTING COMPLETE TRADING WORKFLOW[/bold blue]")
+        console.print("="*100)
         
         # Execute workflow
-        final_state = self.graph.invoke(initial_state)
+        run_config = self.run_config(ticker, trade_date)
+        graph_input = self.graph_input(self._initial_state(ticker, trade_date), run_config, resume)
+        final_state = self.graph.invoke(graph_input, config=run_config)
         
         console.print("\n[bold green]🏁 COMPLETE TRADING WORKFLOW FINISHED![/bold green]")
         return final_state
+    
+    async def arun_analysis(self, ticker: str, trade_date: str = None, resume: bool = True):
+        """Run the complete trading workflow on the event loop with async LLM and tool calls"""
+        if trade_date is None:
+            trade_date = (datetime.date.today() - datetime.timedelta(days=3)).strftime('%Y-%m-%d')
+        
+        console.print(f"[bold blue]🔍 STARTING COMPLETE TRADING WORKFLOW (async) - {ticker}[/bold blue]")
+        
+        run_config = self.run_config(ticker, trade_date)
+        graph_input = await asyncio.to_thread(self.graph_input, self._initial_state(ticker, trade_date), run_config, resume)
+        final_state = await self.graph.ainvoke(graph_input, config=run_config)
+        
+        console.print(f"\n[bold green]🏁 COMPLETE TRADING WORKFLOW FINISHED! - {ticker}[/bold green]")
+        return final_state
 
 # Usage function
 # Update your existing complete_trading_workflow.py file
 
-# Add this import at the top with your other imports:
-from reflection.reflection import TradingReflectionSystem, simulate_trading_outcome, quick_reflection
-
-# Update your main function to include reflection:
+# The streaming wrapper and the reflection system are only needed by these entry
+# points, so they are imported here rather than when the workflow is imported.
 
 def main():
     """Main function to run complete trading workflow with optional streaming and reflection"""
+    from stream import LangSmithStreamingWrapper
+    from reflection.reflection import simulate_trading_outcome
     workflow = CompleteTradingWorkflow()  
     
     # Use past date to avoid data issues
@@ -616,28 +899,28 @@ def main():
             "sentiment_report": "",
             "news_report": "",
             "fundamentals_report": "",
+            "report_digests": {},
             "investment_plan": "",
             "trader_investment_plan": "",
             "final_trade_decision": "",
             "sender": "user",
             "investment_debate_state": InvestDebateState({
-                'history': '',
                 'current_response': '',
                 'count': 0,
-                'bull_history': '',
-                'bear_history': '',
+                'turns': [],
+                'summary': '',
+                'summarized_turns': 0,
                 'judge_decision': ''
             }),
             "risk_debate_state": RiskDebateState({
-                'history': '',
                 'latest_speaker': '',
                 'current_risky_response': '',
                 'current_safe_response': '',
                 'current_neutral_response': '',
                 'count': 0,
-                'risky_history': '',
-                'safe_history': '',
-                'neutral_history': '',
+                'turns': [],
+                'summary': '',
+                'summarized_turns': 0,
                 'judge_decision': ''
             })
         }
@@ -721,6 +1004,7 @@ def main():
 # Alternative: Manual reflection with real outcomes
 def main_with_real_outcome():
     """Example of using real trading outcomes for reflection"""
+    from reflection.reflection import TradingReflectionSystem
     workflow = CompleteTradingWorkflow()
     TRADE_DATE = (datetime.date.today() - datetime.timedelta(days=0)).strftime('%Y-%m-%d')
     
@@ -752,6 +1036,7 @@ def main_with_real_outcome():
 # Batch reflection example
 def run_batch_reflection():
     """Example of running reflection on multiple past trades"""
+    from reflection.reflection import simulate_trading_outcome
     workflow = CompleteTradingWorkflow()
     
     # Example: Multiple scenarios for testing
@@ -794,6 +1079,7 @@ def run_batch_reflection():
     return reflection_results
 
 if __name__ == "__main__":
+    initialize(verbose=True, tracing=True)
     final_state = main()
     
     # Alternative usage:
@@ -0,0 +1,102 @@
+# Compaction policy for agent memories.
+# Keeps the situation collections bounded: near-duplicate situations are merged
+# by embedding similarity, entries older than the age limit are dropped, and the
+# per-ticker and per-collection caps keep only the most useful entries (most
+# retrieved first, then most recent). The policy only plans the changes; the
+# memory backend applies them.
+import time
+
+import numpy as np
+
+# Candidates compared against the kept set per matrix product.
+DEDUPE_BLOCK = 512
+
+
+def _usefulness(meta):
+    return (meta.get("hits", 0), meta.get("created_at", 0.0))
+
+
+def _merge_duplicates(order, vectors, metadatas, threshold, removed, updates):
+    """Greedy newest-first dedupe: a situation too similar to a kept one is folded into it."""
+    kept = []
+    for lo in range(0, len(order), DEDUPE_BLOCK):
+        block = order[lo:lo + DEDUPE_BLOCK]
+        # Similarities against everything kept before this block, in one product
+        against_kept = vectors[block] @ vectors[kept].T if kept else np.zeros((len(block), 0))
+        block_kept = []
+        for row, i in enumerate(block):
+            sims = against_kept[row]
+            best, target = (sims.max(), kept[int(sims.argmax())]) if sims.size else (-1.0, None)
+            if block_kept:
+                local = vectors[block_kept] @ vectors[i]
+                if local.max() > best:
+                    best, target = local.max(), block_kept[int(local.argmax())]
+            if best >= threshold:
+                removed.add(i)
+                merged = updates.setdefault(target, dict(metadatas[target]))
+                merged["hits"] = merged.get("hits", 0) + metadatas[i].get("hits", 0)
+                merged["merged"] = merged.get("merged", 0) + 1 + metadatas[i].get("merged", 0)
+            else:
+                block_kept.append(i)
+        kept.extend(block_kept)
+
+
+def plan_compaction(ids, embeddings, metadatas, policy, now=None):
+    """
+    Decide which memory entries to delete and which to update.
+
+    Args:
+        ids: Entry ids.
+        embeddings: (n, dim) array of situation embeddings.
+        metadatas: Entry metadata dicts (created_at, hits, company, ...).
+        policy: Dict with optional keys similarity, max_age_days,
+            max_per_ticker and max_entries; missing keys disable that rule.
+        now: Reference timestamp for the age limit; defaults to time.time().
+
+    Returns:
+        tuple: (ids to delete, {id: merged metadata} for surviving entries).
+    """
+    now = now or time.time()
+    n = len(ids)
+    removed = set()
+    updates = {}
+    if n == 0:
+        return [], {}
+
+    # 1. Age: entries without a created_at (written before it was recorded) are kept
+    max_age = policy.get("max_age_days")
+    if max_age:
+        cutoff = now - max_age * 86400
+        removed.update(i for i, meta in enumerate(metadatas) if meta.get("created_at", now) < cutoff)
+
+    # 2. Near-duplicates, newest first so the freshest advice survives
+    threshold = policy.get("similarity")
+    if threshold:
+        vectors = np.asarray(embeddings, dtype="float32")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1.0)
+        order = sorted((i for i in range(n) if i not in removed), key=lambda i: metadatas[i].get("created_at", 0.0), reverse=True)
+        _merge_duplicates(order, vectors, metadatas, threshold, removed, updates)
+
+    def meta_of(i):
+        return updates.get(i, metadatas[i])
+
+    # 3. Caps, keeping the most useful entries
+    survivors = [i for i in range(n) if i not in removed]
+    max_per_ticker = policy.get("max_per_ticker")
+    if max_per_ticker:
+        by_ticker = {}
+        for i in survivors:
+            company = meta_of(i).get("company")
+            if company:
+                by_ticker.setdefault(company, []).append(i)
+        for members in by_ticker.values():
+            members.sort(key=lambda i: _usefulness(meta_of(i)), reverse=True)
+            removed.update(members[max_per_ticker:])
+        survivors = [i for i in survivors if i not in removed]
+    max_entries = policy.get("max_entries")
+    if max_entries and len(survivors) > max_entries:
+        survivors.sort(key=lambda i: _usefulness(meta_of(i)), reverse=True)
+        removed.update(survivors[max_entries:])
+
+    return [ids[i] for i in sorted(removed)], {ids[i]: meta for i, meta in updates.items() if i not in removed}
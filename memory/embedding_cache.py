@@ -0,0 +1,122 @@
+# Persistent embedding cache shared by every FinancialSituationMemory.
+# Vectors are keyed by a hash of (model, text), so the near-identical situation
+# summaries the bull, bear and research-manager agents embed, and every query
+# repeated across runs, are computed by the API only once.
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+
+def embedding_key(model, text):
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed LRU of embedding vectors with a small in-memory front."""
+
+    def __init__(self, cache_path, max_entries=100_000, memory_entries=2_048):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self._ready = False
+
+    def _connect(self):
+        # The cache file is created on first use, not when memory is imported
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                    with sqlite3.connect(self.cache_path, timeout=30) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.execute(
+                            "CREATE TABLE IF NOT EXISTS embeddings ("
+                            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+                        )
+                        conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+                    self._ready = True
+        return sqlite3.connect(self.cache_path, timeout=30)
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get_many(self, model, texts):
+        """Return {text: vector} for every text already cached."""
+        keys = {embedding_key(model, text): text for text in texts}
+        found = {}
+        with self._lock:
+            for key, text in keys.items():
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[text] = self._memory[key]
+        pending = [key for key, text in keys.items() if text not in found]
+        if pending:
+            with self._connect() as conn:
+                for lo in range(0, len(pending), 500):
+                    chunk = pending[lo:lo + 500]
+                    rows = conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        vector = np.frombuffer(blob, dtype="float32").tolist()
+                        found[keys[key]] = vector
+                        self._remember(key, vector)
+                    if rows:
+                        conn.executemany(
+                            "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                            [(time.time(), key) for key, _ in rows],
+                        )
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model, vectors):
+        """Store {text: vector} pairs, evicting the least recently used beyond max_entries."""
+        now = time.time()
+        rows = []
+        for text, vector in vectors.items():
+            key = embedding_key(model, text)
+            rows.append((key, np.asarray(vector, dtype="float32").tobytes(), now))
+            self._remember(key, list(vector))
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows)
+            with self._lock:
+                self._writes += len(rows)
+                due = self._writes >= 1_000
+                if due:
+                    self._writes = 0
+            if due and self.max_entries:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    " SELECT key FROM embeddings ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def stats(self):
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+embedding_cache = EmbeddingCache(
+    os.path.join(config["data_cache_dir"], "embedding_cache.sqlite"),
+    max_entries=config.get("embedding_cache_size", 100_000),
+)
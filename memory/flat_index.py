@@ -0,0 +1,363 @@
+# NumPy flat-index vector store for agent memories.
+# Embeddings live in one contiguous float32 (or float16) matrix in a
+# memory-mapped file and records (id, document, metadata) in SQLite, so a search
+# is a single matrix product plus argpartition. FlatIndex implements the subset
+# of the Chroma collection API FinancialSituationMemory uses, which lets the two
+# backends be swapped through config.
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+# Rows converted to float32 per matrix product when the store is float16.
+SEARCH_BLOCK = 8192
+
+# Metadata fields copied into indexed SQLite columns, so a `where` filter picks
+# the candidate rows before any distance is computed.
+INDEXED_FIELDS = {"company": "TEXT", "sector": "TEXT", "agent": "TEXT", "signal": "TEXT", "trade_day": "INTEGER"}
+
+# Chroma `where` operators supported on the indexed fields.
+OPERATORS = {"$eq": "=", "$ne": "!=", "$lt": "<", "$lte": "<=", "$gt": ">", "$gte": ">=", "$in": "IN"}
+
+
+def where_sql(where):
+    """Translate a Chroma-style `where` filter on INDEXED_FIELDS into an SQL condition and parameters."""
+    if "$and" in where:
+        parts = [where_sql(clause) for clause in where["$and"]]
+        return " AND ".join(f"({sql})" for sql, _ in parts), [p for _, params in parts for p in params]
+    if len(where) != 1:
+        return where_sql({"$and": [{field: cond} for field, cond in where.items()]})
+    (field, cond), = where.items()
+    if field not in INDEXED_FIELDS:
+        raise ValueError(f"Cannot filter on '{field}'; indexed fields are {sorted(INDEXED_FIELDS)}")
+    (op, value), = (cond if isinstance(cond, dict) else {"$eq": cond}).items()
+    if op not in OPERATORS:
+        raise ValueError(f"Unsupported filter operator '{op}'")
+    if op == "$in":
+        return f"{field} IN ({','.join('?' * len(value))})", list(value)
+    return f"{field} {OPERATORS[op]} ?", [value]
+
+
+class FlatIndex:
+    """Chroma-compatible collection backed by a memory-mapped matrix and SQLite records."""
+
+    def __init__(self, directory, dtype="float32", initial_capacity=1024):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.initial_capacity = initial_capacity
+        self.vectors_path = os.path.join(directory, f"vectors.{self.dtype.name}")
+        self._lock = threading.RLock()
+        self._version = None
+        self._matrix = None
+        self._ids = []
+        self._rows = {}
+        self._norms = np.zeros(0, dtype="float32")
+        self.dim = None
+        self.capacity = 0
+        self.size = 0
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                " id TEXT PRIMARY KEY, row INTEGER NOT NULL UNIQUE, document TEXT, metadata TEXT NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            # Stores created before the indexed columns existed are backfilled from the JSON metadata
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(records)")}
+            for field, kind in INDEXED_FIELDS.items():
+                if field not in columns:
+                    conn.execute(f"ALTER TABLE records ADD COLUMN {field} {kind}")
+                    conn.execute(f"UPDATE records SET {field} = json_extract(metadata, '$.{field}')")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS records_{field} ON records ({field})")
+
+    def _connect(self):
+        return sqlite3.connect(os.path.join(self.directory, "records.sqlite"), timeout=30, isolation_level=None)
+
+    # ------------------------------------------------------------ state
+    def _read_meta(self, conn):
+        return dict(conn.execute("SELECT key, value FROM meta").fetchall())
+
+    def _open_matrix(self):
+        if self.dim and self.capacity:
+            self._matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode="r+", shape=(self.capacity, self.dim))
+        else:
+            self._matrix = None
+
+    def _refresh(self, conn=None):
+        """Reload the row mapping and the matrix if another writer changed the store."""
+        own = conn is None
+        conn = conn or self._connect()
+        try:
+            meta = self._read_meta(conn)
+            if meta.get("version", 0) == self._version:
+                return
+            self.dim = meta.get("dim")
+            self.size = meta.get("size", 0)
+            self.capacity = meta.get("capacity", 0)
+            self._open_matrix()
+            self._ids = [None] * self.size
+            for entry_id, row in conn.execute("SELECT id, row FROM records"):
+                self._ids[row] = entry_id
+            self._rows = {entry_id: row for row, entry_id in enumerate(self._ids)}
+            self._norms = np.zeros(self.capacity, dtype="float32")
+            for lo in range(0, self.size, SEARCH_BLOCK):
+                hi = min(lo + SEARCH_BLOCK, self.size)
+                block = np.asarray(self._matrix[lo:hi], dtype="float32")
+                self._norms[lo:hi] = np.einsum("ij,ij->i", block, block)
+            self._version = meta.get("version", 0)
+        finally:
+            if own:
+                conn.close()
+
+    def _commit_meta(self, conn):
+        self._version = (self._version or 0) + 1
+        conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [("version", self._version), ("dim", self.dim), ("size", self.size), ("capacity", self.capacity)],
+        )
+
+    def _grow(self, needed):
+        capacity = max(self.initial_capacity, self.capacity)
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        if self._matrix is not None:
+            self._matrix.flush()
+            self._matrix = None
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * self.dtype.itemsize)
+        self.capacity = capacity
+        norms = np.zeros(capacity, dtype="float32")
+        norms[:len(self._norms)] = self._norms[:capacity]
+        self._norms = norms
+        self._open_matrix()
+
+    @staticmethod
+    def _indexed(meta):
+        meta = meta or {}
+        return [meta.get(field) for field in INDEXED_FIELDS]
+
+    # ------------------------------------------------------------ writes
+    def add(self, ids, embeddings, documents=None, metadatas=None):
+        self.upsert(ids, embeddings, documents, metadatas)
+
+    def upsert(self, ids, embeddings, documents=None, metadatas=None):
+        vectors = np.asarray(embeddings, dtype="float32")
+        if len(ids) == 0:
+            return
+        documents = documents if documents is not None else [None] * len(ids)
+        metadatas = metadatas if metadatas is not None else [{}] * len(ids)
+        with self._lock:
+            conn = self._connect()
+            try:
+                # One writer at a time across processes
+                conn.execute("BEGIN IMMEDIATE")
+                self._refresh(conn)
+                if self.dim is None:
+                    self.dim = vectors.shape[1]
+                elif vectors.shape[1] != self.dim:
+                    raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}")
+                new = [entry_id for entry_id in dict.fromkeys(ids) if entry_id not in self._rows]
+                self._grow(self.size + len(new))
+                for entry_id in new:
+                    self._rows[entry_id] = self.size
+                    self._ids.append(entry_id)
+                    self.size += 1
+                rows = np.array([self._rows[entry_id] for entry_id in ids])
+                self._matrix[rows] = vectors.astype(self.dtype)
+                stored = np.asarray(self._matrix[rows], dtype="float32")
+                self._norms[rows] = np.einsum("ij,ij->i", stored, stored)
+                self._matrix.flush()
+                columns = ", ".join(INDEXED_FIELDS)
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO records (id, row, document, metadata, {columns})"
+                    f" VALUES (?, ?, ?, ?{', ?' * len(INDEXED_FIELDS)})",
+                    [
+                        (entry_id, int(row), doc, json.dumps(meta or {}), *self._indexed(meta))
+                        for entry_id, row, doc, meta in zip(ids, rows, documents, metadatas)
+                    ],
+                )
+                self._commit_meta(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._version = None
+                raise
+            finally:
+                conn.close()
+
+    def update(self, ids, metadatas):
+        """Merge new metadata into existing records, like Chroma's update."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for entry_id, meta in zip(ids, metadatas):
+                    row = conn.execute("SELECT metadata FROM records WHERE id = ?", (entry_id,)).fetchone()
+                    if row is not None:
+                        merged = json.loads(row[0])
+                        merged.update(meta)
+                        assignments = ", ".join(f"{field} = ?" for field in INDEXED_FIELDS)
+                        conn.execute(
+                            f"UPDATE records SET metadata = ?, {assignments} WHERE id = ?",
+                            (json.dumps(merged), *self._indexed(merged), entry_id),
+                        )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.close()
+
+    def delete(self, ids):
+        """Remove entries, moving the last rows into the freed slots so the matrix stays dense."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                self._refresh(conn)
+                for entry_id in ids:
+                    row = self._rows.pop(entry_id, None)
+                    if row is None:
+                        continue
+                    conn.execute("DELETE FROM records WHERE id = ?", (entry_id,))
+                    last = self.size - 1
+                    if row != last:
+                        moved = self._ids[last]
+                        self._matrix[row] = self._matrix[last]
+                        self._norms[row] = self._norms[last]
+                        self._ids[row] = moved
+                        self._rows[moved] = row
+                        conn.execute("UPDATE records SET row = ? WHERE id = ?", (row, moved))
+                    self._ids.pop()
+                    self.size -= 1
+                if self._matrix is not None:
+                    self._matrix.flush()
+                self._commit_meta(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                self._version = None
+                raise
+            finally:
+                conn.close()
+
+    # ------------------------------------------------------------- reads
+    def count(self):
+        with self._lock:
+            self._refresh()
+            return self.size
+
+    def _records(self, conn, ids):
+        found = {}
+        for lo in range(0, len(ids), 500):
+            chunk = ids[lo:lo + 500]
+            rows = conn.execute(
+                f"SELECT id, document, metadata FROM records WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            for entry_id, document, metadata in rows:
+                found[entry_id] = (document, json.loads(metadata))
+        return found
+
+    def get(self, ids=None, include=("metadatas", "documents")):
+        """All (or the given) entries as a Chroma-style dict of parallel lists."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                # One read transaction, so the row mapping and the records are the same snapshot
+                conn.execute("BEGIN")
+                self._refresh(conn)
+                ids = [entry_id for entry_id in (ids if ids is not None else self._ids) if entry_id in self._rows]
+                records = self._records(conn, ids)
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+            # Entries deleted by another writer are dropped rather than raising KeyError
+            ids = [entry_id for entry_id in ids if entry_id in records]
+            result = {"ids": ids}
+            if "embeddings" in include:
+                rows = [self._rows[entry_id] for entry_id in ids]
+                result["embeddings"] = np.asarray(self._matrix[rows], dtype="float32") if rows else np.zeros((0, self.dim or 0), dtype="float32")
+            if "documents" in include:
+                result["documents"] = [records[entry_id][0] for entry_id in ids]
+            if "metadatas" in include:
+                result["metadatas"] = [records[entry_id][1] for entry_id in ids]
+            return result
+
+    def _distances(self, queries, rows=None):
+        """Squared L2 distances (n_queries x n_rows), as Chroma's default space reports."""
+        size = self.size if rows is None else len(rows)
+        scores = np.empty((len(queries), size), dtype="float32")
+        for lo in range(0, size, SEARCH_BLOCK):
+            hi = min(lo + SEARCH_BLOCK, size)
+            index = slice(lo, hi) if rows is None else rows[lo:hi]
+            block = self._matrix[index]
+            if block.dtype != np.float32:
+                block = block.astype("float32")
+            scores[:, lo:hi] = self._norms[index] - 2.0 * (queries @ block.T)
+        return scores + np.einsum("ij,ij->i", queries, queries)[:, None]
+
+    def _filtered_rows(self, conn, where):
+        sql, params = where_sql(where)
+        rows = np.array([row for row, in conn.execute(f"SELECT row FROM records WHERE {sql} ORDER BY row", params)], dtype=np.int64)
+        # Rows appended by another process since the last refresh are not mapped yet
+        return rows[rows < self.size]
+
+    def query(self, query_embeddings, n_results=1, include=("metadatas", "documents", "distances"), rows=None, where=None):
+        """
+        Nearest neighbours for a batch of query embeddings in one matrix product.
+
+        Args:
+            query_embeddings: Sequence of query vectors.
+            n_results: Matches per query.
+            include: Any of "metadatas", "documents", "distances".
+            rows: Optional array of candidate rows to restrict the search to.
+            where: Optional Chroma-style filter on INDEXED_FIELDS; only matching
+                rows are searched.
+
+        Returns:
+            dict: Chroma-style {"ids": [[...]], ...} with one list per query.
+        """
+        queries = np.atleast_2d(np.asarray(query_embeddings, dtype="float32"))
+        with self._lock:
+            conn = self._connect()
+            try:
+                # One read transaction, so the rows searched and the records returned are the same snapshot
+                conn.execute("BEGIN")
+                self._refresh(conn)
+                if where:
+                    rows = self._filtered_rows(conn, where)
+                size = self.size if rows is None else len(rows)
+                k = min(n_results, size)
+                if k == 0:
+                    conn.execute("COMMIT")
+                    empty = {"ids": [[] for _ in queries]}
+                    for field in include:
+                        empty[field] = [[] for _ in queries]
+                    return empty
+                distances = self._distances(queries, rows)
+                # argpartition finds the k best in linear time; only those k are sorted
+                top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+                order = np.take_along_axis(distances, top, axis=1).argsort(axis=1)
+                top = np.take_along_axis(top, order, axis=1)
+                candidates = np.arange(self.size) if rows is None else np.asarray(rows)
+                matched = [[self._ids[candidates[i]] for i in row] for row in top]
+                records = self._records(conn, list({entry_id for row in matched for entry_id in row}))
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+            top_distances = np.take_along_axis(distances, top, axis=1).tolist()
+        # Matches whose record is gone are dropped from every list, keeping them aligned
+        kept = [[i for i, entry_id in enumerate(row) if entry_id in records] for row in matched]
+        result = {"ids": [[row[i] for i in keep] for row, keep in zip(matched, kept)]}
+        if "distances" in include:
+            result["distances"] = [[row[i] for i in keep] for row, keep in zip(top_distances, kept)]
+        if "metadatas" in include:
+            result["metadatas"] = [[records[entry_id][1] for entry_id in row] for row in result["ids"]]
+        if "documents" in include:
+            result["documents"] = [[records[entry_id][0] for entry_id in row] for row in result["ids"]]
+        return result
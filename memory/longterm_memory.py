@@ -1,13 +1,151 @@
-import chromadb
-from openai import OpenAI  
-from dotenv import load_dotenv
-
-load_dotenv()
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter, deque
+import numpy as np
 import sys 
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import config
+from bootstrap import load_env
+from rate_limiter import governor, estimate_tokens
+from memory.embedding_cache import embedding_cache
+from memory.write_behind import MemoryWriter
+from memory.compaction import plan_compaction
+
+# Inputs per embeddings request (the API accepts up to 2048).
+EMBEDDING_BATCH_SIZE = 2048
+# Records per Chroma upsert when loading a snapshot (and per compaction update).
+SNAPSHOT_BATCH_SIZE = 1000
+# Recent get_memories latencies kept for stats().
+LATENCY_WINDOW = 1000
+
+# Shared background writer for add_situations when memory_write_behind is on.
+memory_writer = MemoryWriter(
+    max_batch=config.get("memory_write_batch", 64),
+    flush_interval=config.get("memory_write_interval", 0.2),
+)
+
+# Structured metadata stored with every memory (besides recommendation,
+# created_at and hits); company, sector, agent, signal and trade_day are
+# indexed by the flat backend for filtered retrieval.
+MEMORY_FIELDS = ("company", "sector", "trade_date", "trade_day", "agent", "signal", "outcome", "returns")
+
+# The explicit proposal line the agents are prompted to end with, else any verdict word.
+_PROPOSAL_RE = re.compile(r"FINAL TRANSACTION PROPOSAL:\W*(BUY|SELL|HOLD)", re.IGNORECASE)
+_SIGNAL_RE = re.compile(r"\b(BUY|SELL|HOLD)\b")
+
+
+def trade_day(trade_date):
+    """Trade date as a YYYYMMDD integer, the form Chroma can compare with $lt."""
+    return int(str(trade_date)[:10].replace("-", ""))
+
+
+def extract_signal(text):
+    """Cheap BUY/SELL/HOLD tag for a decision text, or None when it has no verdict."""
+    if not text:
+        return None
+    match = _PROPOSAL_RE.search(text) or _SIGNAL_RE.search(text.upper())
+    return match.group(1).upper() if match else None
+
+
+def memory_tags(state, agent, decision=None, **extra):
+    """
+    Metadata for a memory written while analysing `state`.
+
+    Args:
+        state: Workflow state with company_of_interest and trade_date.
+        agent: Role that wrote the memory (e.g. "trader").
+        decision: Decision text the BUY/SELL/HOLD signal is extracted from.
+        **extra: Further fields such as outcome or returns.
+
+    Returns:
+        dict: Metadata with the MEMORY_FIELDS that are known.
+    """
+    company = state.get("company_of_interest")
+    tags = {
+        "company": company,
+        "sector": config.get("ticker_sectors", {}).get(company),
+        "agent": agent,
+        "signal": extract_signal(decision),
+    }
+    if state.get("trade_date"):
+        tags["trade_date"] = str(state["trade_date"])
+        tags["trade_day"] = trade_day(state["trade_date"])
+    tags.update(extra)
+    # Chroma rejects None values, so unknown fields are left out
+    return {key: value for key, value in tags.items() if value is not None}
+
+
+def memory_filters(state, scope=None, point_in_time=None):
+    """
+    Retrieval filters for an agent working on `state`, from config unless overridden.
+
+    Args:
+        state: Workflow state with company_of_interest and trade_date.
+        scope: "ticker", "sector" or "all"; defaults to config["memory_scope"].
+        point_in_time: Only memories from before the trade date; defaults to
+            config["memory_point_in_time"].
+
+    Returns:
+        dict: Filters for get_memories (company, sector, before).
+    """
+    scope = scope or config.get("memory_scope", "all")
+    if point_in_time is None:
+        point_in_time = config.get("memory_point_in_time", True)
+    company = state.get("company_of_interest")
+    filters = {}
+    if scope == "ticker" and company:
+        filters["company"] = company
+    elif scope == "sector":
+        sector = config.get("ticker_sectors", {}).get(company)
+        # Without a known sector the search falls back to the same ticker
+        filters.update({"sector": sector} if sector else {"company": company})
+    if point_in_time and state.get("trade_date"):
+        filters["before"] = state["trade_date"]
+    return filters
+
 
+def build_where(filters):
+    """Chroma `where` clause for get_memories filters (company, sector, agent, signal, before)."""
+    clauses = []
+    for field, value in (filters or {}).items():
+        if value is None:
+            continue
+        if field == "before":
+            clauses.append({"trade_day": {"$lt": trade_day(value)}})
+        elif field in ("company", "sector", "agent", "signal"):
+            clauses.append({field: value})
+        else:
+            raise ValueError(f"Unknown memory filter '{field}'")
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+# One Chroma client per process, opened on first use and shared by every memory.
+_chroma_client = None
+_chroma_lock = threading.Lock()
+
+
+def get_chroma_client(config):
+    """Open the Chroma client all memories share: on disk under data_cache_dir unless memory_persist is off."""
+    global _chroma_client
+    if _chroma_client is None:
+        with _chroma_lock:
+            if _chroma_client is None:
+                # Imported here so processes that never touch memory skip the cost
+                import chromadb
+                settings = chromadb.config.Settings(allow_reset=True, anonymized_telemetry=False)
+                if config.get("memory_persist", True):
+                    # The on-disk store is shared by every process using the same data_cache_dir
+                    path = os.path.join(config["data_cache_dir"], "memory", "chroma")
+                    _chroma_client = chromadb.PersistentClient(path=path, settings=settings)
+                else:
+                    _chroma_client = chromadb.EphemeralClient(settings=settings)
+    return _chroma_client
 
 
 # The FinancialSituationMemory class provides long-term memory 
@@ -16,68 +154,335 @@ class FinancialSituationMemory:
     def __init__(self, name, config):
         # Use OpenAI’s small embedding model for vectorizing text
         self.embedding_model = "text-embedding-3-small"
+        self.name = name
+        self.config = config
         
-        # Initialize OpenAI client (pointing to your configured backend)
-        self.client = OpenAI(base_url=config["backend_url"])
+        # The OpenAI client and the Chroma collection are created on first use
+        self._client = None
+        self._collection = None
+        self._lock = threading.Lock()
         
-        # Create a ChromaDB client (with reset allowed for testing)
-        self.chroma_client = chromadb.Client(chromadb.config.Settings(allow_reset=True))
-        
-        # Create a collection (like a table) to store situations + advice
-        self.situation_collection = self.chroma_client.create_collection(name=name)
+        # Usage bookkeeping for compaction and stats(): retrievals per entry id
+        # (folded into the stored "hits" metadata when compacting) and latencies
+        self._hits = Counter()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._inserts_since_compaction = 0
+        self._stats_lock = threading.Lock()
+
+    @property
+    def client(self):
+        # Initialize OpenAI client (pointing to your configured backend)
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+                    load_env()
+                    self._client = OpenAI(base_url=self.config["backend_url"])
+        return self._client
+
+    @client.setter
+    def client(self, value):
+        self._client = value
+
+    @property
+    def situation_collection(self):
+        # Open (or create) the collection (like a table) storing situations + advice
+        if self._collection is None:
+            with self._lock:
+                if self._collection is None:
+                    collection = self._open_collection()
+                    # Warm start: an empty collection is seeded from the snapshot directory
+                    snapshot_dir = self.config.get("memory_snapshot_dir")
+                    if snapshot_dir and collection.count() == 0:
+                        path = self.snapshot_path(snapshot_dir)
+                        if os.path.exists(path):
+                            self._load_snapshot(collection, path)
+                    self._collection = collection
+        return self._collection
+
+    def _open_collection(self):
+        # Embeddings are always supplied, so no embedding function is attached
+        return get_chroma_client(self.config).get_or_create_collection(
+            name=self.name, embedding_function=None
+        )
+
+    def snapshot_path(self, directory):
+        return os.path.join(directory, f"{self.name}.npz")
+
+    def export_snapshot(self, directory):
+        """Write every stored situation, recommendation and embedding to <directory>/<name>.npz."""
+        os.makedirs(directory, exist_ok=True)
+        data = self.situation_collection.get(include=["embeddings", "documents", "metadatas"])
+        embeddings = np.asarray(data["embeddings"], dtype="float32")
+        if embeddings.size == 0:
+            embeddings = embeddings.reshape(0, 0)
+        path = self.snapshot_path(directory)
+        # Written to a temporary file first so readers never see a partial snapshot
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(
+            tmp,
+            ids=np.asarray(data["ids"], dtype=str),
+            documents=np.asarray(data["documents"], dtype=str),
+            metadatas=np.asarray([json.dumps(meta) for meta in data["metadatas"]], dtype=str),
+            embeddings=embeddings,
+        )
+        os.replace(tmp, path)
+        return path
+
+    def load_snapshot(self, directory):
+        """Upsert the snapshot in <directory>/<name>.npz into this memory."""
+        return self._load_snapshot(self.situation_collection, self.snapshot_path(directory))
+
+    def _load_snapshot(self, collection, path):
+        with np.load(path) as snapshot:
+            ids = snapshot["ids"].tolist()
+            documents = snapshot["documents"].tolist()
+            metadatas = [json.loads(meta) for meta in snapshot["metadatas"].tolist()]
+            embeddings = snapshot["embeddings"]
+        for lo in range(0, len(ids), SNAPSHOT_BATCH_SIZE):
+            hi = lo + SNAPSHOT_BATCH_SIZE
+            collection.upsert(
+                ids=ids[lo:hi],
+                documents=documents[lo:hi],
+                metadatas=metadatas[lo:hi],
+                embeddings=embeddings[lo:hi],
+            )
+        return len(ids)
 
     def get_embedding(self, text):
         # Generate an embedding (vector) for the given text
-        response = self.client.embeddings.create(model=self.embedding_model, input=text)
-        return response.data[0].embedding
+        return self.get_embeddings([text])[0]
+
+    def get_embeddings(self, texts):
+        # Embed many texts at once: cached vectors are reused and everything
+        # else goes out in a single request per EMBEDDING_BATCH_SIZE inputs
+        vectors = embedding_cache.get_many(self.embedding_model, texts)
+        missing = list(dict.fromkeys(t for t in texts if t not in vectors))
+        for lo in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+            batch = missing[lo:lo + EMBEDDING_BATCH_SIZE]
+            tokens = sum(estimate_tokens(t) for t in batch)
+            with governor.acquire("openai", self.embedding_model, tokens=tokens) as lease:
+                response = self.client.embeddings.create(model=self.embedding_model, input=batch)
+                lease.settle(response.usage.total_tokens if response.usage else None)
+            fresh = {batch[item.index]: item.embedding for item in response.data}
+            embedding_cache.put_many(self.embedding_model, fresh)
+            vectors.update(fresh)
+        return [vectors[t] for t in texts]
 
-    def add_situations(self, situations_and_advice):
-        # Add new situations and recommendations to memory
+    def add_situations(self, situations_and_advice, metadata=None):
+        # Add new situations and recommendations to memory.
+        # Entries are (situation, advice) or (situation, advice, metadata) tuples;
+        # `metadata` (see memory_tags) is stored with every entry of the call.
         if not situations_and_advice:
             return
+        situations_and_advice = [
+            (entry[0], entry[1], {**(metadata or {}), **(entry[2] if len(entry) > 2 else {})})
+            for entry in situations_and_advice
+        ]
         
-        # Offset ensures unique IDs (in case new data is added later)
-        offset = self.situation_collection.count()
-        ids = [str(offset + i) for i, _ in enumerate(situations_and_advice)]
+        # Off the critical path: the background writer embeds and inserts later
+        if self.config.get("memory_write_behind", True):
+            memory_writer.submit(self, situations_and_advice)
+        else:
+            self.write_situations(situations_and_advice)
+
+    def write_situations(self, situations_and_advice):
+        # Embed and insert situations right away (used by the background writer)
+        if not situations_and_advice:
+            return
         
-        # Separate situations and their corresponding advice
-        situations = [s for s, r in situations_and_advice]
-        recommendations = [r for s, r in situations_and_advice]
+        # Random IDs never collide, unlike count()-based offsets under concurrency
+        ids = [uuid.uuid4().hex for _ in situations_and_advice]
         
-        # Generate embeddings for all situations
-        embeddings = [self.get_embedding(s) for s in situations]
+        # Separate situations, their corresponding advice and any structured metadata
+        situations = [entry[0] for entry in situations_and_advice]
+        recommendations = [entry[1] for entry in situations_and_advice]
+        tags = [entry[2] if len(entry) > 2 else {} for entry in situations_and_advice]
+        
+        # Generate embeddings for all situations in one batched request
+        embeddings = self.get_embeddings(situations)
         
         # Store everything in Chroma (vector DB)
+        now = time.time()
         self.situation_collection.add(
             documents=situations,
-            metadatas=[{"recommendation": rec} for rec in recommendations],
+            metadatas=[
+                {**{k: v for k, v in tag.items() if v is not None}, "recommendation": rec, "created_at": now, "hits": 0}
+                for rec, tag in zip(recommendations, tags)
+            ],
             embeddings=embeddings,
             ids=ids,
         )
+        
+        # Compact automatically once enough new entries have accumulated
+        every = self.config.get("memory_compaction", {}).get("every_inserts")
+        with self._stats_lock:
+            self._inserts_since_compaction += len(ids)
+            due = bool(every) and self._inserts_since_compaction >= every
+        if due:
+            self.compact()
 
-    def get_memories(self, current_situation, n_matches=1):
-        # Retrieve the most similar past situations for a given query
-        if self.situation_collection.count() == 0:
-            return []
+    def get_memories(self, current_situation, n_matches=1, filters=None):
+        # Retrieve the most similar past situations for a given query.
+        # `filters` (see memory_filters) restricts the search to the same ticker or
+        # sector and to memories from before a trade date; the metadata filter is
+        # applied before the vector search, so it also shrinks the search.
+        return self.get_memories_batch([current_situation], n_matches, filters)[0]
+
+    def get_memories_batch(self, situations, n_matches=1, filters=None):
+        # Retrieve matches for several situations with one embedding request and one query
+        # Read-your-writes: apply this memory's queued inserts first
+        if memory_writer.pending(self):
+            memory_writer.flush()
+        
+        started = time.perf_counter()
+        count = self.situation_collection.count()
+        if count == 0 or not situations:
+            return [[] for _ in situations]
         
-        # Embed the new/current situation
-        query_embedding = self.get_embedding(current_situation)
+        # Embed the new/current situations
+        query_embeddings = self.get_embeddings(situations)
         
         # Query the collection for similar embeddings
         results = self.situation_collection.query(
-            query_embeddings=[query_embedding],
-            n_results=min(n_matches, self.situation_collection.count()),
+            query_embeddings=query_embeddings,
+            n_results=min(n_matches, count),
+            where=build_where(filters),
             include=["metadatas"],  # Only return recommendations
         )
         
+        with self._stats_lock:
+            for matched in results['ids']:
+                self._hits.update(matched)
+            self._latencies.append(time.perf_counter() - started)
+        
         # Return extracted recommendations from the matches
-        return [{'recommendation': meta['recommendation']} for meta in results['metadatas'][0]]
+        return [
+            [{'recommendation': meta['recommendation']} for meta in metadatas]
+            for metadatas in results['metadatas']
+        ]
+
+    def compact(self, policy=None):
+        """
+        Merge near-duplicates and enforce the age and size limits of the compaction policy.
+
+        Args:
+            policy: Overrides config["memory_compaction"] (similarity, max_age_days,
+                max_per_ticker, max_entries).
+
+        Returns:
+            dict: Entries before and after, and how many were removed or updated.
+        """
+        policy = policy if policy is not None else self.config.get("memory_compaction", {})
+        collection = self.situation_collection
+        data = collection.get(include=["embeddings", "metadatas"])
+        
+        # Fold retrievals counted since the last compaction into the stored hits
+        with self._stats_lock:
+            hits, self._hits = self._hits, Counter()
+            self._inserts_since_compaction = 0
+        metadatas = [dict(meta or {}) for meta in data["metadatas"]]
+        for entry_id, meta in zip(data["ids"], metadatas):
+            meta["hits"] = meta.get("hits", 0) + hits.get(entry_id, 0)
+        
+        remove, updates = plan_compaction(data["ids"], data["embeddings"], metadatas, policy)
+        # Entries whose hit count changed are written back even if not merged
+        for entry_id, meta in zip(data["ids"], metadatas):
+            if hits.get(entry_id) and entry_id not in updates and entry_id not in remove:
+                updates[entry_id] = meta
+        
+        for lo in range(0, len(remove), SNAPSHOT_BATCH_SIZE):
+            collection.delete(ids=remove[lo:lo + SNAPSHOT_BATCH_SIZE])
+        update_ids = list(updates)
+        for lo in range(0, len(update_ids), SNAPSHOT_BATCH_SIZE):
+            batch = update_ids[lo:lo + SNAPSHOT_BATCH_SIZE]
+            collection.update(ids=batch, metadatas=[updates[entry_id] for entry_id in batch])
+        
+        return {
+            "name": self.name,
+            "before": len(data["ids"]),
+            "after": len(data["ids"]) - len(remove),
+            "removed": len(remove),
+            "updated": len(updates),
+        }
+
+    def stats(self):
+        """Collection size, pending writes and recent get_memories latency."""
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+        return {
+            "name": self.name,
+            "entries": self.situation_collection.count(),
+            "pending_writes": memory_writer.pending(self),
+            "queries": len(latencies),
+            "avg_query_ms": round(1000 * sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p95_query_ms": round(1000 * latencies[int(0.95 * (len(latencies) - 1))], 2) if latencies else 0.0,
+        }
     
 
+class FlatSituationMemory(FinancialSituationMemory):
+    """FinancialSituationMemory stored in a memory-mapped NumPy flat index instead of Chroma."""
+
+    def _open_collection(self):
+        from memory.flat_index import FlatIndex
+        if self.config.get("memory_persist", True):
+            directory = os.path.join(self.config["data_cache_dir"], "memory", "flat", self.name)
+        else:
+            # Non-persistent memories still need a file to map; it lives for this process only
+            import atexit, shutil, tempfile
+            directory = tempfile.mkdtemp(prefix=f"{self.name}-")
+            atexit.register(shutil.rmtree, directory, True)
+        return FlatIndex(directory, dtype=self.config.get("memory_flat_dtype", "float32"))
+
+
+MEMORY_BACKENDS = {
+    "chroma": FinancialSituationMemory,
+    "flat": FlatSituationMemory,
+}
+
+
+def create_memory(name, config):
+    """Build an agent memory on the backend selected by config["memory_backend"]."""
+    backend = config.get("memory_backend", "chroma")
+    if backend not in MEMORY_BACKENDS:
+        raise ValueError(f"Unknown memory backend '{backend}'; expected one of {sorted(MEMORY_BACKENDS)}")
+    return MEMORY_BACKENDS[backend](name, config)
+
+
 # Create a dedicated memory instance for each agent that learns.
-bull_memory = FinancialSituationMemory("bull_memory", config)
-bear_memory = FinancialSituationMemory("bear_memory", config)
-trader_memory = FinancialSituationMemory("trader_memory", config)
-invest_judge_memory = FinancialSituationMemory("invest_judge_memory", config)
-risk_manager_memory = FinancialSituationMemory("risk_manager_memory", config)
+# Construction is cheap: nothing is opened until a memory is first used.
+bull_memory = create_memory("bull_memory", config)
+bear_memory = create_memory("bear_memory", config)
+trader_memory = create_memory("trader_memory", config)
+invest_judge_memory = create_memory("invest_judge_memory", config)
+risk_manager_memory = create_memory("risk_manager_memory", config)
+
+ALL_MEMORIES = [bull_memory, bear_memory, trader_memory, invest_judge_memory, risk_manager_memory]
+
+
+def compact_memories(policy=None):
+    """Apply pending writes, then compact every agent memory."""
+    memory_writer.flush()
+    return [memory.compact(policy) for memory in ALL_MEMORIES]
+
+
+def memory_stats():
+    """stats() of every agent memory plus the background writer."""
+    return {"memories": [memory.stats() for memory in ALL_MEMORIES], "writer": memory_writer.stats()}
+
+
+def export_memory_snapshots(directory=None):
+    """Snapshot every agent memory, e.g. to warm-start fresh workers via memory_snapshot_dir."""
+    directory = directory or config.get("memory_snapshot_dir") or os.path.join(config["data_cache_dir"], "memory", "snapshots")
+    return [memory.export_snapshot(directory) for memory in ALL_MEMORIES]
+
+
+def load_memory_snapshots(directory=None):
+    """Load every agent memory's snapshot from directory; returns records loaded per memory."""
+    directory = directory or config.get("memory_snapshot_dir") or os.path.join(config["data_cache_dir"], "memory", "snapshots")
+    return {
+        memory.name: memory.load_snapshot(directory)
+        for memory in ALL_MEMORIES
+        if os.path.exists(memory.snapshot_path(directory))
+    }
 
@@ -0,0 +1,130 @@
+# Write-behind queue for agent memory inserts.
+# Graph nodes hand their (situation, advice) pairs to a background thread and
+# move on immediately; the thread batches whatever has queued up, coalesces
+# repeated situations, embeds each memory's batch in one request and inserts
+# it. Pending writes are flushed before a memory is read and at shutdown.
+import atexit
+import queue
+import threading
+import time
+from collections import Counter
+
+_STOP = object()
+
+
+class MemoryWriter:
+    """Background writer that batches add_situations calls across all memories."""
+
+    def __init__(self, max_batch=64, flush_interval=0.2):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._pending = Counter()
+        self._pending_lock = threading.Lock()
+        self.batches = 0
+        self.written = 0
+        self.coalesced = 0
+        self.failed = 0
+
+    def _ensure_started(self):
+        # Started on first use, so importing memory never spawns a thread
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def submit(self, memory, situations_and_advice):
+        """Queue (situation, advice[, metadata]) entries for `memory` and return immediately."""
+        situations_and_advice = list(situations_and_advice)
+        if not situations_and_advice:
+            return
+        self._ensure_started()
+        with self._pending_lock:
+            self._pending[memory.name] += len(situations_and_advice)
+        self._queue.put((memory, situations_and_advice))
+
+    def pending(self, memory=None):
+        """Situations queued but not yet written, for one memory or in total."""
+        with self._pending_lock:
+            return self._pending[memory.name] if memory is not None else sum(self._pending.values())
+
+    def flush(self, timeout=None):
+        """Block until every queued write has been applied; False if the timeout expired."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=30):
+        """Flush pending writes and stop the writer thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                break
+            items = [item]
+            # Gather whatever else arrives within the flush interval into the same batch
+            deadline = time.monotonic() + self.flush_interval
+            while len(items) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                items.append(item)
+            try:
+                self._write(items)
+            finally:
+                for _ in items:
+                    self._queue.task_done()
+
+    def _write(self, items):
+        # Group by memory and coalesce repeated situations (the latest advice and metadata win)
+        batches = {}
+        for memory, pairs in items:
+            memory_batch = batches.setdefault(id(memory), (memory, {}))[1]
+            for situation, *rest in pairs:
+                if situation in memory_batch:
+                    self.coalesced += 1
+                memory_batch[situation] = rest
+        for memory, memory_batch in batches.values():
+            queued = sum(len(pairs) for m, pairs in items if m is memory)
+            try:
+                memory.write_situations([(situation, *rest) for situation, rest in memory_batch.items()])
+                self.written += len(memory_batch)
+            except Exception as e:
+                self.failed += len(memory_batch)
+                print(f"❌ Memory write to {memory.name} failed: {e}")
+            finally:
+                with self._pending_lock:
+                    self._pending[memory.name] -= queued
+        self.batches += 1
+
+    def stats(self):
+        return {
+            "pending": self.pending(),
+            "batches": self.batches,
+            "written": self.written,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+        }
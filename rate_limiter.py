@@ -0,0 +1,250 @@
+# Process-wide rate limiter and concurrency governor.
+# Every outbound call (chat models, embeddings, Tavily, Finnhub, Yahoo) goes
+# through the shared `governor`, which holds per provider / model token buckets
+# for requests and tokens per minute plus a cap on in-flight calls. Callers wait
+# for capacity instead of hitting 429s, and the time spent waiting is recorded.
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from config import config
+
+
+def estimate_tokens(text):
+    """Rough token count of a text (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to `capacity`; reservations may drive it negative."""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount):
+        """Take `amount` units now and return how many seconds to wait before using them."""
+        with self._lock:
+            self._refill()
+            # A single oversized request can never need more than a full bucket.
+            self.level -= min(amount, self.capacity)
+            return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount):
+        """Give back units that were reserved but not used."""
+        with self._lock:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+
+class ProviderLimit:
+    """Request, token and concurrency limits for one provider or provider:model key."""
+
+    def __init__(self, key, rpm=None, tpm=None, concurrency=None):
+        self.key = key
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.slots = threading.BoundedSemaphore(concurrency) if concurrency else None
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.waited_calls = 0
+        self.wait_seconds = 0.0
+        self.max_wait = 0.0
+        self.queued = 0
+        self.in_flight = 0
+
+    def reserve(self, tokens):
+        """Reserve one request and `tokens` tokens; returns the seconds to wait."""
+        wait = self.requests.reserve(1) if self.requests else 0.0
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def record(self, waited):
+        with self._stats_lock:
+            self.calls += 1
+            self.wait_seconds += waited
+            self.max_wait = max(self.max_wait, waited)
+            if waited > 0.001:
+                self.waited_calls += 1
+
+    def adjust(self, queued=0, in_flight=0):
+        with self._stats_lock:
+            self.queued += queued
+            self.in_flight += in_flight
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "calls": self.calls,
+                "waited_calls": self.waited_calls,
+                "wait_seconds": round(self.wait_seconds, 3),
+                "avg_wait": round(self.wait_seconds / self.calls, 3) if self.calls else 0.0,
+                "max_wait": round(self.max_wait, 3),
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+            }
+
+
+class Lease:
+    """Handed to the caller while a governed call runs, to report actual token usage."""
+
+    def __init__(self, limit, estimate):
+        self.limit = limit
+        self.estimate = estimate
+
+    def settle(self, actual_tokens):
+        """Correct the token bucket once the real usage is known."""
+        if not self.limit.tokens or actual_tokens is None:
+            return
+        unused = self.estimate - actual_tokens
+        if unused > 0:
+            self.limit.tokens.refund(unused)
+        elif unused < 0:
+            # Overshoot is charged to the next callers rather than waited on here.
+            self.limit.tokens.reserve(-unused)
+        self.estimate = actual_tokens
+
+
+class RateLimiter:
+    """Shared registry of ProviderLimits, looked up by "provider:model" then "provider"."""
+
+    def __init__(self, limits):
+        self.limits_config = limits
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def limit_for(self, provider, model=None):
+        key = f"{provider}:{model}" if model else provider
+        limit = self._limits.get(key)
+        if limit is None:
+            with self._lock:
+                limit = self._limits.get(key)
+                if limit is None:
+                    settings = self.limits_config.get(key) or self.limits_config.get(provider) or {}
+                    limit = ProviderLimit(key, **settings)
+                    self._limits[key] = limit
+        return limit
+
+    @contextmanager
+    def acquire(self, provider, model=None, tokens=0):
+        """
+        Block until a call to `provider` (and `model`) fits the configured limits.
+
+        Args:
+            provider: Provider name, e.g. "openai", "tavily", "finnhub", "yahoo".
+            model: Optional model name; limits for "provider:model" win over "provider".
+            tokens: Estimated tokens the call will consume (0 for untokenized APIs).
+
+        Yields:
+            Lease: call `lease.settle(actual_tokens)` once the usage is known.
+        """
+        limit = self.limit_for(provider, model)
+        started = time.monotonic()
+        limit.adjust(queued=1)
+        try:
+            wait = limit.reserve(tokens)
+            if wait > 0:
+                time.sleep(wait)
+            if limit.slots:
+                limit.slots.acquire()
+        finally:
+            limit.adjust(queued=-1)
+        limit.record(time.monotonic() - started)
+        limit.adjust(in_flight=1)
+        try:
+            yield Lease(limit, tokens)
+        finally:
+            limit.adjust(in_flight=-1)
+            if limit.slots:
+                limit.slots.release()
+
+    @asynccontextmanager
+    async def aacquire(self, provider, model=None, tokens=0):
+        """Async counterpart of `acquire` that waits on the event loop instead of blocking it."""
+        limit = self.limit_for(provider, model)
+        started = time.monotonic()
+        limit.adjust(queued=1)
+        try:
+            wait = limit.reserve(tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if limit.slots:
+                # The semaphore is shared with worker threads, so poll it
+                # rather than blocking the loop on it.
+                delay = 0.01
+                while not limit.slots.acquire(blocking=False):
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 0.25)
+        finally:
+            limit.adjust(queued=-1)
+        limit.record(time.monotonic() - started)
+        limit.adjust(in_flight=1)
+        try:
+            yield Lease(limit, tokens)
+        finally:
+            limit.adjust(in_flight=-1)
+            if limit.slots:
+                limit.slots.release()
+
+    def configure(self, limits):
+        """Replace the configured limits; buckets are rebuilt on next use."""
+        with self._lock:
+            self.limits_config = limits
+            self._limits = {}
+
+    def stats(self):
+        """Queue-wait and throughput metrics per provider / model key."""
+        with self._lock:
+            limits = list(self._limits.values())
+        return {limit.key: limit.stats() for limit in limits}
+
+
+def split_limits(limits, parts):
+    """
+    One process's share of `limits` when `parts` processes each run their own governor.
+
+    Rates are divided evenly. Concurrency is divided rounding down but never
+    below one call, so a cap smaller than `parts` can still be exceeded.
+    """
+    if parts <= 1:
+        return limits
+    shared = {}
+    for key, settings in limits.items():
+        share = {}
+        for name, value in settings.items():
+            if not value:
+                share[name] = value
+            elif name == "concurrency":
+                share[name] = max(value // parts, 1)
+            else:
+                share[name] = value / parts
+        shared[key] = share
+    return shared
+
+
+def merge_stats(snapshots):
+    """Combine `stats()` snapshots from several governors into one per key."""
+    merged = {}
+    for snapshot in snapshots:
+        for key, stats in snapshot.items():
+            total = merged.setdefault(key, {"calls": 0, "waited_calls": 0, "wait_seconds": 0.0, "max_wait": 0.0, "queued": 0, "in_flight": 0})
+            for name in ("calls", "waited_calls", "wait_seconds", "queued", "in_flight"):
+                total[name] += stats[name]
+            total["max_wait"] = max(total["max_wait"], stats["max_wait"])
+    for total in merged.values():
+        total["wait_seconds"] = round(total["wait_seconds"], 3)
+        total["avg_wait"] = round(total["wait_seconds"] / total["calls"], 3) if total["calls"] else 0.0
+    return merged
+
+
+governor = RateLimiter(config.get("rate_limits", {}))
@@ -3,8 +3,9 @@
 from typing import Dict, Any, Callable, Optional
 from rich.console import Console
 from rich.markdown import Markdown
-from memory.longterm_memory import bull_memory, bear_memory, trader_memory, risk_manager_memory, invest_judge_memory
-from llm import quick_thinking_llm, deep_thinking_llm
+from memory.longterm_memory import bull_memory, bear_memory, trader_memory, risk_manager_memory, invest_judge_memory, memory_tags
+from llm import get_llm
+from debate_summary import debate_history
 import json
 import datetime
 
@@ -75,7 +76,8 @@ class Reflector:
                outcome_description: str,
                memory, 
                component_key_func: Callable,
-               agent_name: str) -> str:
+               agent_name: str,
+               metadata: Optional[Dict[str, Any]] = None) -> str:
         """
         Conduct reflection for a specific agent
         
@@ -86,6 +88,7 @@ class Reflector:
             memory: Memory instance for this agent
             component_key_func: Function to extract relevant text for this agent
             agent_name: Name of the agent for logging
+            metadata: Structured memory metadata (company, trade date, signal, outcome)
             
         Returns:
             Generated reflection text
@@ -120,7 +123,7 @@ class Reflector:
             reflection_result = self.llm.invoke(prompt).content
             
             # Store in memory
-            memory.add_situations([(situation, reflection_result)])
+            memory.add_situations([(situation, reflection_result)], metadata=metadata)
             
             console.print(f"[green]Reflection completed for {agent_name}[/green]")
             return reflection_result
@@ -133,8 +136,8 @@ class TradingReflectionSystem:
     """Complete reflection system for trading workflow"""
     
     def __init__(self, llm=None):
-        self.llm = llm or deep_thinking_llm
-        self.signal_processor = SignalProcessor(quick_thinking_llm)
+        self.llm = llm or get_llm("deep")
+        self.signal_processor = SignalProcessor(get_llm("quick"))
         self.reflector = Reflector(self.llm)
     
     def process_trading_outcome(self, 
@@ -174,26 +177,31 @@ class TradingReflectionSystem:
         reflection_configs = [
             {
                 'name': 'Bull Researcher',
+                'agent': 'bull_researcher',
                 'memory': bull_memory,
-                'extractor': lambda s: s.get('investment_debate_state', {}).get('bull_history', ''),
+                'extractor': lambda s: debate_history(s.get('investment_debate_state', {}), 'Bull Analyst'),
             },
             {
-                'name': 'Bear Researcher', 
+                'name': 'Bear Researcher',
+                'agent': 'bear_researcher',
                 'memory': bear_memory,
-                'extractor': lambda s: s.get('investment_debate_state', {}).get('bear_history', ''),
+                'extractor': lambda s: debate_history(s.get('investment_debate_state', {}), 'Bear Analyst'),
             },
             {
                 'name': 'Research Manager',
+                'agent': 'research_manager',
                 'memory': invest_judge_memory,
                 'extractor': lambda s: s.get('investment_plan', ''),
             },
             {
                 'name': 'Trader',
+                'agent': 'trader',
                 'memory': trader_memory,
                 'extractor': lambda s: s.get('trader_investment_plan', ''),
             },
             {
                 'name': 'Risk Manager',
+                'agent': 'portfolio_manager',
                 'memory': risk_manager_memory,
                 'extractor': lambda s: s.get('final_trade_decision', ''),
             }
@@ -208,7 +216,14 @@ class TradingReflectionSystem:
                 outcome_description=outcome_description,
                 memory=config['memory'],
                 component_key_func=config['extractor'],
-                agent_name=config['name']
+                agent_name=config['name'],
+                metadata=memory_tags(
+                    final_state,
+                    config['agent'],
+                    signal=clean_signal if clean_signal in ("BUY", "SELL", "HOLD") else None,
+                    outcome=decision_correctness.split(" - ")[0],
+                    returns=float(actual_returns),
+                ),
             )
             
             reflections[config['name']] = reflection_text
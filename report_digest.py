@@ -0,0 +1,226 @@
+# Token-budgeted digests of the analyst reports.
+# The bull and bear read all four analyst reports on every debate turn, and the
+# research manager and trader read them again. Right after the analysts finish,
+# each report longer than a consumer's budget is condensed once per budget tier
+# by the quick model; digests are cached on disk by content, so reruns and
+# identical reports cost nothing, and each role reads the digest sized for it.
+import asyncio
+import functools
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import config
+from rate_limiter import estimate_tokens
+
+REPORT_FIELDS = ("market_report", "sentiment_report", "news_report", "fundamentals_report")
+
+# Bump when the prompt changes so stale digests are not reused.
+DIGEST_VERSION = 1
+
+DIGEST_PROMPT = """You condense a financial analyst's report for the trading agents who act on it.
+Keep every figure, indicator reading, date, catalyst, risk and conclusion that bears on a buy, sell or hold decision.
+Drop methodology, repetition and boilerplate. Use terse bullet points.
+Write at most {words} words.
+
+{title}:
+{report}"""
+
+
+def digest_key(model, budget, report):
+    return hashlib.sha256(f"{DIGEST_VERSION}\x00{model}\x00{budget}\x00{report}".encode("utf-8")).hexdigest()
+
+
+def truncate_to_budget(text, budget):
+    """Cut text to roughly `budget` tokens, at a line or sentence boundary when one is close."""
+    limit = budget * 4
+    if len(text) <= limit:
+        return text
+    cut = text[:limit]
+    boundary = max(cut.rfind("\n"), cut.rfind(". "))
+    if boundary > limit // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + " …"
+
+
+class DigestCache:
+    """SQLite store of report digests keyed by (model, budget, report) hash."""
+
+    def __init__(self, cache_path, max_entries=20_000):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._ready = False
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        # The cache file is created on first use
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                    with sqlite3.connect(self.cache_path, timeout=30) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.execute(
+                            "CREATE TABLE IF NOT EXISTS digests ("
+                            " key TEXT PRIMARY KEY, digest TEXT NOT NULL, last_used REAL NOT NULL)"
+                        )
+                    self._ready = True
+        return sqlite3.connect(self.cache_path, timeout=30)
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT digest FROM digests WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE digests SET last_used = ? WHERE key = ?", (time.time(), key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return row[0] if row else None
+
+    def put(self, key, digest):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO digests (key, digest, last_used) VALUES (?, ?, ?)",
+                (key, digest, time.time()),
+            )
+            with self._lock:
+                self._writes += 1
+                due = self._writes % 500 == 0
+            if due and self.max_entries:
+                conn.execute(
+                    "DELETE FROM digests WHERE key IN ("
+                    " SELECT key FROM digests ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+
+def role_budget(role, settings=None):
+    """Token budget per report for a consuming role, or None when it reads full reports."""
+    settings = settings if settings is not None else config.get("report_digest", {})
+    if not settings.get("enabled"):
+        return None
+    return settings.get("budgets", {}).get(role)
+
+
+def reports_for(state, role):
+    """
+    The four analyst reports as `role` should see them.
+
+    Args:
+        state: Workflow state, with report_digests filled by the digest stage.
+        role: Consuming role (a key of config["report_digest"]["budgets"]).
+
+    Returns:
+        dict: Report field -> digest sized for the role, or the full report
+        when it already fits the budget or no digest exists.
+    """
+    budget = role_budget(role)
+    digests = (state.get("report_digests") or {}).get(str(budget), {}) if budget else {}
+    return {field: digests.get(field) or state.get(field, "") for field in REPORT_FIELDS}
+
+
+class ReportDigester:
+    """Condenses the analyst reports to every configured budget, using the quick model."""
+
+    def __init__(self, settings=None, cache=None, llm=None):
+        self.settings = settings if settings is not None else config.get("report_digest", {})
+        self.cache = cache or DigestCache(os.path.join(config["data_cache_dir"], "digest_cache.sqlite"))
+        self._llm = llm
+
+    @property
+    def llm(self):
+        if self._llm is None:
+            from llm import get_llm
+            self._llm = get_llm("quick")
+        return self._llm
+
+    @functools.cached_property
+    def executor(self):
+        # Long-lived pool shared by every digest_reports call; sized for each report at each budget tier
+        return ThreadPoolExecutor(
+            max_workers=max(len(REPORT_FIELDS) * len(self.budgets()), 1), thread_name_prefix="digest",
+        )
+
+    def budgets(self):
+        return sorted({budget for budget in self.settings.get("budgets", {}).values() if budget})
+
+    def _jobs(self, state):
+        # Only reports longer than a budget need a digest at that budget
+        return [
+            (field, budget)
+            for field in REPORT_FIELDS
+            if state.get(field)
+            for budget in self.budgets()
+            if estimate_tokens(state[field]) > budget
+        ]
+
+    def _messages(self, field, report, budget):
+        title = field.replace("_", " ").title()
+        return [("user", DIGEST_PROMPT.format(words=int(budget * 0.75), title=title, report=report))]
+
+    def _key(self, report, budget):
+        return digest_key(getattr(self.llm, "model_name", type(self.llm).__name__), budget, report)
+
+    def digest(self, field, report, budget):
+        """Digest of one report at one budget, from the cache or the model."""
+        key = self._key(report, budget)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            response = self.llm.invoke(self._messages(field, report, budget), max_tokens=budget)
+            digest = truncate_to_budget(response.content.strip(), budget)
+        except Exception as e:
+            # A failed digest degrades to a truncated report rather than failing the run
+            print(f"⚠️ Digest of {field} failed, truncating instead: {e}")
+            return truncate_to_budget(report, budget)
+        self.cache.put(key, digest)
+        return digest
+
+    async def adigest(self, field, report, budget):
+        key = self._key(report, budget)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached
+        try:
+            response = await self.llm.ainvoke(self._messages(field, report, budget), max_tokens=budget)
+            digest = truncate_to_budget(response.content.strip(), budget)
+        except Exception as e:
+            print(f"⚠️ Digest of {field} failed, truncating instead: {e}")
+            return truncate_to_budget(report, budget)
+        await asyncio.to_thread(self.cache.put, key, digest)
+        return digest
+
+    @staticmethod
+    def _collect(jobs, digests):
+        result = {}
+        for (field, budget), digest in zip(jobs, digests):
+            result.setdefault(str(budget), {})[field] = digest
+        return result
+
+    def digest_reports(self, state):
+        """
+        Digest every report at every configured budget, concurrently.
+
+        Returns:
+            dict: str(budget) -> {report field: digest}, for the state's report_digests.
+        """
+        jobs = self._jobs(state)
+        if not jobs:
+            return {}
+        digests = list(self.executor.map(lambda job: self.digest(job[0], state[job[0]], job[1]), jobs))
+        return self._collect(jobs, digests)
+
+    async def adigest_reports(self, state):
+        """Async counterpart of digest_reports."""
+        jobs = self._jobs(state)
+        digests = await asyncio.gather(*(self.adigest(field, state[field], budget) for field, budget in jobs))
+        return self._collect(jobs, digests)
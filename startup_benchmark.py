@@ -0,0 +1,87 @@
+# Startup-time benchmark.
+# Times how long a fresh interpreter takes to import the entry modules and to
+# build the workflow, and lists which heavy dependencies each step pulled in,
+# so a regression in import-time cost shows up as a number and a module name.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from rich.console import Console
+
+console = Console()
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Label -> statement timed in a fresh interpreter.
+TARGETS = {
+    "config": "import config",
+    "main": "import main",
+    "batch_runner": "import batch_runner",
+    "workflow": "import main; main.CompleteTradingWorkflow()",
+    "initialize+warm": "import bootstrap; bootstrap.initialize(warm=True)",
+}
+
+# Dependencies worth reporting when an import drags them in.
+HEAVY_MODULES = (
+    "langgraph", "langchain_openai", "openai", "langchain_community", "chromadb",
+    "yfinance", "stockstats", "finnhub", "pandas",
+)
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+exec({statement!r})
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(statement, runs=5):
+    """
+    Run `statement` in `runs` fresh interpreters.
+
+    Returns:
+        dict: Median and best wall time in seconds and the heavy modules loaded.
+    """
+    timings = []
+    loaded = []
+    probe = _PROBE.format(statement=statement, heavy=HEAVY_MODULES)
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "probe failed")
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        loaded = result["loaded"]
+    return {"median": statistics.median(timings), "best": min(timings), "loaded": loaded}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and initialization time of the workflow.")
+    parser.add_argument("targets", nargs="*", help=f"Steps to time: {', '.join(TARGETS)} (default: all)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per step")
+    args = parser.parse_args()
+    unknown = [label for label in args.targets if label not in TARGETS]
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(unknown)}")
+
+    for label in args.targets or TARGETS:
+        try:
+            result = measure(TARGETS[label], runs=args.runs)
+        except RuntimeError as e:
+            console.print(f"[red]❌ {label}: {e}[/red]")
+            continue
+        loaded = ", ".join(result["loaded"]) or "-"
+        console.print(
+            f"[bold]{label:<16}[/bold] median {result['median'] * 1000:7.0f} ms"
+            f"   best {result['best'] * 1000:7.0f} ms   heavy: {loaded}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,7 @@ from rich.console import Console
 from rich.markdown import Markdown
 import json
 from typing import Dict, List, Any, Optional
-from dotenv import load_dotenv
-
-load_dotenv()
-
-# LangSmith configuration
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-# os.environ["LANGCHAIN_PROJECT"] = "complete-trading-workflow"
+from bootstrap import load_env, enable_tracing
 
 console = Console()
 
@@ -26,6 +20,11 @@ class LangSmithStreamingWrapper:
         Args:
             workflow_instance: Any class instance that has a compiled LangGraph (.graph attribute)
         """
+        # LangSmith configuration: tracing is switched on when a wrapper is created,
+        # not when this module is imported
+        load_env()
+        enable_tracing()
+        # enable_tracing(project="complete-trading-workflow")
         self.workflow = workflow_instance
         self.execution_stats = {}
         self.session_id = None
@@ -60,6 +59,12 @@ class LangSmithStreamingWrapper:
         
         self.session_id = config.get("configurable", {}).get("session_id", "unknown")
         
+        # A checkpointed workflow needs the run's thread, and may resume it
+        if getattr(self.workflow, "checkpointer", None) is not None:
+            run_config = self.workflow.run_config(initial_state["company_of_interest"], initial_state["trade_date"])
+            config.setdefault("configurable", {}).setdefault("thread_id", run_config["configurable"]["thread_id"])
+            initial_state = self.workflow.graph_input(initial_state, config)
+        
         console.print("[bold blue]Starting LangSmith Streaming Execution[/bold blue]")
         console.print(f"[cyan]Session ID:[/cyan] {self.session_id}")
         console.print("=" * 80)
@@ -73,7 +78,12 @@ class LangSmithStreamingWrapper:
         try:
             workflow_start_time = time.time()
             
-            for chunk in self.workflow.graph.stream(initial_state, config=config):
+            # Nodes return state deltas, so the full state comes from the "values" stream
+            for mode, chunk in self.workflow.graph.stream(initial_state, config=config, stream_mode=["updates", "values"]):
+                if mode == "values":
+                    final_state = chunk
+                    continue
+                
                 # Extract node information
                 node_name = list(chunk.keys())[0]
                 node_start_time = time.time()
@@ -84,7 +94,6 @@ class LangSmithStreamingWrapper:
                 
                 # Track execution
                 node_execution_order.append(node_name)
-                final_state = chunk[node_name]
                 
                 # Calculate timing
                 node_end_time = time.time()
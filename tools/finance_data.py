@@ -1,6 +1,6 @@
-import yfinance as yf
 from langchain_core.tools import tool
 from typing import Annotated
+from .price_cache import price_store
 
 @tool
 def get_yfinance_data(
@@ -10,10 +10,10 @@ def get_yfinance_data(
 ) -> str:
     """Retrieve the stock price data for a given ticker symbol from Yahoo Finance."""
     try:
-        ticker = yf.Ticker(symbol.upper())
-        data = ticker.history(start=start_date, end=end_date)
+        # Served from the local price store; only uncached bars hit Yahoo.
+        data = price_store.get_history(symbol.upper(), start_date, end_date)
         if data.empty:
             return f"No data found for symbol '{symbol}' between {start_date} and {end_date}"
         return data.to_csv()
     except Exception as e:
-        return f"Error fetching Yahoo Finance data: {e}"
\ No newline at end of file
+        return f"Error fetching Yahoo Finance data: {e}"
@@ -1,13 +1,19 @@
-import finnhub
 from langchain_core.tools import tool
 import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rate_limiter import governor
+from bootstrap import load_env
 
 @tool
 def get_finnhub_news(ticker: str, start_date: str, end_date: str) -> str:
     """Get company news from Finnhub within a date range."""
     try:
+        import finnhub
+        load_env()
         finnhub_client = finnhub.Client(api_key=os.environ["FINNHUB_API_KEY"])
-        news_list = finnhub_client.company_news(ticker, _from=start_date, to=end_date)
+        with governor.acquire("finnhub"):
+            news_list = finnhub_client.company_news(ticker, _from=start_date, to=end_date)
         news_items = []
         for news in news_list[:5]: # Limit to 5 results
             news_items.append(f"Headline: {news['headline']}\nSummary: {news['summary']}")
@@ -1,12 +1,17 @@
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_core.tools import tool
-from dotenv import load_dotenv
-load_dotenv()
-# Initialize the Tavily search tool once. We can reuse this instance for multiple specialized tools.
-tavily_tool = TavilySearchResults(max_results=3)
-
-@tool
-def get_fundamental_analysis(ticker: str, trade_date: str) -> str:
+from langchain_core.tools import StructuredTool
+from .search_cache import search_client, search_ttl
+
+def _fundamentals_query(ticker, trade_date):
+    return f"fundamental analysis and key financial metrics for {ticker} stock published around {trade_date}"
+
+def fundamental_analysis(ticker: str, trade_date: str) -> str:
     """Performs a live web search for recent fundamental analysis of a stock."""
-    query = f"fundamental analysis and key financial metrics for {ticker} stock published around {trade_date}"
-    return tavily_tool.invoke({"query": query})
\ No newline at end of file
+    return search_client.search(_fundamentals_query(ticker, trade_date), trade_date, ttl=search_ttl("fundamentals"))
+
+async def afundamental_analysis(ticker: str, trade_date: str) -> str:
+    """Performs a live web search for recent fundamental analysis of a stock."""
+    return await search_client.asearch(_fundamentals_query(ticker, trade_date), trade_date, ttl=search_ttl("fundamentals"))
+
+get_fundamental_analysis = StructuredTool.from_function(
+    func=fundamental_analysis, coroutine=afundamental_analysis, name="get_fundamental_analysis"
+)
@@ -1,7 +1,9 @@
-from stockstats import wrap as stockstats_wrap
 from langchain_core.tools import tool
 from typing import Annotated
-import yfinance as yf
+import datetime
+from .price_cache import price_store
+from .indicators import indicator_frame, warmup_calendar_days
+from .indicator_state import indicator_states
 
 @tool
 def get_technical_indicators(
@@ -12,11 +14,23 @@ def get_technical_indicators(
 ) -> str:
     """Retrieve key technical indicators for a stock. Requires at least 90 days of historical data between start_date and end_date to calculate meaningful indicators like RSI, MACD, and moving averages."""
     try:
-        df = yf.download(symbol, start=start_date, end=end_date, progress=False)
-        if df.empty:
+        # Fold any new bars into the persisted per-ticker state; only requests
+        # older than that state fall back to a full vectorized computation.
+        state = indicator_states.advance(symbol.upper(), end_date)
+        if state is not None:
+            indicators = state.frame()
+        else:
+            # Load only the warmup window the indicators need in front of the
+            # reported rows, served from the local price store.
+            end = datetime.date.fromisoformat(end_date)
+            warmup_start = end - datetime.timedelta(days=warmup_calendar_days(5))
+            df = price_store.get_history(symbol.upper(), warmup_start.isoformat(), end_date)
+            if df.empty:
+                return "No data to calculate indicators."
+            indicators = indicator_frame(df, rows=5)
+        indicators = indicators[indicators.index >= start_date]
+        if indicators.empty:
             return "No data to calculate indicators."
-        stock_df = stockstats_wrap(df)
-        indicators = stock_df[['macd', 'rsi_14', 'boll', 'boll_ub', 'boll_lb', 'close_50_sma', 'close_200_sma']]
-        return indicators.tail().to_csv()
+        return indicators.to_csv()
     except Exception as e:
-        return f"Error calculating stockstats indicators: {e}"
\ No newline at end of file
+        return f"Error calculating technical indicators: {e}"
@@ -0,0 +1,311 @@
+# Incremental indicator state for get_technical_indicators.
+# Instead of recomputing the 200-day SMA and the EMAs from scratch every call,
+# each ticker keeps its running EMA numerators, Wilder RSI averages and rolling
+# window sums on disk, and every newly arrived bar is folded in with O(1) work.
+import datetime
+import json
+import math
+import os
+import sys
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .indicators import (
+    BOLL_K,
+    BOLL_WINDOW,
+    INDICATOR_COLUMNS,
+    MACD_FAST,
+    MACD_SLOW,
+    RSI_WINDOW,
+    SMA_WINDOWS,
+    close_panel,
+    compute_panel,
+    ewma_totals,
+    warmup_calendar_days,
+)
+from .price_cache import price_store
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+
+WINDOWS = (BOLL_WINDOW,) + SMA_WINDOWS
+EMA_SPANS = (MACD_FAST, MACD_SLOW)
+
+
+class IndicatorState:
+    """Running MACD, RSI-14, Bollinger and SMA state for a single ticker."""
+
+    def __init__(self, symbol, keep_rows=5):
+        self.symbol = symbol.upper()
+        self.keep_rows = keep_rows
+        self.last_date = None
+        self.prev_close = None
+        self.last_close = None
+        # True while the last bar is still forming and may be revised in place.
+        self.provisional = False
+        # Adjusted EWMAs are ratios of two linear recurrences, kept as
+        # [numerator, denominator] so they match the vectorized engine exactly.
+        self.ema = {span: [0.0, 0.0] for span in EMA_SPANS}
+        # Wilder RSI: [gain numerator, loss numerator, shared denominator].
+        self.rsi = [0.0, 0.0, 0.0]
+        # One extra close so the value leaving the longest window is known.
+        self.closes = deque(maxlen=max(WINDOWS) + 1)
+        self.sums = {window: [0.0, 0.0] for window in WINDOWS}
+        self.rows = deque(maxlen=keep_rows)
+
+    # ------------------------------------------------------------ updates
+    def append(self, date, close):
+        """Fold in the bar that follows `last_date`."""
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"Bar {date} does not follow {self.last_date} for {self.symbol}")
+        for span, acc in self.ema.items():
+            decay = 1.0 - 2.0 / (span + 1)
+            acc[0] = decay * acc[0] + close
+            acc[1] = decay * acc[1] + 1.0
+        if self.last_close is not None:
+            change = close - self.last_close
+            decay = 1.0 - 1.0 / RSI_WINDOW
+            self.rsi = [
+                decay * self.rsi[0] + max(change, 0.0),
+                decay * self.rsi[1] + max(-change, 0.0),
+                decay * self.rsi[2] + 1.0,
+            ]
+        for window, acc in self.sums.items():
+            if len(self.closes) >= window:
+                leaving = self.closes[-window]
+                acc[0] -= leaving
+                acc[1] -= leaving * leaving
+            acc[0] += close
+            acc[1] += close * close
+        self.closes.append(close)
+        self.prev_close, self.last_close = self.last_close, close
+        self.last_date = date
+        self.rows.append((date, self.values()))
+
+    def revise(self, close):
+        """Replace the close of the last bar, e.g. when an intraday bar updates."""
+        delta = close - self.last_close
+        for acc in self.ema.values():
+            acc[0] += delta
+        if self.prev_close is not None:
+            old_change = self.last_close - self.prev_close
+            new_change = close - self.prev_close
+            self.rsi[0] += max(new_change, 0.0) - max(old_change, 0.0)
+            self.rsi[1] += max(-new_change, 0.0) - max(-old_change, 0.0)
+        for acc in self.sums.values():
+            acc[0] += delta
+            acc[1] += close * close - self.last_close * self.last_close
+        self.closes[-1] = close
+        self.last_close = close
+        self.rows[-1] = (self.last_date, self.values())
+
+    # ------------------------------------------------------------- outputs
+    def values(self):
+        """Current indicator values, NaN where the warmup is not complete."""
+        ema = {span: acc[0] / acc[1] for span, acc in self.ema.items()}
+        gain, loss, weight = self.rsi
+        if weight == 0.0:
+            rsi = math.nan
+        elif gain + loss > 0.0:
+            rsi = 100.0 * gain / (gain + loss)
+        else:
+            rsi = 50.0
+        means = {}
+        for window, (total, _) in self.sums.items():
+            means[window] = total / window if len(self.closes) >= window else math.nan
+        boll = means[BOLL_WINDOW]
+        if math.isnan(boll):
+            band = math.nan
+        else:
+            total, squares = self.sums[BOLL_WINDOW]
+            variance = max(squares - total * total / BOLL_WINDOW, 0.0) / (BOLL_WINDOW - 1)
+            band = BOLL_K * math.sqrt(variance)
+        values = {
+            "macd": ema[MACD_FAST] - ema[MACD_SLOW],
+            "rsi_14": rsi,
+            "boll": boll,
+            "boll_ub": boll + band,
+            "boll_lb": boll - band,
+        }
+        for window in SMA_WINDOWS:
+            values[f"close_{window}_sma"] = means[window]
+        return values
+
+    def frame(self):
+        """The retained indicator rows as a DataFrame indexed by 'Date'."""
+        index = pd.DatetimeIndex([date for date, _ in self.rows], name="Date")
+        return pd.DataFrame([values for _, values in self.rows], index=index, columns=INDICATOR_COLUMNS)
+
+    # --------------------------------------------------------- persistence
+    def to_dict(self):
+        return {
+            "symbol": self.symbol,
+            "keep_rows": self.keep_rows,
+            "last_date": self.last_date,
+            "prev_close": self.prev_close,
+            "last_close": self.last_close,
+            "provisional": self.provisional,
+            "ema": {str(span): acc for span, acc in self.ema.items()},
+            "rsi": self.rsi,
+            "closes": list(self.closes),
+            "rows": [[date, values] for date, values in self.rows],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data["symbol"], keep_rows=data["keep_rows"])
+        state.last_date = data["last_date"]
+        state.prev_close = data["prev_close"]
+        state.last_close = data["last_close"]
+        state.provisional = data.get("provisional", False)
+        state.ema = {int(span): list(acc) for span, acc in data["ema"].items()}
+        state.rsi = list(data["rsi"])
+        state.closes.extend(data["closes"])
+        state.rows.extend((date, values) for date, values in data["rows"])
+        # Window sums are rebuilt exactly from the retained closes on load,
+        # which also discards any floating-point drift from long sessions.
+        state.rebuild_sums()
+        return state
+
+    def rebuild_sums(self):
+        """Recompute the rolling window sums from the retained closes."""
+        closes = list(self.closes)
+        for window, acc in self.sums.items():
+            tail = closes[-window:] if len(closes) >= window else closes
+            acc[0] = math.fsum(tail)
+            acc[1] = math.fsum(value * value for value in tail)
+
+
+class IndicatorStateStore:
+    """Persists one IndicatorState per ticker and advances it from the price store."""
+
+    def __init__(self, cache_dir, prices, keep_rows=5):
+        self.root = os.path.join(cache_dir, "indicator_state")
+        self.prices = prices
+        self.keep_rows = keep_rows
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, symbol):
+        return os.path.join(self.root, f"{symbol.upper()}.json")
+
+    def _lock(self, symbol):
+        with self._locks_guard:
+            return self._locks.setdefault(symbol.upper(), threading.Lock())
+
+    def load(self, symbol):
+        try:
+            with open(self._path(symbol)) as f:
+                return IndicatorState.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, state):
+        os.makedirs(self.root, exist_ok=True)
+        target = self._path(state.symbol)
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state.to_dict(), f)
+        os.replace(tmp, target)
+
+    def _seed(self, symbol, end_date):
+        """Build a fresh state by streaming the warmup window ending before end_date."""
+        end = datetime.date.fromisoformat(end_date)
+        start = end - datetime.timedelta(days=warmup_calendar_days(self.keep_rows))
+        bars = self.prices.get_history(symbol, start.isoformat(), end_date)
+        if bars.empty:
+            return None
+        state = IndicatorState(symbol, keep_rows=self.keep_rows)
+        for date, close in zip(bars.index, bars["Close"]):
+            state.append(date.date().isoformat(), float(close))
+        return state
+
+    def seed_many(self, frames):
+        """
+        Seed fresh states for a universe in one vectorized pass.
+
+        Args:
+            frames: Ticker -> OHLCV frame ending before the trade date, e.g. from
+                price_store.get_many. Tickers that already have a state are
+                skipped; `advance` brings those up to date.
+
+        Returns:
+            int: Number of states seeded.
+        """
+        frames = {symbol.upper(): frame for symbol, frame in frames.items() if self.load(symbol) is None}
+        windows, panel = close_panel(frames, self.keep_rows)
+        if not windows:
+            return 0
+        rows = compute_panel(frames, self.keep_rows)
+        # The running accumulators are the last step of the same recurrences
+        # the engine evaluates, so the seeded state matches one built bar by bar.
+        valid = ~np.isnan(panel)
+        ema = {span: ewma_totals(panel, 2.0 / (span + 1), valid) for span in EMA_SPANS}
+        change = np.diff(panel, axis=-1, prepend=np.nan)
+        change_valid = ~np.isnan(change)
+        gain, weight = ewma_totals(np.maximum(change, 0.0), 1.0 / RSI_WINDOW, change_valid)
+        loss, _ = ewma_totals(np.maximum(-change, 0.0), 1.0 / RSI_WINDOW, change_valid)
+        today = datetime.date.today().isoformat()
+        seeded = 0
+        for i, (symbol, window) in enumerate(windows.items()):
+            closes = window["Close"].to_numpy(dtype="float64")
+            state = IndicatorState(symbol, keep_rows=self.keep_rows)
+            state.last_date = window.index[-1].date().isoformat()
+            state.last_close = float(closes[-1])
+            state.prev_close = float(closes[-2]) if len(closes) > 1 else None
+            state.provisional = state.last_date >= today
+            state.ema = {span: [float(numerator[i]), float(denominator[i])] for span, (numerator, denominator) in ema.items()}
+            state.rsi = [float(gain[i]), float(loss[i]), float(weight[i])]
+            state.closes.extend(float(close) for close in closes[-state.closes.maxlen:])
+            state.rebuild_sums()
+            state.rows.extend(
+                (date.date().isoformat(), {name: float(value) for name, value in values.items()})
+                for date, values in zip(rows[symbol].index, rows[symbol].to_dict("records"))
+            )
+            with self._lock(symbol):
+                # Another caller may have seeded it meanwhile
+                if self.load(symbol) is None:
+                    self.save(state)
+                    seeded += 1
+        return seeded
+
+    def advance(self, symbol, end_date):
+        """
+        Bring a ticker's state up to the last bar before end_date.
+
+        Returns None when end_date lies before the persisted state (a
+        point-in-time request the state cannot rewind to), in which case the
+        caller should fall back to the vectorized engine.
+        """
+        with self._lock(symbol):
+            state = self.load(symbol)
+            if state is not None and state.last_date >= end_date:
+                return None
+            if state is not None:
+                bars = self.prices.get_history(symbol, state.last_date, end_date)
+                if bars.empty or bars.index[0].date().isoformat() != state.last_date:
+                    state = None
+                else:
+                    close = float(bars["Close"].iloc[0])
+                    if close != state.last_close:
+                        if state.provisional:
+                            state.revise(close)
+                        else:
+                            # A finished bar changed: the history was re-adjusted.
+                            state = None
+                    if state is not None:
+                        for date, close in zip(bars.index[1:], bars["Close"].iloc[1:]):
+                            state.append(date.date().isoformat(), float(close))
+            if state is None:
+                state = self._seed(symbol, end_date)
+                if state is None:
+                    return None
+            state.provisional = state.last_date >= datetime.date.today().isoformat()
+            self.save(state)
+            return state
+
+
+indicator_states = IndicatorStateStore(config["data_cache_dir"], price_store)
@@ -0,0 +1,185 @@
+# Vectorized NumPy indicator engine behind get_technical_indicators.
+# Every indicator is built from two kernels: a cumulative-sum rolling window and
+# a blocked linear recurrence for the exponentially weighted averages. Both work
+# on a single close series or on a (tickers x bars) panel in one pass.
+import numpy as np
+import pandas as pd
+
+INDICATOR_COLUMNS = ["macd", "rsi_14", "boll", "boll_ub", "boll_lb", "close_50_sma", "close_200_sma"]
+
+MACD_FAST = 12
+MACD_SLOW = 26
+RSI_WINDOW = 14
+BOLL_WINDOW = 20
+BOLL_K = 2.0
+SMA_WINDOWS = (50, 200)
+
+# History needed in front of the first reported row: the 200-day SMA needs 199
+# prior bars, and after 250 bars the weight the slow EMA has not yet seen is
+# below (25/27)**250 < 1e-8, so older bars cannot change the output.
+WARMUP_BARS = 250
+
+
+def warmup_calendar_days(rows):
+    """Calendar days to load so that `rows` reported bars are fully warmed up."""
+    # ~252 trading days per 365 calendar days, plus slack for holidays.
+    return int((rows + WARMUP_BARS) * 365 / 252) + 10
+
+
+def _linear_recurrence(x, decay):
+    """
+    Compute s[t] = decay * s[t-1] + x[t] along the last axis with s[-1] = 0.
+
+    Inside a block the recurrence has the closed form
+    s[t] = decay**(t+1) * carry + decay**t * cumsum(x[j] * decay**-j), which is
+    evaluated with NumPy; blocks are short enough that decay**-j stays well
+    inside float64 range.
+    """
+    out = np.empty_like(x)
+    block = max(1, int(30.0 / -np.log(decay)))
+    carry = np.zeros(x.shape[:-1])
+    n = x.shape[-1]
+    for lo in range(0, n, block):
+        hi = min(lo + block, n)
+        steps = np.arange(hi - lo)
+        partial = np.cumsum(x[..., lo:hi] * decay ** -steps, axis=-1) * decay ** steps
+        out[..., lo:hi] = partial + carry[..., None] * decay ** (steps + 1)
+        carry = out[..., hi - 1]
+    return out
+
+
+def ewma(x, alpha, valid):
+    """Exponentially weighted mean (pandas `adjust=True`), skipping invalid bars."""
+    decay = 1.0 - alpha
+    numerator = _linear_recurrence(np.where(valid, x, 0.0), decay)
+    denominator = _linear_recurrence(valid.astype("float64"), decay)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+def _window_sums(x, window):
+    """Trailing `window` sums along the last axis via a cumulative sum."""
+    padded = np.concatenate([np.zeros(x.shape[:-1] + (1,)), np.cumsum(x, axis=-1)], axis=-1)
+    sums = np.full(x.shape, np.nan)
+    if x.shape[-1] >= window:
+        sums[..., window - 1:] = padded[..., window:] - padded[..., :-window]
+    return sums
+
+
+def ewma_totals(x, alpha, valid):
+    """Final numerator and denominator of `ewma` along the last axis, for an incremental update to continue from."""
+    decay = 1.0 - alpha
+    numerator = _linear_recurrence(np.where(valid, x, 0.0), decay)
+    denominator = _linear_recurrence(valid.astype("float64"), decay)
+    return numerator[..., -1], denominator[..., -1]
+
+
+def rolling_mean(x, window, valid):
+    """Simple moving average; NaN until `window` valid bars are available."""
+    count = _window_sums(valid.astype("float64"), window)
+    total = _window_sums(np.where(valid, x, 0.0), window)
+    return np.where(count == window, total / window, np.nan)
+
+
+def rolling_std(x, window, valid):
+    """Sample (ddof=1) moving standard deviation from cumulative sums."""
+    # Centre each series first so the sum-of-squares identity stays accurate.
+    with np.errstate(invalid="ignore"):
+        reference = np.nanmean(np.where(valid, x, np.nan), axis=-1, keepdims=True)
+    centred = np.where(valid, x - np.nan_to_num(reference), 0.0)
+    count = _window_sums(valid.astype("float64"), window)
+    total = _window_sums(centred, window)
+    squares = _window_sums(centred * centred, window)
+    variance = np.maximum(squares - total * total / window, 0.0) / (window - 1)
+    return np.where(count == window, np.sqrt(variance), np.nan)
+
+
+def compute_indicators(close):
+    """
+    Compute every indicator in INDICATOR_COLUMNS for a close series or panel.
+
+    Args:
+        close: 1-D array of closes, or a 2-D (tickers x bars) array where each
+            row is left-padded with NaN up to the longest series.
+
+    Returns:
+        dict: Indicator name -> array with the same shape as `close`.
+    """
+    close = np.asarray(close, dtype="float64")
+    valid = ~np.isnan(close)
+
+    macd = ewma(close, 2.0 / (MACD_FAST + 1), valid) - ewma(close, 2.0 / (MACD_SLOW + 1), valid)
+
+    # RSI uses Wilder's smoothing (alpha = 1/14) of gains and losses.
+    change = np.diff(close, axis=-1, prepend=np.nan)
+    change_valid = ~np.isnan(change)
+    gains = np.where(change_valid, np.maximum(change, 0.0), 0.0)
+    losses = np.where(change_valid, np.maximum(-change, 0.0), 0.0)
+    avg_gain = ewma(gains, 1.0 / RSI_WINDOW, change_valid)
+    avg_loss = ewma(losses, 1.0 / RSI_WINDOW, change_valid)
+    movement = avg_gain + avg_loss
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = np.where(movement > 0, 100.0 * avg_gain / movement, 50.0)
+    rsi = np.where(np.isnan(movement), np.nan, rsi)
+
+    boll = rolling_mean(close, BOLL_WINDOW, valid)
+    band = BOLL_K * rolling_std(close, BOLL_WINDOW, valid)
+
+    indicators = {
+        "macd": macd,
+        "rsi_14": rsi,
+        "boll": boll,
+        "boll_ub": boll + band,
+        "boll_lb": boll - band,
+    }
+    for window in SMA_WINDOWS:
+        indicators[f"close_{window}_sma"] = rolling_mean(close, window, valid)
+    return indicators
+
+
+def indicator_frame(prices, rows=5):
+    """Return the last `rows` indicator rows for an OHLCV frame with a 'Close' column."""
+    window = prices.iloc[-(rows + WARMUP_BARS):]
+    values = compute_indicators(window["Close"].to_numpy(dtype="float64"))
+    frame = pd.DataFrame({name: values[name] for name in INDICATOR_COLUMNS}, index=window.index)
+    return frame.iloc[-rows:]
+
+
+def close_panel(frames, rows=5):
+    """
+    Stack the warmup windows of many tickers into one close panel.
+
+    Returns:
+        tuple: (ticker -> window frame, (tickers x bars) close array). Series
+        are right-aligned by bar so each row ends on its own last bar.
+    """
+    windows = {ticker: frame.iloc[-(rows + WARMUP_BARS):] for ticker, frame in frames.items() if len(frame)}
+    length = max((len(frame) for frame in windows.values()), default=0)
+    panel = np.full((len(windows), length), np.nan)
+    for i, frame in enumerate(windows.values()):
+        panel[i, length - len(frame):] = frame["Close"].to_numpy(dtype="float64")
+    return windows, panel
+
+
+def compute_panel(frames, rows=5):
+    """
+    Compute indicators for many tickers at once.
+
+    Args:
+        frames: Mapping of ticker -> OHLCV frame with a 'Close' column.
+        rows: Number of trailing rows to return per ticker.
+
+    Returns:
+        dict: Ticker -> indicator frame, as produced by `indicator_frame`.
+    """
+    windows, panel = close_panel(frames, rows)
+    if not windows:
+        return {}
+    length = panel.shape[1]
+    values = compute_indicators(panel)
+    results = {}
+    for i, (ticker, frame) in enumerate(windows.items()):
+        n = len(frame)
+        data = {name: values[name][i, length - n:] for name in INDICATOR_COLUMNS}
+        results[ticker] = pd.DataFrame(data, index=frame.index).iloc[-rows:]
+    return results
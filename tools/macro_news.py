@@ -1,14 +1,17 @@
+from langchain_core.tools import StructuredTool
+from .search_cache import search_client, search_ttl
 
+def _macro_query(trade_date):
+    return f"macroeconomic news and market trends affecting the stock market on {trade_date}"
 
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_core.tools import tool
-# Initialize the Tavily search tool once. We can reuse this instance for multiple specialized tools.
-from dotenv import load_dotenv
-load_dotenv()
-tavily_tool = TavilySearchResults(max_results=3)
+def macroeconomic_news(trade_date: str) -> str:
+    """Performs a live web search for macroeconomic news relevant to the stock market."""
+    return search_client.search(_macro_query(trade_date), trade_date, ttl=search_ttl("macro_news"))
 
-@tool
-def get_macroeconomic_news(trade_date: str) -> str:
+async def amacroeconomic_news(trade_date: str) -> str:
     """Performs a live web search for macroeconomic news relevant to the stock market."""
-    query = f"macroeconomic news and market trends affecting the stock market on {trade_date}"
-    return tavily_tool.invoke({"query": query})
\ No newline at end of file
+    return await search_client.asearch(_macro_query(trade_date), trade_date, ttl=search_ttl("macro_news"))
+
+get_macroeconomic_news = StructuredTool.from_function(
+    func=macroeconomic_news, coroutine=amacroeconomic_news, name="get_macroeconomic_news"
+)
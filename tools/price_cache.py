@@ -0,0 +1,356 @@
+# Local point-in-time OHLCV store shared by the price and indicator tools.
+# Every ticker gets its own partition directory under `data_cache_dir/prices`
+# holding one .npy file per column, so reads are memory-mapped and only the
+# bars after the last cached date are ever requested from Yahoo Finance.
+# A write never touches the files readers see: it builds a new generation
+# directory and swaps the CURRENT pointer to it, so a reader in any thread or
+# process always gets the columns and metadata of one complete generation.
+import datetime
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+from rate_limiter import governor
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+DATE_FILE = "Date.npy"
+META_FILE = "meta.json"
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "gen-"
+
+# Times a read follows the CURRENT pointer again when a writer pruned the
+# generation it was reading.
+READ_ATTEMPTS = 3
+
+# Relative difference on the overlapping bar that signals Yahoo has re-adjusted
+# the history (dividend or split), in which case the partition is refetched.
+ADJUSTMENT_TOLERANCE = 1e-6
+
+
+def _to_day(value):
+    """Convert a yyyy-mm-dd string, date or timestamp into a numpy day."""
+    if value is None:
+        return None
+    return np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+def _day_str(day):
+    return str(np.datetime64(day, "D"))
+
+
+def _empty_frame():
+    frame = pd.DataFrame({column: pd.Series(dtype="float64") for column in PRICE_COLUMNS})
+    frame.index = pd.DatetimeIndex([], name="Date")
+    return frame
+
+
+def _normalize_history(data):
+    """Reduce a yfinance frame to tz-naive daily OHLCV with a 'Date' index."""
+    if data is None or data.empty:
+        return _empty_frame()
+    if isinstance(data.columns, pd.MultiIndex):
+        # yf.download returns (Price, Ticker) columns even for a single symbol.
+        data = data.droplevel(-1, axis=1)
+    index = pd.DatetimeIndex(data.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    frame = data[PRICE_COLUMNS].astype("float64").copy()
+    frame.index = index.normalize().rename("Date")
+    frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+    return frame.dropna(subset=["Close"])
+
+
+class PriceStore:
+    """Columnar, memory-mapped OHLCV cache with incremental Yahoo refreshes."""
+
+    def __init__(self, cache_dir, online=True):
+        self.root = os.path.join(cache_dir, "prices")
+        self.online = online
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    # ------------------------------------------------------------------ paths
+    def _partition(self, symbol):
+        return os.path.join(self.root, symbol.upper())
+
+    def _lock(self, symbol):
+        with self._locks_guard:
+            return self._locks.setdefault(symbol.upper(), threading.Lock())
+
+    # ------------------------------------------------------------- disk I/O
+    def _generation(self, symbol):
+        """Directory of the symbol's current generation, or None if not cached."""
+        partition = self._partition(symbol)
+        try:
+            with open(os.path.join(partition, CURRENT_FILE)) as f:
+                return os.path.join(partition, f.read().strip())
+        except OSError:
+            # Partitions written before generations existed keep their files at the top level
+            return partition if os.path.exists(os.path.join(partition, META_FILE)) else None
+
+    def read_meta(self, symbol):
+        """Return the partition metadata for a symbol, or None if not cached."""
+        for _ in range(READ_ATTEMPTS):
+            generation = self._generation(symbol)
+            if generation is None:
+                return None
+            try:
+                with open(os.path.join(generation, META_FILE)) as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError):
+                return None
+        return None
+
+    def _read_generation(self, generation, start, end):
+        """Memory-map one generation and slice it to [start, end)."""
+        with open(os.path.join(generation, META_FILE)) as f:
+            meta = json.load(f)
+        if not meta.get("rows"):
+            return _empty_frame()
+        rows = meta["rows"]
+        dates = np.load(os.path.join(generation, DATE_FILE), mmap_mode="r")[:rows]
+        lo = 0 if start is None else int(np.searchsorted(dates, _to_day(start), side="left"))
+        hi = rows if end is None else int(np.searchsorted(dates, _to_day(end), side="left"))
+        columns = {
+            column: np.array(np.load(os.path.join(generation, f"{column}.npy"), mmap_mode="r")[lo:hi])
+            for column in PRICE_COLUMNS
+        }
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(np.array(dates[lo:hi]), name="Date"))
+
+    def _load_partition(self, symbol, start=None, end=None):
+        """Read the current generation of a partition, sliced to [start, end)."""
+        for attempt in range(READ_ATTEMPTS):
+            generation = self._generation(symbol)
+            if generation is None:
+                return _empty_frame()
+            try:
+                return self._read_generation(generation, start, end)
+            except FileNotFoundError:
+                # A writer pruned this generation after we followed the pointer
+                if attempt == READ_ATTEMPTS - 1:
+                    raise
+
+    def _write_partition(self, symbol, frame, meta):
+        """Write a new generation of the partition and swap the CURRENT pointer to it."""
+        partition = self._partition(symbol)
+        previous = self._generation(symbol)
+        name = f"{GENERATION_PREFIX}{time.time_ns():020d}-{os.getpid()}-{threading.get_ident()}"
+        generation = os.path.join(partition, name)
+        os.makedirs(generation)
+        arrays = {DATE_FILE: frame.index.values.astype("datetime64[D]")}
+        for column in PRICE_COLUMNS:
+            arrays[f"{column}.npy"] = frame[column].to_numpy(dtype="float64")
+        for filename, array in arrays.items():
+            with open(os.path.join(generation, filename), "wb") as f:
+                np.save(f, array)
+        meta = dict(meta, symbol=symbol.upper(), rows=len(frame))
+        if len(frame):
+            meta["first_date"] = _day_str(arrays[DATE_FILE][0])
+            meta["last_date"] = _day_str(arrays[DATE_FILE][-1])
+        with open(os.path.join(generation, META_FILE), "w") as f:
+            json.dump(meta, f, indent=2)
+        # The generation is complete before anyone can see it; the rename publishes it
+        target = os.path.join(partition, CURRENT_FILE)
+        tmp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(name)
+        os.replace(tmp, target)
+        self._prune(partition, previous)
+
+    def _prune(self, partition, previous):
+        """Remove generations older than the one just replaced."""
+        # The replaced generation stays for readers that followed the old
+        # pointer; newer ones may belong to another process about to publish.
+        # Top-level files of the old layout go at once: a reader that loses
+        # them follows the new pointer instead.
+        if previous == partition:
+            for filename in [DATE_FILE, META_FILE] + [f"{column}.npy" for column in PRICE_COLUMNS]:
+                try:
+                    os.remove(os.path.join(partition, filename))
+                except OSError:
+                    pass
+            return
+        keep_from = os.path.basename(previous) if previous else ""
+        for entry in os.listdir(partition):
+            if entry.startswith(GENERATION_PREFIX) and entry < keep_from:
+                shutil.rmtree(os.path.join(partition, entry), ignore_errors=True)
+
+    # -------------------------------------------------------------- network
+    def _fetch(self, symbol, start, end):
+        """Download daily bars for [start, end) from Yahoo Finance."""
+        import yfinance as yf  # imported on first download; cached reads never need it
+        with governor.acquire("yahoo"):
+            data = yf.Ticker(symbol.upper()).history(
+                start=_day_str(start), end=_day_str(end), auto_adjust=True
+            )
+        return _normalize_history(data)
+
+    def _missing_ranges(self, meta, start, end):
+        """Return the [start, end) day ranges that must be downloaded."""
+        if not meta.get("fetched_from"):
+            return [(start, end)]
+        covered_from = _to_day(meta["fetched_from"])
+        covered_to = _to_day(meta["fetched_through"])
+        ranges = []
+        if start < covered_from:
+            ranges.append((start, covered_from))
+        if end > covered_to:
+            # Refetch from the last cached bar so a partial or re-adjusted bar
+            # is replaced and can be compared against the cached copy.
+            last = _to_day(meta.get("last_date") or meta["fetched_through"])
+            ranges.append((min(last, covered_to), end))
+        return ranges
+
+    def _merge(self, symbol, meta, fetched, start, end):
+        """Fold bars fetched for [start, end) into the partition and persist it."""
+        today = np.datetime64(datetime.date.today(), "D")
+        cached = self._load_partition(symbol)
+        if len(cached) and len(fetched):
+            overlap = cached.index.intersection(fetched.index)
+            # Only bars that closed before today are final; a forming bar is
+            # allowed to change without invalidating the partition.
+            overlap = overlap[overlap < pd.Timestamp(today)]
+            if len(overlap):
+                old = cached.loc[overlap, "Close"].to_numpy()
+                new = fetched.loc[overlap, "Close"].to_numpy()
+                if not np.allclose(old, new, rtol=ADJUSTMENT_TOLERANCE, atol=0.0):
+                    # Yahoo re-adjusted the series (dividend or split), so the
+                    # cached history is stale: rebuild the whole partition.
+                    start = min(start, _to_day(meta["fetched_from"]))
+                    end = max(end, _to_day(meta["fetched_through"]))
+                    cached = _empty_frame()
+                    fetched = self._fetch(symbol, start, end)
+                    meta = {}
+        merged = pd.concat([cached, fetched]) if len(cached) and len(fetched) else (fetched if len(fetched) else cached)
+        merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        # Coverage never extends past today because today's bar is still forming.
+        fetched_from = start
+        fetched_through = min(end, today)
+        if meta.get("fetched_from"):
+            fetched_from = min(fetched_from, _to_day(meta["fetched_from"]))
+            fetched_through = max(fetched_through, _to_day(meta["fetched_through"]))
+        self._write_partition(symbol, merged, {
+            "fetched_from": _day_str(fetched_from),
+            "fetched_through": _day_str(fetched_through),
+            "updated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        })
+        return self.read_meta(symbol) or {}
+
+    def _settles(self, meta, fetched, hi):
+        """Whether a fetch ending at `hi` may be recorded as coverage."""
+        # yfinance reports some failures as an empty frame, so an empty answer
+        # only counts when the range ends before bars we already hold: nothing
+        # traded there (a weekend or holiday start), and asking again won't help.
+        if len(fetched):
+            return True
+        return bool(meta.get("last_date")) and hi <= _to_day(meta["last_date"])
+
+    def _fetch_many(self, symbols, start, end):
+        """Download [start, end) for many symbols in one batched request."""
+        return bulk_download(symbols, _day_str(start), _day_str(end))
+
+    # ------------------------------------------------------------ public API
+    def get_history(self, symbol, start_date, end_date):
+        """
+        Return daily OHLCV bars for [start_date, end_date) as a DataFrame.
+
+        Bars already on disk are served from the memory-mapped partition. When
+        the store is online, only the ranges not yet covered are downloaded;
+        when offline, whatever is cached for the window is returned.
+        """
+        start, end = _to_day(start_date), _to_day(end_date)
+        if self.online:
+            with self._lock(symbol):
+                meta = self.read_meta(symbol) or {}
+                for lo, hi in self._missing_ranges(meta, start, end):
+                    fetched = self._fetch(symbol, lo, hi)
+                    if self._settles(meta, fetched, hi):
+                        meta = self._merge(symbol, meta, fetched, lo, hi)
+        return self._load_partition(symbol, start, end)
+
+    def prefetch(self, symbols, start_date, end_date, chunk_size=None):
+        """
+        Bring many tickers up to date with as few Yahoo round-trips as possible.
+
+        Tickers that need the same missing range are grouped and downloaded
+        together with `yf.download`, `chunk_size` symbols per request, then
+        split into their own partitions. Agents calling the price tools
+        afterwards are served entirely from disk.
+
+        Returns:
+            dict: Symbol -> number of bars stored for [start_date, end_date).
+        """
+        symbols = sorted({symbol.upper() for symbol in symbols})
+        start, end = _to_day(start_date), _to_day(end_date)
+        if self.online:
+            chunk_size = chunk_size or config.get("bulk_download_chunk", 100)
+            groups = {}
+            for symbol in symbols:
+                for lo, hi in self._missing_ranges(self.read_meta(symbol) or {}, start, end):
+                    groups.setdefault((lo, hi), []).append(symbol)
+            for (lo, hi), members in groups.items():
+                for i in range(0, len(members), chunk_size):
+                    batch = members[i:i + chunk_size]
+                    frames = self._fetch_many(batch, lo, hi)
+                    for symbol in batch:
+                        fetched = frames.get(symbol)
+                        if fetched is None:
+                            fetched = _empty_frame()
+                        with self._lock(symbol):
+                            # Re-read: another caller may have advanced it meanwhile.
+                            meta = self.read_meta(symbol) or {}
+                            if self._settles(meta, fetched, hi):
+                                self._merge(symbol, meta, fetched, lo, hi)
+        return {symbol: len(self._load_partition(symbol, start, end)) for symbol in symbols}
+
+    def get_many(self, symbols, start_date, end_date):
+        """Prefetch a universe in bulk and return symbol -> OHLCV frame."""
+        self.prefetch(symbols, start_date, end_date)
+        return {
+            symbol.upper(): self._load_partition(symbol, start_date, end_date)
+            for symbol in symbols
+        }
+
+
+def bulk_download(symbols, start_date, end_date):
+    """
+    Fetch daily bars for several tickers in a single `yf.download` call.
+
+    Returns:
+        dict: Symbol -> normalized OHLCV frame; symbols Yahoo returned no data
+        for map to an empty frame.
+    """
+    import yfinance as yf
+    symbols = [symbol.upper() for symbol in symbols]
+    with governor.acquire("yahoo"):
+        data = yf.download(
+            symbols,
+            start=start_date,
+            end=end_date,
+            group_by="ticker",
+            auto_adjust=True,
+            threads=True,
+            progress=False,
+        )
+    frames = {}
+    for symbol in symbols:
+        if isinstance(data.columns, pd.MultiIndex) and symbol in data.columns.get_level_values(0):
+            frames[symbol] = _normalize_history(data[symbol])
+        elif not isinstance(data.columns, pd.MultiIndex) and len(symbols) == 1:
+            frames[symbol] = _normalize_history(data)
+        else:
+            frames[symbol] = _empty_frame()
+    return frames
+
+
+price_store = PriceStore(config["data_cache_dir"], online=config["online_tools"])
@@ -0,0 +1,148 @@
+# Shared Tavily search client with a persistent, TTL-based result cache.
+# The fundamentals, macro news and social sentiment tools all go through this
+# single client, so identical queries issued by several agents (or by several
+# runs) are answered from SQLite instead of a live web search.
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import config
+from rate_limiter import governor
+from bootstrap import load_env
+
+
+def normalize_query(query):
+    """Case- and whitespace-insensitive form of a search query."""
+    return re.sub(r"\s+", " ", query.strip().lower())
+
+
+class CachedSearch:
+    """Lazily created TavilySearchResults client backed by a SQLite cache."""
+
+    def __init__(self, cache_path, online=True, max_results=3):
+        self.cache_path = cache_path
+        self.online = online
+        self.max_results = max_results
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._ready = False
+
+    def _connect(self):
+        # The cache file is created on first use, not when the tools are imported
+        if not self._ready:
+            with self._client_lock:
+                if not self._ready:
+                    os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+                    with sqlite3.connect(self.cache_path, timeout=30) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.execute(
+                            "CREATE TABLE IF NOT EXISTS search_cache ("
+                            " query TEXT NOT NULL, date TEXT NOT NULL, results TEXT NOT NULL,"
+                            " created_at REAL NOT NULL, PRIMARY KEY (query, date))"
+                        )
+                    self._ready = True
+        return sqlite3.connect(self.cache_path, timeout=30)
+
+    @property
+    def client(self):
+        # Built on first use so importing the tools never touches Tavily.
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from langchain_community.tools.tavily_search import TavilySearchResults
+                    load_env()
+                    self._client = TavilySearchResults(max_results=self.max_results)
+        return self._client
+
+    def _lookup(self, query, date):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT results, created_at FROM search_cache WHERE query = ? AND date = ?",
+                (query, date),
+            ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else (None, None)
+
+    def _store(self, query, date, results):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO search_cache (query, date, results, created_at) VALUES (?, ?, ?, ?)",
+                (query, date, json.dumps(results), time.time()),
+            )
+
+    def search(self, query, date, ttl):
+        """
+        Run a web search, reusing a cached answer younger than `ttl` seconds.
+
+        Sync and async implementations sit behind each search tool, so agents
+        awaited with ainvoke do not block the event loop on the web search.
+
+        Args:
+            query: The search query.
+            date: The trade date the query is about; part of the cache key.
+            ttl: Maximum age in seconds of a reusable cached result.
+
+        Returns:
+            The Tavily results (a list of {url, content} dicts), or an error string.
+        """
+        key = normalize_query(query)
+        cached, created_at = self._lookup(key, date)
+        answer = self._check(query, cached, created_at, ttl)
+        if answer is not None:
+            return answer
+        with governor.acquire("tavily"):
+            results = self.client.invoke({"query": query})
+        if isinstance(results, list):
+            self._store(key, date, results)
+        return self._settle(cached, results)
+
+    async def asearch(self, query, date, ttl):
+        """Async counterpart of `search`; the live request uses Tavily's async client."""
+        # The SQLite reads and writes can wait on other writers, so they run off the event loop
+        key = normalize_query(query)
+        cached, created_at = await asyncio.to_thread(self._lookup, key, date)
+        answer = self._check(query, cached, created_at, ttl)
+        if answer is not None:
+            return answer
+        async with governor.aacquire("tavily"):
+            results = await self.client.ainvoke({"query": query})
+        if isinstance(results, list):
+            await asyncio.to_thread(self._store, key, date, results)
+        return self._settle(cached, results)
+
+    def _check(self, query, cached, created_at, ttl):
+        """Return the answer when no live search is needed, else None."""
+        fresh = cached is not None and (not self.online or time.time() - created_at <= ttl)
+        if not fresh and not self.online:
+            return f"No cached search results for '{query}' (online tools are disabled)."
+        with self._stats_lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return cached if fresh else None
+
+    def _settle(self, cached, results):
+        # Failures come back as strings; a stale cached answer beats an error
+        if not isinstance(results, list) and cached is not None:
+            return cached
+        return results
+
+
+def search_ttl(tool_name):
+    """Configured cache TTL in seconds for one of the search tools."""
+    return config["search_cache_ttl"][tool_name]
+
+
+search_client = CachedSearch(
+    os.path.join(config["data_cache_dir"], "search_cache.sqlite"),
+    online=config["online_tools"],
+)
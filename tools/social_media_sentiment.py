@@ -1,13 +1,17 @@
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_core.tools import tool
-from dotenv import load_dotenv
-load_dotenv()
-# Initialize the Tavily search tool once. We can reuse this instance for multiple specialized tools.
-tavily_tool = TavilySearchResults(max_results=3)
-
-@tool
-def get_social_media_sentiment(ticker: str, trade_date: str) -> str:
+from langchain_core.tools import StructuredTool
+from .search_cache import search_client, search_ttl
+
+def _sentiment_query(ticker, trade_date):
+    return f"social media sentiment and discussions for {ticker} stock around {trade_date}"
+
+def social_media_sentiment(ticker: str, trade_date: str) -> str:
+    """Performs a live web search for social media sentiment regarding a stock."""
+    return search_client.search(_sentiment_query(ticker, trade_date), trade_date, ttl=search_ttl("social_sentiment"))
+
+async def asocial_media_sentiment(ticker: str, trade_date: str) -> str:
     """Performs a live web search for social media sentiment regarding a stock."""
-    query = f"social media sentiment and discussions for {ticker} stock around {trade_date}"
-    return tavily_tool.invoke({"query": query})
+    return await search_client.asearch(_sentiment_query(ticker, trade_date), trade_date, ttl=search_ttl("social_sentiment"))
 
+get_social_media_sentiment = StructuredTool.from_function(
+    func=social_media_sentiment, coroutine=asocial_media_sentiment, name="get_social_media_sentiment"
+)
@@ -1,27 +1,47 @@
-from .finance_data import get_yfinance_data
-from .indicator_data import get_technical_indicators
-from .finance_news import get_finnhub_news
-from .social_media_sentiment import get_social_media_sentiment
-from .fundamental_analysis import get_fundamental_analysis
-from .macro_news import get_macroeconomic_news
-
+import importlib
 import sys
 import os
+import threading
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config import config
-from dotenv import load_dotenv
-load_dotenv()
+
+# Tool name -> module defining it. A tool's module (and the data client behind
+# it) is only imported when an agent that may call the tool is built.
+TOOL_MODULES = {
+    "get_yfinance_data": ".finance_data",
+    "get_technical_indicators": ".indicator_data",
+    "get_finnhub_news": ".finance_news",
+    "get_social_media_sentiment": ".social_media_sentiment",
+    "get_fundamental_analysis": ".fundamental_analysis",
+    "get_macroeconomic_news": ".macro_news",
+}
+
 # The Toolkit class aggregates all defined tools into a single, convenient object.
 class Toolkit:
     def __init__(self, config):
         self.config = config
-        self.get_yfinance_data = get_yfinance_data
-        self.get_technical_indicators = get_technical_indicators
-        self.get_finnhub_news = get_finnhub_news
-        self.get_social_media_sentiment = get_social_media_sentiment
-        self.get_fundamental_analysis = get_fundamental_analysis
-        self.get_macroeconomic_news = get_macroeconomic_news
+        self._tools = {}
+        self._lock = threading.Lock()
+
+    def get_tool(self, name):
+        """Return a tool by name, importing its module on first use."""
+        if name not in self._tools:
+            with self._lock:
+                if name not in self._tools:
+                    module = importlib.import_module(TOOL_MODULES[name], __package__)
+                    self._tools[name] = getattr(module, name)
+        return self._tools[name]
+
+    def __getattr__(self, name):
+        # toolkit.get_yfinance_data etc. resolve lazily
+        if name in TOOL_MODULES:
+            return self.get_tool(name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def tools_for(self, role):
+        """Return the tools an agent role is allowed to call, per config["agent_tools"]."""
+        tool_names = self.config.get("agent_tools", {}).get(role, [])
+        return [self.get_tool(name) for name in tool_names]
 
 # Instantiate the Toolkit, making all tools available through this single object.
 toolkit = Toolkit(config)
-print(f"Toolkit class defined and instantiated with live data tools.")
\ No newline at end of file